@@ -0,0 +1,266 @@
+"""
+NYC Address Normalization
+Turns free-form street addresses into MarketProof building URLs without a
+geocoder: a tokenizer expands directionals and street suffixes token by
+token, and the borough/neighborhood path segments come from the bundled
+ZIP table (nyc_zip_codes.csv). Resolutions are memoized, and URLs found to
+redirect or 404 can be recorded so they are never requested again.
+"""
+
+import csv
+import json
+import os
+import re
+import threading
+from functools import lru_cache
+
+from preflight import PageNotFound
+
+
+MARKETPROOF_BASE = 'https://nyc.marketproof.com/building'
+
+ZIP_TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'nyc_zip_codes.csv')
+
+DIRECTIONALS = {
+    'e': 'east', 'east': 'east',
+    'w': 'west', 'west': 'west',
+    'n': 'north', 'north': 'north',
+    's': 'south', 'south': 'south',
+}
+
+# USPS-style street suffix abbreviations -> the spelled-out form used in MarketProof slugs
+STREET_SUFFIXES = {
+    'st': 'street', 'str': 'street', 'street': 'street',
+    'ave': 'avenue', 'av': 'avenue', 'avn': 'avenue', 'avenue': 'avenue',
+    'rd': 'road', 'road': 'road',
+    'blvd': 'boulevard', 'boul': 'boulevard', 'boulevard': 'boulevard',
+    'pl': 'place', 'place': 'place',
+    'dr': 'drive', 'drv': 'drive', 'drive': 'drive',
+    'ln': 'lane', 'lane': 'lane',
+    'ct': 'court', 'court': 'court',
+    'ter': 'terrace', 'terr': 'terrace', 'terrace': 'terrace',
+    'pkwy': 'parkway', 'pky': 'parkway', 'parkway': 'parkway',
+    'hwy': 'highway', 'highway': 'highway',
+    'expy': 'expressway', 'expwy': 'expressway', 'expressway': 'expressway',
+    'tpke': 'turnpike', 'turnpike': 'turnpike',
+    'sq': 'square', 'square': 'square',
+    'plz': 'plaza', 'plaza': 'plaza',
+    'cir': 'circle', 'circle': 'circle',
+    'aly': 'alley', 'alley': 'alley',
+    'sl': 'slip', 'slip': 'slip',
+    'bway': 'broadway', 'bdwy': 'broadway', 'broadway': 'broadway',
+}
+
+# Tokens that start the apartment/unit part of an address (dropped from the slug)
+UNIT_DESIGNATORS = {'apt', 'apartment', 'unit', 'ste', 'suite', 'fl', 'floor', 'rm', 'room', 'ph', 'penthouse'}
+
+BOROUGH_NAMES = {
+    'manhattan': 'manhattan', 'new york': 'manhattan', 'nyc': 'manhattan',
+    'brooklyn': 'brooklyn',
+    'bronx': 'bronx', 'the bronx': 'bronx',
+    'queens': 'queens',
+    'staten island': 'staten-island',
+}
+
+# ZIP prefixes -> borough for ZIPs missing from the table
+_ZIP_PREFIX_BOROUGHS = [
+    (('100', '101', '102'), 'manhattan'),
+    (('103',), 'staten-island'),
+    (('104',), 'bronx'),
+    (('112',), 'brooklyn'),
+    (('110', '111', '113', '114', '116'), 'queens'),
+]
+
+# Neighborhood used when only the borough is known (the original address_to_url always used midtown)
+DEFAULT_NEIGHBORHOODS = {
+    'manhattan': 'midtown',
+    'brooklyn': 'downtown-brooklyn',
+    'bronx': 'concourse',
+    'queens': 'long-island-city',
+    'staten-island': 'st-george',
+}
+
+_HOUSE_NUMBER = re.compile(r'^\d+[a-z]?(?:-\d+[a-z]?)?$')
+_ORDINAL = re.compile(r'^(\d+)(?:st|nd|rd|th)$')
+_ZIP_CODE = re.compile(r'\b(\d{5})(?:-\d{4})?$')
+
+_zip_table = None
+_zip_table_lock = threading.Lock()
+
+
+def zip_table():
+    """ZIP code -> (borough, neighborhood), loaded once from nyc_zip_codes.csv"""
+    global _zip_table
+    with _zip_table_lock:
+        if _zip_table is None:
+            with open(ZIP_TABLE_PATH, newline='', encoding='utf-8') as f:
+                _zip_table = {row['zip_code']: (row['borough'], row['neighborhood']) for row in csv.DictReader(f)}
+        return _zip_table
+
+
+def borough_for_zip(zip_code):
+    """(borough, neighborhood) for a ZIP code; neighborhood is None if only the borough is known"""
+    if not zip_code:
+        return None, None
+    if zip_code in zip_table():
+        return zip_table()[zip_code]
+    for prefixes, borough in _ZIP_PREFIX_BOROUGHS:
+        if zip_code.startswith(prefixes):
+            return borough, None
+    return None, None
+
+
+def tokenize(text):
+    """Lowercase word/number tokens; '#' is kept as its own token, '37-12' stays one token"""
+    text = text.lower().replace("'", '').replace('.', ' ')
+    return re.findall(r'#|[a-z0-9]+(?:[-/][a-z0-9]+)*', text)
+
+
+@lru_cache(maxsize=65536)
+def normalize_address(address, zip_code=None):
+    """
+    Normalize a street address into its MarketProof slug parts
+
+    Args:
+        address: e.g. "110 W. 57th St, Apt 4B, New York, NY 10019"
+        zip_code: Optional ZIP code (otherwise taken from the address if present)
+
+    Returns:
+        dict: slug ('110-west-57-street'), zip_code, borough and neighborhood
+            (borough/neighborhood are None when nothing identifies them)
+    """
+    street, *rest = address.split(',')
+    borough_hint = None
+    for part in rest:
+        part = part.strip().lower()
+        if not zip_code:
+            match = _ZIP_CODE.search(part)
+            if match:
+                zip_code = match.group(1)
+        for name, borough in BOROUGH_NAMES.items():
+            if re.search(rf'\b{name}\b', part):
+                borough_hint = borough
+
+    tokens = tokenize(street)
+    # A trailing ZIP on a comma-less address ("110 West 57 Street 10019")
+    if len(tokens) > 2 and re.fullmatch(r'\d{5}', tokens[-1]):
+        zip_code = zip_code or tokens[-1]
+        tokens = tokens[:-1]
+
+    words = []
+    for index, token in enumerate(tokens):
+        if token == '#' or token in UNIT_DESIGNATORS:
+            break
+        if index == 0 and _HOUSE_NUMBER.match(token):
+            words.append(token)
+            continue
+        ordinal = _ORDINAL.match(token)
+        if ordinal:
+            token = ordinal.group(1)
+        elif index == 1 and words and token in DIRECTIONALS and index + 1 < len(tokens):
+            token = DIRECTIONALS[token]
+        words.append(token)
+
+    # Only the last street word is a suffix ("St Marks Pl" keeps its leading 'st')
+    if len(words) > 1 and words[-1] in STREET_SUFFIXES:
+        words[-1] = STREET_SUFFIXES[words[-1]]
+
+    slug = re.sub(r'[^a-z0-9-]+', '-', '-'.join(words)).strip('-')
+    slug = re.sub(r'-{2,}', '-', slug)
+
+    borough, neighborhood = borough_for_zip(zip_code)
+    if borough is None:
+        borough = borough_hint
+    return {'slug': slug, 'zip_code': zip_code, 'borough': borough, 'neighborhood': neighborhood}
+
+
+def building_url(normalized):
+    """MarketProof URL for a normalized address (missing borough/neighborhood fall back to defaults)"""
+    borough = normalized['borough'] or 'manhattan'
+    neighborhood = normalized['neighborhood'] or DEFAULT_NEIGHBORHOODS[borough]
+    slug = normalized['slug']
+    if normalized['zip_code']:
+        slug = f"{slug}-{normalized['zip_code']}"
+    return f'{MARKETPROOF_BASE}/{borough}/{neighborhood}/{slug}?tab=details'
+
+
+class AddressResolver:
+    def __init__(self, path=None):
+        """
+        Memoizing address -> URL resolver
+
+        Args:
+            path: Optional JSON file persisting verified URLs and known-missing
+                addresses across runs (see remember/mark_missing/save)
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        # (raw address, zip) -> normalized key, so repeat lookups skip tokenizing
+        self._keys = {}
+        # normalized key -> URL (constructed, or verified via remember)
+        self._urls = {}
+        self._verified = {}
+        self._missing = set()
+        if path and os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                saved = json.load(f)
+            self._verified = saved.get('verified', {})
+            self._missing = set(saved.get('missing', []))
+            self._urls.update(self._verified)
+
+    def key(self, address, zip_code=None):
+        """Normalized identity of an address ('<slug>|<zip>')"""
+        raw = (address, zip_code)
+        key = self._keys.get(raw)
+        if key is None:
+            normalized = normalize_address(address.strip(), zip_code)
+            key = f"{normalized['slug']}|{normalized['zip_code'] or ''}"
+            with self._lock:
+                self._keys[raw] = key
+                self._urls.setdefault(key, building_url(normalized))
+        return key
+
+    def resolve(self, address, zip_code=None):
+        """
+        MarketProof URL and slug for an address
+
+        Returns:
+            tuple: (url, slug)
+
+        Raises:
+            PageNotFound: The address is known not to exist on MarketProof (the
+                same error a pre-flight 404 raises, so it is never dead-lettered)
+        """
+        key = self.key(address, zip_code)
+        if key in self._missing:
+            raise PageNotFound(f"No MarketProof page for '{address}' (recorded as missing)")
+        return self._urls[key], key.split('|', 1)[0]
+
+    def remember(self, address, zip_code, url):
+        """Record the canonical URL an address actually resolved to (e.g. after a redirect)"""
+        key = self.key(address, zip_code)
+        with self._lock:
+            self._urls[key] = url
+            self._verified[key] = url
+            self._missing.discard(key)
+
+    def mark_missing(self, address, zip_code=None):
+        """Record that an address has no page so it is never loaded again"""
+        key = self.key(address, zip_code)
+        with self._lock:
+            self._missing.add(key)
+
+    def save(self):
+        """Persist verified and missing addresses to self.path (temp file + rename)"""
+        if not self.path:
+            return
+        with self._lock:
+            data = {'verified': dict(self._verified), 'missing': sorted(self._missing)}
+        temp_path = f'{self.path}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(temp_path, self.path)
+
+
+# Shared by every scraper in the process unless one is given its own
+default_resolver = AddressResolver()
@@ -0,0 +1,476 @@
+"""
+JSON API Capture and Replay
+MarketProof pages are a JavaScript app: the overview and violations values the
+scraper reads from rendered text arrive as XHR/fetch JSON. With capture on,
+Chrome's performance log is read after each tab is parsed, and every JSON
+response whose URL (or POST body) contains the building's slug is searched for
+the values the page parser found. Matches are recorded as (endpoint template,
+JSON path) pairs, narrowed building by building until they are unambiguous.
+
+Once every field a tab has shown is mapped, fetch() replays the endpoints for
+a new building over a pooled requests.Session and reads the fields back by
+path, without a browser. Anything that suggests the schema moved (an HTTP
+error, a non-JSON body, a path that no longer resolves, candidate paths that
+disagree) leaves that tab to Selenium, and the capture from that page load
+re-learns the mapping.
+
+Usage:
+    python api_capture.py api_endpoints.json
+    python api_capture.py api_endpoints.json "https://nyc.marketproof.com/building/manhattan/midtown/110-west-57-street-10019"
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import math
+import os
+import threading
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import footprint_geometry
+import page_parser
+import scrape_logging
+
+
+logger = scrape_logging.get_logger('api_capture')
+
+# Chrome capability that makes network events (and so response bodies) readable via get_log('performance')
+PERFORMANCE_LOGGING = {'performance': 'ALL'}
+
+# Tabs whose fields can be learned and replayed ('footprint' maps the GeoJSON polygon)
+TAB_FIELDS = {
+    'overview': page_parser.OVERVIEW_FIELDS,
+    'violations': page_parser.VIOLATION_FIELDS,
+    'footprint': ['geometry'],
+}
+
+# How a JSON value is turned into the string the page showed
+TRANSFORMS = {
+    'text': lambda text: text,
+    'title': str.title,
+    'upper': str.upper,
+    'lower': str.lower,
+}
+
+# Request headers replayed with an endpoint (cookies and credentials are never stored)
+_REPLAY_HEADERS = ('accept', 'content-type')
+
+# A value matching more paths than this on a first sighting is too common to learn from
+MAX_CANDIDATES = 8
+
+
+class ApiMismatch(Exception):
+    """A replayed endpoint no longer answers the way it did when it was learned"""
+
+
+def url_parts(url):
+    """{'borough', 'neighborhood', 'slug'} from a building URL, or None if it is not one"""
+    parts = [part for part in urlparse(url).path.split('/') if part]
+    if 'building' not in parts:
+        return None
+    index = parts.index('building')
+    if len(parts) < index + 4:
+        return None
+    borough, neighborhood, slug = parts[index + 1:index + 4]
+    return {'borough': borough, 'neighborhood': neighborhood, 'slug': slug}
+
+
+def _template(text, parts):
+    """Replace the building's slug/neighborhood/borough in text with placeholders"""
+    # Slug first: it may itself contain the borough or neighborhood name
+    for name in ('slug', 'neighborhood', 'borough'):
+        text = text.replace(parts[name], '{' + name + '}')
+    return text
+
+
+def _fill(template, parts):
+    for name in ('slug', 'neighborhood', 'borough'):
+        template = template.replace('{' + name + '}', parts[name])
+    return template
+
+
+def _as_text(value):
+    """The text a JSON scalar renders as (12.0 -> '12', whitespace collapsed)"""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return ' '.join(str(value).split())
+
+
+def _leaves(data, path=()):
+    """Yield (path, value) for every string/number in a JSON document"""
+    if isinstance(data, dict):
+        for key, value in data.items():
+            yield from _leaves(value, path + (key,))
+    elif isinstance(data, list):
+        for index, value in enumerate(data):
+            yield from _leaves(value, path + (index,))
+    elif isinstance(data, (str, int, float)) and not isinstance(data, bool):
+        yield path, data
+
+
+def _geometries(data, path=()):
+    """Yield (path, geometry) for every GeoJSON Polygon/MultiPolygon in a JSON document"""
+    if isinstance(data, dict):
+        if data.get('type') in ('Polygon', 'MultiPolygon') and 'coordinates' in data:
+            yield path, data
+            return
+        for key, value in data.items():
+            yield from _geometries(value, path + (key,))
+    elif isinstance(data, list):
+        for index, value in enumerate(data):
+            yield from _geometries(value, path + (index,))
+
+
+def _same_geometry(a, b):
+    """True if two polygons are the same building (equal, or equal up to coordinate rounding)"""
+    if a == b:
+        return True
+    try:
+        (lon_a, lat_a), (lon_b, lat_b) = footprint_geometry.centroid(a), footprint_geometry.centroid(b)
+        area_a, area_b = footprint_geometry.area_m2(a), footprint_geometry.area_m2(b)
+    except (KeyError, IndexError, TypeError, ValueError):
+        return False
+    close = abs(lat_a - lat_b) < 1e-5 and abs(lon_a - lon_b) < 1e-5 / math.cos(math.radians(lat_a))
+    return close and abs(area_a - area_b) <= 0.01 * max(area_a, area_b)
+
+
+def resolve_path(data, path):
+    """Value at a JSON path (list of keys/indexes); raises ApiMismatch if it is gone"""
+    for step in path:
+        try:
+            data = data[step]
+        except (KeyError, IndexError, TypeError):
+            raise ApiMismatch(f"path {'/'.join(map(str, path))} no longer resolves")
+    return data
+
+
+class ApiCapture:
+    def __init__(self, path=None, min_observations=2, session=None, timeout=10, pool_size=16,
+                 user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+                            '(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'):
+        """
+        Create a capture/replay store (share one between threads)
+
+        Args:
+            path: Optional JSON file persisting learned endpoints across runs (see save)
+            min_observations: Buildings a tab must have been captured on before it is replayed
+            session: Optional requests.Session (e.g. pointed at a local stub server)
+            timeout: Seconds per replayed request
+            pool_size: Pooled keep-alive connections per host
+            user_agent: User-Agent header, matching the browser's
+        """
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            session.headers['User-Agent'] = user_agent
+        self.session = session
+        self.path = path
+        self.min_observations = min_observations
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        # endpoint id -> {'method', 'url', 'body', 'headers'} with {slug}/{neighborhood}/{borough} placeholders
+        self.endpoints = {}
+        # tab -> field -> sorted [endpoint id, path, transform] candidates
+        self.fields = {tab: {} for tab in TAB_FIELDS}
+        # tab -> buildings captured, and fields the page has ever shown a value for
+        self.observations = {tab: 0 for tab in TAB_FIELDS}
+        self.seen = {tab: set() for tab in TAB_FIELDS}
+        self.counts = {'captured_responses': 0, 'unreplayable_responses': 0,
+                       'replayed': 0, 'fallback': 0, 'requests': 0}
+        if path and os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                saved = json.load(f)
+            self.endpoints = saved.get('endpoints', {})
+            for tab in TAB_FIELDS:
+                self.fields[tab] = {field: [[eid, list(path), transform] for eid, path, transform in candidates]
+                                    for field, candidates in saved.get('fields', {}).get(tab, {}).items()}
+                self.observations[tab] = saved.get('observations', {}).get(tab, 0)
+                self.seen[tab] = set(saved.get('seen', {}).get(tab, []))
+
+    def replayable(self, tab):
+        """True once every field the tab has ever shown maps to a learned JSON path"""
+        with self._lock:
+            fields = self.fields.get(tab)
+            return bool(fields) and self.observations[tab] >= self.min_observations and self.seen[tab] <= set(fields)
+
+    # ------------------------------------------------------------------ capture
+
+    def learn(self, driver, url, tabs_data):
+        """
+        Match a parsed page against the JSON its browser fetched
+
+        Drains the driver's performance log, so call it once per page load
+        after parsing (the response bodies are gone after the next navigation).
+
+        Args:
+            driver: Chrome webdriver started with PERFORMANCE_LOGGING
+            url: Building URL the page was loaded for
+            tabs_data: {tab: fields} as the browser path produced them, e.g.
+                {'overview': {...}, 'footprint': {'geometry': {...}}}
+
+        Returns:
+            int: Number of fields with at least one JSON path after this page
+        """
+        parts = url_parts(url)
+        responses = self._drain(driver, parts)
+        if not parts or not responses:
+            return 0
+
+        mapped = 0
+        with self._lock:
+            for tab, data in tabs_data.items():
+                values = {field: value for field, value in (data or {}).items()
+                          if field in TAB_FIELDS[tab] and value}
+                if not values:
+                    continue
+                matches = self._match(tab, values, responses)
+                for field in values:
+                    self.seen[tab].add(field)
+                    new = matches.get(field, set())
+                    old = {(eid, tuple(path), transform) for eid, path, transform in self.fields[tab].get(field, [])}
+                    kept = old & new if old else new
+                    if not kept and len(new) <= MAX_CANDIDATES:
+                        # Nothing old still matches: the schema moved, start over from this page
+                        kept = new
+                    if kept and len(kept) <= MAX_CANDIDATES:
+                        self.fields[tab][field] = [[eid, list(path), transform] for eid, path, transform in sorted(kept)]
+                        mapped += 1
+                    else:
+                        self.fields[tab].pop(field, None)
+                self.observations[tab] += 1
+            for eid, endpoint, _ in responses:
+                self.endpoints.setdefault(eid, endpoint)
+        return mapped
+
+    @staticmethod
+    def _match(tab, values, responses):
+        """field -> {(endpoint id, path, transform)} whose JSON value equals the page's"""
+        matches = {}
+        if tab == 'footprint':
+            for eid, _, data in responses:
+                for path, geometry in _geometries(data):
+                    if _same_geometry(geometry, values['geometry']):
+                        matches.setdefault('geometry', set()).add((eid, path, 'geojson'))
+            return matches
+
+        wanted = {}
+        for field, value in values.items():
+            wanted.setdefault(_as_text(value).lower(), []).append((field, str(value)))
+        for eid, _, data in responses:
+            for path, leaf in _leaves(data):
+                text = _as_text(leaf)
+                for field, value in wanted.get(text.lower(), ()):
+                    for name, transform in TRANSFORMS.items():
+                        if transform(text) == value:
+                            matches.setdefault(field, set()).add((eid, path, name))
+                            break
+        return matches
+
+    def _drain(self, driver, parts):
+        """[(endpoint id, endpoint, JSON body)] for the replayable JSON XHR/fetch responses in the log"""
+        try:
+            entries = driver.get_log('performance')
+        except Exception:
+            # Performance logging not enabled for this browser
+            return []
+        if not parts:
+            return []
+
+        sent, received = {}, {}
+        for entry in entries:
+            try:
+                message = json.loads(entry['message'])['message']
+            except (KeyError, ValueError):
+                continue
+            params = message.get('params', {})
+            if message.get('method') == 'Network.requestWillBeSent':
+                sent[params.get('requestId')] = params.get('request', {})
+            elif message.get('method') == 'Network.responseReceived' and params.get('type') in ('XHR', 'Fetch'):
+                response = params.get('response', {})
+                if 'json' in (response.get('mimeType') or '') and 200 <= response.get('status', 0) < 300:
+                    received[params.get('requestId')] = response
+
+        captured = []
+        for request_id in received:
+            request = sent.get(request_id)
+            if request is None:
+                continue
+            endpoint = self._endpoint(request, parts)
+            if endpoint is None:
+                with self._lock:
+                    self.counts['unreplayable_responses'] += 1
+                continue
+            try:
+                body = driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': request_id})
+                text = base64.b64decode(body['body']).decode('utf-8') if body.get('base64Encoded') else body['body']
+                data = json.loads(text)
+            except Exception:
+                # Body already evicted, or not JSON after all
+                continue
+            eid = hashlib.sha1(f"{endpoint['method']} {endpoint['url']}\n{endpoint['body'] or ''}"
+                               .encode('utf-8')).hexdigest()[:12]
+            captured.append((eid, endpoint, data))
+        with self._lock:
+            self.counts['captured_responses'] += len(captured)
+        return captured
+
+    @staticmethod
+    def _endpoint(request, parts):
+        """Templated endpoint for a logged request, or None if it is not keyed by the building's slug"""
+        url = _template(request.get('url', ''), parts)
+        body = _template(request['postData'], parts) if request.get('postData') else None
+        if '{slug}' not in url and '{slug}' not in (body or ''):
+            # Keyed by something the URL does not carry (internal id, BBL): cannot be replayed
+            return None
+        headers = {name: value for name, value in (request.get('headers') or {}).items()
+                   if name.lower() in _REPLAY_HEADERS}
+        return {'method': request.get('method', 'GET'), 'url': url, 'body': body, 'headers': headers}
+
+    # ------------------------------------------------------------------ replay
+
+    def fetch(self, url, tabs):
+        """
+        Fetch tabs for a building from the learned JSON endpoints, without a browser
+
+        Args:
+            url: Building URL
+            tabs: Tabs wanted (any of TAB_FIELDS; others are ignored)
+
+        Returns:
+            dict: {tab: fields} for each tab fully answered by the API; tabs
+                missing from the result need the browser
+        """
+        parts = url_parts(url)
+        if not parts:
+            return {}
+        responses = {}
+        fetched = {}
+        for tab in tabs:
+            if tab not in TAB_FIELDS or not self.replayable(tab):
+                continue
+            with self._lock:
+                fields = {field: list(candidates) for field, candidates in self.fields[tab].items()}
+            try:
+                data = dict.fromkeys(TAB_FIELDS[tab])
+                for field, candidates in fields.items():
+                    data[field] = self._replay_field(field, candidates, parts, responses)
+            except (ApiMismatch, requests.RequestException) as e:
+                logger.warning("✗ API replay of %s failed (%s); falling back to the browser", tab, e)
+                with self._lock:
+                    self.counts['fallback'] += 1
+                continue
+            fetched[tab] = data
+            with self._lock:
+                self.counts['replayed'] += 1
+        return fetched
+
+    def _replay_field(self, field, candidates, parts, responses):
+        """A field's value from every candidate path; they must all agree"""
+        values = set()
+        for eid, path, transform in candidates:
+            value = resolve_path(self._response(eid, parts, responses), path)
+            if transform == 'geojson':
+                return value
+            values.add(None if value is None else TRANSFORMS[transform](_as_text(value)))
+        if len(values) != 1:
+            raise ApiMismatch(f"candidate paths for {field} disagree: {sorted(map(str, values))}")
+        return values.pop()
+
+    def _response(self, eid, parts, responses):
+        """JSON body of an endpoint for this building (each endpoint is requested once per building)"""
+        if eid not in responses:
+            endpoint = self.endpoints.get(eid)
+            try:
+                if endpoint is None:
+                    raise ApiMismatch(f"endpoint {eid} is not known")
+                target = _fill(endpoint['url'], parts)
+                body = _fill(endpoint['body'], parts).encode('utf-8') if endpoint['body'] else None
+                with self._lock:
+                    self.counts['requests'] += 1
+                response = self.session.request(endpoint['method'], target, data=body,
+                                                headers=endpoint['headers'], timeout=self.timeout)
+                if not 200 <= response.status_code < 300:
+                    raise ApiMismatch(f"HTTP {response.status_code} from {target}")
+                try:
+                    responses[eid] = response.json()
+                except ValueError:
+                    raise ApiMismatch(f"{target} did not return JSON")
+            except (ApiMismatch, requests.RequestException) as e:
+                responses[eid] = e
+        if isinstance(responses[eid], Exception):
+            raise responses[eid]
+        return responses[eid]
+
+    # ------------------------------------------------------------------ housekeeping
+
+    def save(self):
+        """Persist learned endpoints and field paths to self.path (temp file + rename)"""
+        if not self.path:
+            return
+        with self._lock:
+            used = {candidate[0] for fields in self.fields.values()
+                    for candidates in fields.values() for candidate in candidates}
+            data = {
+                'endpoints': {eid: endpoint for eid, endpoint in self.endpoints.items() if eid in used},
+                'fields': self.fields,
+                'observations': self.observations,
+                'seen': {tab: sorted(fields) for tab, fields in self.seen.items()},
+            }
+            temp_path = f'{self.path}.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2, ensure_ascii=False)
+            os.replace(temp_path, self.path)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counts)
+            stats['mapped_fields'] = {tab: len(fields) for tab, fields in self.fields.items()}
+        stats['replayable_tabs'] = [tab for tab in TAB_FIELDS if self.replayable(tab)]
+        return stats
+
+    def print_stats(self):
+        stats = self.stats()
+        print(f"\n{'='*60}")
+        print("JSON API:")
+        print(f"{'='*60}")
+        print(f"Replayed tabs: {stats['replayed']}  Fell back to browser: {stats['fallback']}  "
+              f"Requests: {stats['requests']}")
+        print(f"Captured responses: {stats['captured_responses']}  "
+              f"Not replayable: {stats['unreplayable_responses']}")
+        mapped = ', '.join(f'{tab} {count}' for tab, count in stats['mapped_fields'].items())
+        print(f"Mapped fields: {mapped}  Replayable: {', '.join(stats['replayable_tabs']) or 'none yet'}")
+        print(f"{'='*60}\n")
+
+    def close(self):
+        self.session.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Inspect learned JSON endpoints or replay them for one building')
+    parser.add_argument('path', help='Endpoint file written by a capture run (--api-capture)')
+    parser.add_argument('url', nargs='?', help='Building URL to fetch through the API')
+    args = parser.parse_args()
+
+    capture = ApiCapture(args.path)
+    if args.url:
+        print(json.dumps(capture.fetch(args.url, list(TAB_FIELDS)), indent=2, ensure_ascii=False))
+    else:
+        for tab, fields in capture.fields.items():
+            print(f"{tab} ({capture.observations[tab]} captures, "
+                  f"{'replayable' if capture.replayable(tab) else 'browser only'}):")
+            for field, candidates in sorted(fields.items()):
+                for eid, path, transform in candidates:
+                    endpoint = capture.endpoints.get(eid, {})
+                    print(f"  {field}: {endpoint.get('method')} {endpoint.get('url')} "
+                          f"-> {'/'.join(map(str, path))} ({transform})")
+    capture.close()
+
+
+if __name__ == "__main__":
+    main()
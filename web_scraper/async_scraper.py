@@ -0,0 +1,261 @@
+"""
+Async Scraping Front-End
+asyncio API over NYCBuildingScraper. Blocking WebDriver calls run on a
+dedicated thread pool with one long-lived scraper per slot; results stream
+back as each building finishes, with bounded concurrency, per-domain
+politeness limits and cancellation.
+
+Usage:
+    async for building_data in scrape_many(addresses, concurrency=4):
+        ...
+
+    python async_scraper.py addresses.csv --concurrency 4 > buildings.jsonl
+"""
+
+import argparse
+import asyncio
+import collections
+import contextlib
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from nyc_building_scraper import NYCBuildingScraper, get_chromedriver_path
+import scrape_logging
+
+
+logger = scrape_logging.get_logger('async')
+
+# Host used by address_to_url, for politeness accounting of address jobs
+DEFAULT_DOMAIN = 'nyc.marketproof.com'
+
+
+class AsyncScraper:
+    def __init__(self, concurrency=4, per_domain=None, min_interval=1.0, headless=True,
+                 cache=None, scraper_factory=None):
+        """
+        Initialize the async front-end (browsers start on demand)
+
+        Args:
+            concurrency: Maximum buildings in flight (and Chrome sessions)
+            per_domain: Maximum buildings in flight against one host (defaults to
+                concurrency; a lower value also lowers concurrency, since every
+                address job targets the same host)
+            min_interval: Minimum seconds between scrape starts against one host
+            headless: Run Chrome without a visible window
+            cache: Optional ScrapeCache shared by all scrapers
+            scraper_factory: Optional callable returning a scraper (defaults to NYCBuildingScraper)
+        """
+        self.concurrency = max(1, int(concurrency))
+        self.per_domain = max(1, int(per_domain)) if per_domain is not None else self.concurrency
+        if self.per_domain < self.concurrency:
+            # The extra browsers would only sit idle waiting for the host's slots
+            logger.warning("Concurrency %d capped to %d by the per-domain limit", self.concurrency, self.per_domain)
+            self.concurrency = self.per_domain
+        self.min_interval = min_interval
+        self.headless = headless
+        self.cache = cache
+        self.scraper_factory = scraper_factory or self._default_factory
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='async-scraper')
+        self._scrapers = []
+        self._slots_used = 0
+        self._idle = None
+        self._domain_slots = {}
+        self._domain_locks = collections.defaultdict(asyncio.Lock)
+        self._last_start = collections.defaultdict(float)
+
+    def _default_factory(self):
+        return NYCBuildingScraper(headless=self.headless, driver_path=get_chromedriver_path(),
+                                  cache=self.cache, lazy_start=self.cache is not None)
+
+    async def scrape_many(self, jobs):
+        """
+        Scrape buildings concurrently, yielding results as they complete
+
+        Args:
+            jobs: Iterable of building URLs, addresses, or (address, zip_code) tuples
+
+        Yields:
+            dict: building_data for each success, or {'job': ..., 'error': ...} for a failure
+        """
+        if self._idle is None:
+            self._idle = asyncio.Queue()
+        jobs = iter(jobs)
+        pending = set()
+        try:
+            while True:
+                # Only keep `concurrency` tasks alive so huge inputs are consumed lazily
+                while len(pending) < self.concurrency:
+                    job = next(jobs, None)
+                    if job is None:
+                        break
+                    pending.add(asyncio.ensure_future(self._run_job(job)))
+                if not pending:
+                    break
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        finally:
+            # Consumer stopped early or was cancelled: drop everything not yet started
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _run_job(self, job):
+        loop = asyncio.get_running_loop()
+        domain = self._domain(job)
+        slots = self._domain_slots.setdefault(domain, asyncio.Semaphore(self.per_domain))
+
+        async with slots:
+            await self._respect_interval(domain)
+            try:
+                scraper = await self._acquire()
+            except Exception as e:
+                logger.error("✗ Browser startup failed for %s: %s", job, e)
+                return {'job': job, 'error': f'Browser startup failed: {e}'}
+            future = self._executor.submit(self._scrape, scraper, job)
+            try:
+                result = await asyncio.wrap_future(future)
+            except asyncio.CancelledError:
+                # A running thread cannot be interrupted; reclaim its scraper once the call returns
+                future.add_done_callback(lambda _: self._release_threadsafe(loop, scraper))
+                raise
+            except Exception as e:
+                logger.error("✗ Failed on %s: %s", job, e)
+                await self._discard(scraper)
+                return {'job': job, 'error': str(e)}
+            self._idle.put_nowait(scraper)
+            return result
+
+    def _release_threadsafe(self, loop, scraper):
+        with contextlib.suppress(RuntimeError):
+            loop.call_soon_threadsafe(self._idle.put_nowait, scraper)
+
+    async def _respect_interval(self, domain):
+        """Space out scrape starts against one host by at least min_interval"""
+        loop = asyncio.get_running_loop()
+        async with self._domain_locks[domain]:
+            delay = self._last_start[domain] + self.min_interval - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._last_start[domain] = loop.time()
+
+    async def _acquire(self):
+        """Get an idle scraper, starting a new one while under the concurrency limit"""
+        if self._idle.empty() and self._slots_used < self.concurrency:
+            # Claim the slot before awaiting so concurrent callers cannot overshoot
+            self._slots_used += 1
+            loop = asyncio.get_running_loop()
+            future = self._executor.submit(self._create)
+            try:
+                return await asyncio.wrap_future(future)
+            except asyncio.CancelledError:
+                future.add_done_callback(lambda f: self._reclaim_created(loop, f))
+                raise
+            except Exception:
+                self._slots_used -= 1
+                raise
+        return await self._idle.get()
+
+    def _reclaim_created(self, loop, future):
+        """Hand a scraper started for a cancelled job to the idle pool (or free its slot)"""
+        if future.cancelled() or future.exception():
+            with contextlib.suppress(RuntimeError):
+                loop.call_soon_threadsafe(self._free_slot)
+        else:
+            self._release_threadsafe(loop, future.result())
+
+    def _free_slot(self):
+        self._slots_used -= 1
+
+    def _create(self):
+        scraper = self.scraper_factory()
+        self._scrapers.append(scraper)
+        return scraper
+
+    async def _discard(self, scraper):
+        """Close a scraper whose session may be broken so the slot gets a fresh one"""
+        self._scrapers.remove(scraper)
+        self._slots_used -= 1
+        loop = asyncio.get_running_loop()
+        with contextlib.suppress(Exception):
+            await loop.run_in_executor(self._executor, scraper.close)
+
+    @staticmethod
+    def _domain(job):
+        if isinstance(job, str) and job.startswith('http'):
+            return urlparse(job).netloc
+        return DEFAULT_DOMAIN
+
+    @staticmethod
+    def _scrape(scraper, job):
+        if isinstance(job, str) and job.startswith('http'):
+            return scraper.scrape_building(job)
+        if isinstance(job, str):
+            return scraper.scrape_by_address(job)
+        return scraper.scrape_by_address(*job)
+
+    async def aclose(self):
+        """Wait for in-flight browser calls, then close every Chrome session"""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._executor.shutdown)
+        for scraper in self._scrapers:
+            with contextlib.suppress(Exception):
+                await loop.run_in_executor(None, scraper.close)
+        self._scrapers = []
+        self._slots_used = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+
+async def scrape_many(jobs, concurrency=4, **options):
+    """
+    Convenience wrapper: scrape jobs with a temporary AsyncScraper
+
+    Args:
+        jobs: Iterable of building URLs, addresses, or (address, zip_code) tuples
+        concurrency: Maximum buildings in flight
+        **options: Passed to AsyncScraper
+
+    Yields:
+        dict: building_data (or an error record) as each building finishes
+    """
+    async with AsyncScraper(concurrency=concurrency, **options) as scraper:
+        async for result in scraper.scrape_many(jobs):
+            yield result
+
+
+async def _stream_jsonl(jobs, out, **options):
+    async for result in scrape_many(jobs, **options):
+        out.write(json.dumps(result, ensure_ascii=False) + '\n')
+        out.flush()
+
+
+def main():
+    from batch_scraper import load_addresses
+
+    parser = argparse.ArgumentParser(description='Stream scraped buildings as JSON lines')
+    parser.add_argument('addresses', help='CSV/text file with "address[,zip_code]" rows')
+    parser.add_argument('--concurrency', type=int, default=4, help='Buildings in flight')
+    parser.add_argument('--per-domain', type=int, help='Buildings in flight per host (default: --concurrency)')
+    parser.add_argument('--min-interval', type=float, default=1.0, help='Seconds between starts per host')
+    parser.add_argument('--headed', action='store_true', help='Show the Chrome windows')
+    scrape_logging.add_arguments(parser)
+    args = parser.parse_args()
+
+    # Scraper progress goes to stderr so stdout stays clean JSON lines for the caller
+    scrape_logging.configure_from_args(args, stream=sys.stderr)
+    out = sys.stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        asyncio.run(_stream_jsonl(load_addresses(args.addresses), out, concurrency=args.concurrency,
+                                  per_domain=args.per_domain, min_interval=args.min_interval,
+                                  headless=not args.headed))
+
+
+if __name__ == "__main__":
+    main()
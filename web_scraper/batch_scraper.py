@@ -0,0 +1,543 @@
+"""
+Batch Scraping Engine for NYCBuildingScraper
+Spreads a list of addresses across a pool of long-lived Chrome sessions.
+Each worker pays browser startup once, isolates its own failures, and the
+run ends with an aggregate throughput report.
+
+Usage:
+    python batch_scraper.py addresses.csv --workers 4 --headless
+    python batch_scraper.py addresses.csv --workers 8 --headless --output-format jsonl
+    python batch_scraper.py addresses.csv --workers 4 --headless --api-capture api_endpoints.json
+    python batch_scraper.py scraped_buildings --refresh violations --headless
+    python batch_scraper.py addresses.csv --workers 8 --headless --quiet --log-json --log-file scrape.log
+    python batch_scraper.py addresses.csv --workers 4 --headless --retries 2 --dead-letters dead_letters.jsonl
+    python batch_scraper.py dead_letters.jsonl --replay --headless --dead-letters dead_letters.2.jsonl
+    python batch_scraper.py addresses.csv --workers 4 --headless --rate-limit rate_limit.json --max-rate 0.5
+"""
+
+import argparse
+import csv
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from nyc_building_scraper import FOOTPRINT_FORMATS, NYCBuildingScraper, get_chromedriver_path
+from scrape_cache import ScrapeCache
+from browser_profile import ProfileManager
+from debug_capture import DebugCapture
+from footprint_store import FootprintStore
+from preflight import Preflight
+from address_normalizer import AddressResolver
+from api_capture import ApiCapture
+from scrape_metrics import ScrapeMetrics
+from retry_scheduler import NOT_FOUND, DeadLetterQueue, RetryScheduler, classify_error
+from rate_limiter import RateLimiter
+from output_sink import SINKS, open_sink, recover_parts
+import scrape_logging
+
+
+logger = scrape_logging.get_logger('batch')
+
+
+def load_addresses(path):
+    """
+    Load addresses from a CSV or plain text file
+
+    Each row is "address[,zip_code]". A header row whose first cell is
+    "address" is skipped, as are blank lines and lines starting with '#'.
+
+    Args:
+        path: Path to the CSV/text file
+
+    Returns:
+        list: (address, zip_code) tuples, zip_code may be None
+    """
+    addresses = []
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.reader(f):
+            cells = [cell.strip() for cell in row]
+            if not cells or not cells[0] or cells[0].startswith('#'):
+                continue
+            if cells[0].lower() == 'address':
+                continue
+            zip_code = cells[1] if len(cells) > 1 and cells[1] else None
+            addresses.append((cells[0], zip_code))
+    return addresses
+
+
+class BatchScraper:
+    def __init__(self, workers=4, headless=True, output_dir='scraped_buildings',
+                 max_startup_failures=3, scraper_factory=None, cache=None, profile_dir=None,
+                 output_format='json', debug_capture=None, footprint_format='png', footprint_quality=85,
+                 encode_threads=2, footprint_store=None, footprint_mode='raster', render_footprints=True,
+                 preflight=None, address_resolver=None, api_capture=None, metrics=None,
+                 retry_scheduler=None, dead_letters=None, rate_limiter=None):
+        """
+        Initialize the browser pool
+
+        Args:
+            workers: Number of concurrent Chrome sessions
+            headless: Run Chrome without a visible window
+            output_dir: Directory for scraped output (None to skip saving)
+            max_startup_failures: Consecutive failed browser starts before a worker retires
+            scraper_factory: Optional callable returning a scraper (defaults to NYCBuildingScraper)
+            cache: Optional ScrapeCache shared by all workers; browsers then start lazily
+                so workers that only see cached buildings never launch Chrome
+            profile_dir: Optional directory of persistent Chrome profiles (one slot per worker)
+            output_format: 'json' (one file per building), 'jsonl' or 'parquet' (see output_sink)
+            debug_capture: Optional DebugCapture shared by all workers
+            footprint_format: 'png', 'webp' or 'jpeg' for footprint images
+            footprint_quality: Quality for lossy footprint formats
+            encode_threads: Threads cropping/encoding footprints for all workers (0 encodes inline)
+            footprint_store: Optional FootprintStore shared by all workers (deduplicated images)
+            footprint_mode: 'raster' (canvas screenshot) or 'vector' (GeoJSON polygon from the map)
+            render_footprints: In vector mode, also draw each polygon to an image
+            preflight: Optional Preflight shared by all workers (404s fail without a page load)
+            address_resolver: Optional AddressResolver shared by all workers
+            api_capture: Optional ApiCapture shared by all workers; browsers then start lazily
+                so buildings answered by the JSON API never launch Chrome
+            metrics: Optional ScrapeMetrics shared by all workers (phase spans, field hit
+                rates, round trips, browser starts and failures)
+            retry_scheduler: Optional RetryScheduler shared by all workers; failed tabs are
+                reloaded on their own, and jobs that raise transiently are re-run on a fresh browser
+            dead_letters: Optional DeadLetterQueue receiving jobs that still failed (see replay)
+            rate_limiter: Optional RateLimiter every worker's page loads wait on (its state file
+                can also be shared with other runs on this machine)
+        """
+        self.workers = max(1, int(workers))
+        self.headless = headless
+        self.output_dir = output_dir
+        self.output_format = output_format
+        self.sink = None
+        self.max_startup_failures = max_startup_failures
+        self.scraper_factory = scraper_factory or self._default_factory
+        self.cache = cache
+        self.debug_capture = debug_capture
+        self.footprint_format = footprint_format
+        self.footprint_quality = footprint_quality
+        self.encode_threads = encode_threads
+        self.footprint_store = footprint_store
+        self.footprint_mode = footprint_mode
+        self.render_footprints = render_footprints
+        self.preflight = preflight
+        self.address_resolver = address_resolver
+        self.api_capture = api_capture
+        self.metrics = metrics
+        self.retry_scheduler = retry_scheduler
+        self.dead_letters = dead_letters
+        self.rate_limiter = rate_limiter
+        self._encoder = None
+        self.profile_manager = ProfileManager(profile_dir, max_profiles=self.workers) if profile_dir else None
+        self._lock = threading.Lock()
+
+    def _default_factory(self):
+        return NYCBuildingScraper(headless=self.headless, driver_path=get_chromedriver_path(),
+                                  cache=self.cache,
+                                  lazy_start=self.cache is not None or self.api_capture is not None,
+                                  profile_manager=self.profile_manager, debug_capture=self.debug_capture,
+                                  footprint_format=self.footprint_format, footprint_quality=self.footprint_quality,
+                                  footprint_encoder=self._encoder, footprint_store=self.footprint_store,
+                                  footprint_mode=self.footprint_mode, render_footprints=self.render_footprints,
+                                  preflight=self.preflight, address_resolver=self.address_resolver,
+                                  api_capture=self.api_capture, metrics=self.metrics,
+                                  retry_scheduler=self.retry_scheduler, rate_limiter=self.rate_limiter)
+
+    def run(self, addresses):
+        """
+        Scrape every address using the worker pool
+
+        Args:
+            addresses: Iterable of (address, zip_code) tuples
+
+        Returns:
+            dict: Aggregate report with results, failures and throughput
+        """
+        jobs = [{'address': address, 'zip_code': zip_code} for address, zip_code in addresses]
+        if not self.output_dir:
+            return self._run_pool(jobs, self._scrape_address, 'Batch scraping {total} addresses')
+        with self._open_sink() as self.sink:
+            return self._run_pool(jobs, self._scrape_address, 'Batch scraping {total} addresses')
+
+    def refresh(self, json_paths, tabs=('violations',)):
+        """
+        Re-scrape selected tabs for buildings already saved by save_data
+
+        Args:
+            json_paths: Iterable of saved building JSON paths
+            tabs: Tabs to refresh ('overview', 'footprint', 'violations')
+
+        Returns:
+            dict: Aggregate report with results, failures and throughput
+        """
+        tabs = list(tabs)
+        jobs = [{'json_path': path, 'tabs': tabs} for path in json_paths]
+        return self._run_pool(jobs, self._refresh_saved, f"Refreshing {', '.join(tabs)} for {{total}} buildings")
+
+    def replay(self, entries):
+        """
+        Re-run jobs from a dead-letter queue
+
+        A building whose record was saved as a JSON file has only its failed
+        tabs re-scraped, in place; anything else (jobs that raised, bulk output
+        formats) is scraped again from its address.
+
+        Args:
+            entries: Entries from DeadLetterQueue.load
+
+        Returns:
+            dict: Aggregate report with results, failures and throughput
+        """
+        jobs = []
+        for entry in entries:
+            job = dict(entry['job'])
+            tabs = [tab for tab in (entry.get('failures') or {}) if tab in NYCBuildingScraper.TABS]
+            path = job.get('json_path') or entry.get('output_file')
+            if tabs and path and path.endswith('.json') and os.path.exists(path):
+                job.update(json_path=path, tabs=tabs)
+            jobs.append(job)
+
+        def replay_job(scraper, job):
+            if 'json_path' in job:
+                return self._refresh_saved(scraper, job)
+            return self._scrape_address(scraper, job)
+
+        if not self.output_dir:
+            return self._run_pool(jobs, replay_job, 'Replaying {total} dead-lettered jobs')
+        with self._open_sink() as self.sink:
+            return self._run_pool(jobs, replay_job, 'Replaying {total} dead-lettered jobs')
+
+    def _open_sink(self):
+        """Open the output sink after publishing what a killed earlier run left in '.part' files"""
+        recover_parts(self.output_dir)
+        return open_sink(self.output_format, self.output_dir)
+
+    def _scrape_address(self, scraper, job):
+        building_data = scraper.scrape_by_address(job['address'], job['zip_code'])
+        output_file = None
+        if self.sink:
+            started = time.perf_counter()
+            output_file = self.sink.write(building_data)
+            if self.metrics:
+                self.metrics.observe('save', time.perf_counter() - started)
+        self._dead_letter_tabs(job, building_data, output_file)
+        return output_file
+
+    def _refresh_saved(self, scraper, job):
+        building_data = scraper.refresh_saved(job['json_path'], job['tabs'])
+        self._dead_letter_tabs(job, building_data, job['json_path'])
+        return job['json_path']
+
+    def _dead_letter_tabs(self, job, building_data, output_file):
+        """Dead-letter a saved building whose tabs still failed after their retries"""
+        failures = building_data.get('failures')
+        if self.dead_letters and failures:
+            self.dead_letters.add(self._job_fields(job), failures, url=building_data['url'],
+                                  output_file=output_file, worker=threading.current_thread().name)
+
+    @staticmethod
+    def _job_fields(job):
+        """A job without its retry bookkeeping"""
+        return {key: value for key, value in job.items() if key != 'retries'}
+
+    def _run_pool(self, job_list, task, title):
+        """
+        Run task(scraper, job) for every job across the worker pool
+
+        Args:
+            job_list: Job dicts; their fields are copied into the report entries
+            task: Callable returning the job's output file (or None)
+            title: Banner text, formatted with {total}
+        """
+        jobs = queue.Queue()
+        for job in job_list:
+            jobs.put(job)
+        total = jobs.qsize()
+
+        report = {
+            'started_at': datetime.now().isoformat(),
+            'total': total,
+            'succeeded': 0,
+            'failed': 0,
+            'results': [],
+            'failures': [],
+            'workers': {},
+        }
+        if not total:
+            # Nothing to do: don't start any worker (or, without lazy_start, any browser)
+            logger.info("No jobs to run")
+            report.update(finished_at=datetime.now().isoformat(), elapsed_seconds=0.0, buildings_per_minute=0.0)
+            return report
+
+        print(f"\n{'='*60}")
+        print(f"{title.format(total=total)} with {self.workers} workers")
+        print(f"{'='*60}\n")
+
+        start = time.perf_counter()
+        if self.encode_threads:
+            self._encoder = ThreadPoolExecutor(max_workers=self.encode_threads, thread_name_prefix='footprint-encoder')
+        try:
+            threads = []
+            for worker_id in range(min(self.workers, total)):
+                thread = threading.Thread(target=self._worker, args=(worker_id, jobs, task, report),
+                                          name=f'scraper-worker-{worker_id}', daemon=True)
+                thread.start()
+                threads.append(thread)
+            for thread in threads:
+                thread.join()
+        finally:
+            # Workers wait for their own footprints on close; this just stops the pool
+            if self._encoder:
+                self._encoder.shutdown(wait=True)
+                self._encoder = None
+        elapsed = time.perf_counter() - start
+
+        # Jobs left over mean every worker retired because its browser kept failing
+        while not jobs.empty():
+            report['failed'] += 1
+            report['failures'].append({**jobs.get_nowait(), 'worker': None,
+                                       'error': 'No healthy browser workers left'})
+
+        report['finished_at'] = datetime.now().isoformat()
+        report['elapsed_seconds'] = round(elapsed, 2)
+        report['buildings_per_minute'] = round(report['succeeded'] / elapsed * 60, 2) if elapsed else 0.0
+        if self.cache:
+            report['cache'] = self.cache.stats()
+        self.print_report(report)
+        return report
+
+    def _start_browser(self, stats):
+        """Start a browser for a worker, returning None if startup fails"""
+        stats['browser_starts'] += 1
+        if self.metrics:
+            self.metrics.inc('browser_starts')
+            if stats['startup_failures']:
+                self.metrics.inc('retries', kind='browser_start')
+        started = time.perf_counter()
+        try:
+            scraper = self.scraper_factory()
+        except Exception as e:
+            logger.error("✗ Browser startup failed: %s", e)
+            stats['startup_failures'] += 1
+            if self.metrics:
+                self.metrics.inc('browser_start_failures')
+            return None
+        stats['startup_failures'] = 0
+        stats['startup_seconds'] += time.perf_counter() - started
+        return scraper
+
+    def _worker(self, worker_id, jobs, task, report):
+        """Pull addresses off the queue with one long-lived scraper"""
+        stats = {'scraped': 0, 'failed': 0, 'browser_starts': 0, 'startup_failures': 0,
+                 'startup_seconds': 0.0, 'busy_seconds': 0.0}
+        with self._lock:
+            report['workers'][worker_id] = stats
+
+        scraper = None
+        try:
+            while True:
+                # Take the job first so no browser is started once the queue is empty
+                try:
+                    job = jobs.get_nowait()
+                except queue.Empty:
+                    return
+
+                while scraper is None:
+                    if stats['startup_failures'] >= self.max_startup_failures:
+                        logger.error("✗ Worker %s retired after %d failed browser starts",
+                                     worker_id, stats['startup_failures'])
+                        # Left for another worker (or reported as failed once every worker retires)
+                        jobs.put(job)
+                        return
+                    scraper = self._start_browser(stats)
+
+                started = time.perf_counter()
+                try:
+                    output_file = task(scraper, job)
+                    with self._lock:
+                        report['succeeded'] += 1
+                        report['results'].append({**job, 'worker': worker_id, 'output_file': output_file})
+                    stats['scraped'] += 1
+                except Exception as e:
+                    # A replacement browser gets the job again if the failure looks transient
+                    retries = job.get('retries', 0)
+                    if self.retry_scheduler and self.retry_scheduler.retry_job(e, retries):
+                        logger.warning("✗ Worker %s failed on %s: %s", worker_id, self._job_fields(job), e)
+                        jobs.put({**job, 'retries': retries + 1})
+                        self._close(scraper)
+                        scraper = None
+                        continue
+                    logger.exception("✗ Worker %s failed on %s: %s", worker_id, job, e)
+                    with self._lock:
+                        report['failed'] += 1
+                        report['failures'].append({**job, 'worker': worker_id, 'error': str(e)})
+                    stats['failed'] += 1
+                    if self.metrics:
+                        self.metrics.record_failure(job, e, worker=worker_id)
+                    kind = classify_error(e)
+                    if self.dead_letters and kind != NOT_FOUND:
+                        self.dead_letters.add(self._job_fields(job), {'job': kind}, error=str(e),
+                                              worker=threading.current_thread().name)
+                    # The session may be wedged, so replace only this worker's browser
+                    self._close(scraper)
+                    scraper = None
+                finally:
+                    stats['busy_seconds'] += time.perf_counter() - started
+        finally:
+            self._close(scraper)
+            stats['startup_seconds'] = round(stats['startup_seconds'], 2)
+            stats['busy_seconds'] = round(stats['busy_seconds'], 2)
+
+    @staticmethod
+    def _close(scraper):
+        if scraper is None:
+            return
+        try:
+            scraper.close()
+        except Exception:
+            pass
+
+    @staticmethod
+    def print_report(report):
+        """Print a throughput summary for a finished batch"""
+        print(f"\n{'='*60}")
+        print("BATCH SUMMARY:")
+        print(f"{'='*60}")
+        print(f"Total: {report['total']}  Succeeded: {report['succeeded']}  Failed: {report['failed']}")
+        print(f"Elapsed: {report['elapsed_seconds']}s  Throughput: {report['buildings_per_minute']} buildings/min")
+        for worker_id, stats in sorted(report['workers'].items()):
+            print(f"  Worker {worker_id}: {stats['scraped']} scraped, {stats['failed']} failed, "
+                  f"{stats['browser_starts']} browser starts ({stats['startup_seconds']}s startup)")
+        print(f"{'='*60}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Scrape many NYC buildings with a pool of Chrome sessions')
+    parser.add_argument('addresses', help='CSV/text file with "address[,zip_code]" rows, '
+                                          'or with --refresh a directory of saved building JSON files')
+    parser.add_argument('--workers', type=int, default=4, help='Number of Chrome sessions')
+    parser.add_argument('--headless', action='store_true', help='Run Chrome headless')
+    parser.add_argument('--output-dir', default='scraped_buildings', help='Directory for scraped output')
+    parser.add_argument('--output-format', choices=list(SINKS), default='json',
+                        help='json: one file per building; jsonl/parquet: rotating bulk files')
+    parser.add_argument('--report', help='Optional path to write the batch report as JSON')
+    parser.add_argument('--cache-dir', help='Serve repeat buildings from a ScrapeCache in this directory')
+    parser.add_argument('--profile-dir', help='Reuse warm Chrome profiles from this directory across runs')
+    parser.add_argument('--preflight', action='store_true',
+                        help='Check each URL over plain HTTP first; 404s are skipped without opening Chrome')
+    parser.add_argument('--resolver-cache', metavar='PATH',
+                        help='JSON file remembering canonical URLs and missing addresses across runs')
+    parser.add_argument('--api-capture', metavar='PATH',
+                        help='Learn the JSON endpoints behind each page into PATH and fetch buildings '
+                             'through them without Chrome once learned (falls back to Chrome on change)')
+    parser.add_argument('--footprint-mode', choices=['raster', 'vector'], default='raster',
+                        help='raster: screenshot the map; vector: read the building polygon as GeoJSON')
+    parser.add_argument('--no-render', action='store_true',
+                        help='In vector mode, keep only the GeoJSON (no footprint image)')
+    parser.add_argument('--footprint-format', choices=list(FOOTPRINT_FORMATS), default='png',
+                        help='Image format for building footprints')
+    parser.add_argument('--footprint-quality', type=int, default=85, help='Quality for webp/jpeg footprints')
+    parser.add_argument('--encode-threads', type=int, default=2,
+                        help='Threads encoding footprint images off the browser threads (0 = inline)')
+    parser.add_argument('--footprint-store', metavar='DIR',
+                        help='Store footprints content-addressed in DIR (unchanged images are not rewritten)')
+    parser.add_argument('--perceptual', action='store_true',
+                        help='With --footprint-store, also treat near-identical renders as unchanged')
+    parser.add_argument('--metrics-dir', metavar='DIR',
+                        help='Write per-building phase timings (metrics.jsonl) and Prometheus metrics (metrics.prom)')
+    parser.add_argument('--debug', choices=['failure', 'always'],
+                        help='Archive page sources/screenshots for pages whose extraction failed, or for every page')
+    parser.add_argument('--debug-sample', type=float, default=0.0, metavar='RATE',
+                        help='Also archive a random fraction of pages, e.g. 0.01')
+    parser.add_argument('--debug-dir', default='debug_artifacts', help='Directory for debug archives')
+    parser.add_argument('--refresh', nargs='+', choices=NYCBuildingScraper.TABS, metavar='TAB',
+                        help='Only re-scrape these tabs (overview, footprint, violations) into existing JSON files')
+    parser.add_argument('--retries', type=int, default=0,
+                        help='Retries for failed tabs (reloaded on their own) and for jobs that fail transiently')
+    parser.add_argument('--retry-delay', type=float, default=2.0,
+                        help='Backoff before the first retry in seconds (doubled per retry, jittered)')
+    parser.add_argument('--dead-letters', metavar='PATH',
+                        help='Append jobs that still fail after their retries to this JSONL file')
+    parser.add_argument('--replay', action='store_true',
+                        help='Treat the input as a dead-letter file and re-scrape only what failed')
+    parser.add_argument('--rate-limit', metavar='PATH',
+                        help='Share an adaptive page-load rate limit through this state file '
+                             '(with other runs on this machine too)')
+    parser.add_argument('--max-rate', type=float,
+                        help='Ceiling for all workers together in page loads per second (default 1.0)')
+    scrape_logging.add_arguments(parser)
+    args = parser.parse_args()
+    if args.replay and args.dead_letters and os.path.abspath(args.dead_letters) == os.path.abspath(args.addresses):
+        parser.error('--dead-letters must name a new file when replaying')
+    scrape_logging.configure_from_args(args)
+
+    cache = ScrapeCache(args.cache_dir) if args.cache_dir else None
+    debug_capture = None
+    if args.debug or args.debug_sample:
+        debug_capture = DebugCapture(args.debug_dir, always=args.debug == 'always',
+                                     sample_rate=args.debug_sample, on_failure=args.debug == 'failure')
+    preflight = Preflight() if args.preflight else None
+    address_resolver = AddressResolver(args.resolver_cache) if args.resolver_cache else None
+    api_capture = ApiCapture(args.api_capture) if args.api_capture else None
+    metrics = None
+    if args.metrics_dir:
+        metrics = ScrapeMetrics(os.path.join(args.metrics_dir, 'metrics.jsonl'),
+                                os.path.join(args.metrics_dir, 'metrics.prom'))
+    footprint_store = FootprintStore(args.footprint_store, perceptual=args.perceptual) if args.footprint_store else None
+    retry_scheduler = RetryScheduler(args.retries, base_delay=args.retry_delay, metrics=metrics) if args.retries else None
+    dead_letters = DeadLetterQueue(args.dead_letters) if args.dead_letters else None
+    rate_limiter = None
+    if args.rate_limit or args.max_rate:
+        rate_limiter = RateLimiter(args.rate_limit, max_rate=args.max_rate or 1.0)
+    batch = BatchScraper(workers=args.workers, headless=args.headless, output_dir=args.output_dir, cache=cache,
+                         profile_dir=args.profile_dir, output_format=args.output_format,
+                         debug_capture=debug_capture, footprint_format=args.footprint_format,
+                         footprint_quality=args.footprint_quality, encode_threads=args.encode_threads,
+                         footprint_store=footprint_store, footprint_mode=args.footprint_mode,
+                         render_footprints=not args.no_render, preflight=preflight,
+                         address_resolver=address_resolver, api_capture=api_capture, metrics=metrics,
+                         retry_scheduler=retry_scheduler, dead_letters=dead_letters, rate_limiter=rate_limiter)
+    if args.replay:
+        report = batch.replay(DeadLetterQueue.load(args.addresses))
+    elif args.refresh:
+        json_paths = sorted(os.path.join(args.addresses, name) for name in os.listdir(args.addresses)
+                            if name.endswith('.json'))
+        report = batch.refresh(json_paths, args.refresh)
+    else:
+        report = batch.run(load_addresses(args.addresses))
+    if cache:
+        cache.print_stats()
+    if debug_capture:
+        debug_capture.close()
+        debug_capture.print_stats()
+    if preflight:
+        preflight.print_stats()
+        preflight.close()
+    if address_resolver:
+        address_resolver.save()
+    if metrics:
+        metrics.print_stats()
+        metrics.close()
+    if api_capture:
+        api_capture.print_stats()
+        api_capture.save()
+        api_capture.close()
+    if retry_scheduler:
+        retry_scheduler.print_stats()
+    if rate_limiter:
+        rate_limiter.print_stats()
+    if dead_letters and dead_letters.count:
+        print(f"✗ {dead_letters.count} jobs dead-lettered to {dead_letters.path} (re-run them with --replay)")
+
+    if args.report:
+        os.makedirs(os.path.dirname(os.path.abspath(args.report)), exist_ok=True)
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"✓ Report saved to: {args.report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Structured Extraction Benchmark
+Compares the single execute_script label/value collector against the legacy
+per-div WebDriver loop used by Strategy 3 of _scrape_overview.
+
+Usage:
+    python benchmarks/bench_extraction.py debug_page_source.html --repeat 5
+    python benchmarks/bench_extraction.py "https://nyc.marketproof.com/building/...?tab=overview"
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from selenium.webdriver.common.by import By
+from nyc_building_scraper import NYCBuildingScraper
+
+
+def time_collector(collector, repeat):
+    """Run a collector `repeat` times, returning (timings, last result)"""
+    timings = []
+    pairs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        pairs = collector()
+        timings.append(time.perf_counter() - start)
+    return timings, pairs
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark Strategy 3 extraction modes')
+    parser.add_argument('page', help='Building page URL or a saved HTML file')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per extraction mode')
+    parser.add_argument('--headless', action='store_true', help='Run Chrome headless')
+    args = parser.parse_args()
+
+    page = args.page
+    if os.path.exists(page):
+        page = Path(page).resolve().as_uri()
+
+    scraper = NYCBuildingScraper(headless=args.headless)
+    try:
+        scraper.driver.get(page)
+        scraper._wait_for_text('overview', ['year built', 'floors', 'units'])
+        div_count = len(scraper.driver.find_elements(By.TAG_NAME, 'div'))
+
+        script_times, script_pairs = time_collector(scraper._collect_label_value_pairs_script, args.repeat)
+        element_times, element_pairs = time_collector(scraper._collect_label_value_pairs_elements, args.repeat)
+    finally:
+        scraper.close()
+
+    script_median = statistics.median(script_times)
+    element_median = statistics.median(element_times)
+
+    print(f"\n{'='*60}")
+    print("STRUCTURED EXTRACTION BENCHMARK:")
+    print(f"{'='*60}")
+    print(f"Page: {args.page} ({div_count} divs, {args.repeat} runs per mode)")
+    print(f"script   : median {script_median * 1000:9.1f} ms, {len(script_pairs)} pairs")
+    print(f"elements : median {element_median * 1000:9.1f} ms, {len(element_pairs)} pairs")
+    if script_median:
+        print(f"Speedup  : {element_median / script_median:.1f}x")
+    missing = {tuple(pair) for pair in element_pairs} - {tuple(pair) for pair in script_pairs}
+    status = "✓" if not missing else "✗"
+    print(f"{status} Pairs only found by elements mode: {len(missing)}")
+    print(f"{'='*60}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Lean Profile Benchmark
+Scrapes the same buildings with and without lean mode and compares bytes
+transferred, request counts and page-load time per building.
+
+Usage:
+    python benchmarks/bench_lean.py addresses.csv --headless
+"""
+
+import argparse
+import os
+import statistics
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batch_scraper import load_addresses
+from nyc_building_scraper import NYCBuildingScraper
+
+
+def measure(addresses, lean, headless):
+    """Scrape every address once, returning per-building network and timing figures"""
+    rows = []
+    scraper = NYCBuildingScraper(headless=headless, lean=lean)
+    try:
+        for address, zip_code in addresses:
+            building_data = scraper.scrape_by_address(address, zip_code)
+            network = building_data.get('network', {})
+            rows.append({
+                'bytes': sum(tab.get('bytes') or 0 for tab in network.values()),
+                'requests': sum(tab.get('requests') or 0 for tab in network.values()),
+                'load_seconds': sum(tab.get('load_seconds') or 0 for tab in network.values()),
+                'total_seconds': building_data['timings'].get('total', 0),
+                'footprint': bool(building_data.get('building_footprint_url')),
+            })
+    finally:
+        scraper.close()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare lean and full Chrome profiles')
+    parser.add_argument('addresses', help='CSV/text file with "address[,zip_code]" rows')
+    parser.add_argument('--headless', action='store_true', help='Run Chrome headless')
+    args = parser.parse_args()
+
+    addresses = load_addresses(args.addresses)
+    results = {mode: measure(addresses, mode == 'lean', args.headless) for mode in ('full', 'lean')}
+
+    print(f"\n{'='*60}")
+    print(f"LEAN PROFILE BENCHMARK ({len(addresses)} buildings):")
+    print(f"{'='*60}")
+    for mode, rows in results.items():
+        print(f"{mode:5}: median {statistics.median(row['bytes'] for row in rows) / 1024:8.0f} KB, "
+              f"{statistics.median(row['requests'] for row in rows):5.0f} requests, "
+              f"page load {statistics.median(row['load_seconds'] for row in rows):5.2f}s, "
+              f"building {statistics.median(row['total_seconds'] for row in rows):5.2f}s, "
+              f"footprints {sum(row['footprint'] for row in rows)}/{len(rows)}")
+    print("Note: cross-origin responses without Timing-Allow-Origin report 0 bytes")
+    print(f"{'='*60}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+"""
+Offline Scraper Benchmark
+Drives NYCBuildingScraper against the local MarketProof stand-in server
+(benchmarks/standin_server.py) and reports buildings/minute, p50/p95 per
+phase, memory per browser and parse throughput of the text-extraction
+strategies, all without network access, so performance changes can be
+compared run against run.
+
+Usage:
+    python benchmarks/bench_offline.py --buildings 40 --workers 2 --headless
+    python benchmarks/bench_offline.py --buildings 40 --headless --footprint-mode vector --extraction-mode script
+    python benchmarks/bench_offline.py --buildings 100 --workers 4 --headless --latency 0.3 --report bench.json
+    python benchmarks/bench_offline.py --buildings 100 --workers 4 --headless --quiet    # logging cost excluded
+"""
+
+import argparse
+import json
+import os
+import queue
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import page_parser
+import scrape_logging
+from footprint_store import FootprintStore
+from nyc_building_scraper import OVERVIEW_READY_LABELS, NYCBuildingScraper, get_chromedriver_path
+from scrape_metrics import ScrapeMetrics
+from standin_server import StandinServer
+
+
+logger = scrape_logging.get_logger('bench')
+
+STREETS = ['west-57-street', 'east-86-street', 'broadway', 'park-avenue', 'atlantic-avenue',
+           'grand-concourse', 'queens-boulevard', 'ocean-parkway', 'amsterdam-avenue', 'bay-street']
+BOROUGH_ZIPS = [('manhattan', 'midtown', '10019'), ('brooklyn', 'park-slope', '11215'),
+                ('queens', 'astoria', '11102'), ('bronx', 'concourse', '10451'),
+                ('staten-island', 'st-george', '10301')]
+
+
+def building_urls(server, count):
+    """Distinct, deterministic building URLs spread over the boroughs"""
+    urls = []
+    for i in range(count):
+        borough, neighborhood, zip_code = BOROUGH_ZIPS[i % len(BOROUGH_ZIPS)]
+        slug = f'{i + 1}-{STREETS[i % len(STREETS)]}-{zip_code}'
+        urls.append(server.building_url(slug, borough, neighborhood))
+    return urls
+
+
+def process_tree_memory(pid):
+    """
+    Memory of a process and all its descendants in bytes (Linux /proc; None elsewhere)
+
+    Uses PSS where available, so pages shared between Chrome's processes are
+    split between them instead of counted once per process.
+    """
+    if not os.path.isdir('/proc'):
+        return None
+    children = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat', encoding='utf-8') as f:
+                # Field 4 (after the parenthesised command name) is the parent pid
+                parent = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(parent, []).append(int(entry))
+
+    total = 0
+    stack = [pid]
+    while stack:
+        current = stack.pop()
+        stack.extend(children.get(current, []))
+        for filename, key in (('smaps_rollup', 'Pss:'), ('status', 'VmRSS:')):
+            try:
+                with open(f'/proc/{current}/{filename}', encoding='utf-8') as f:
+                    values = [int(line.split()[1]) for line in f if line.startswith(key)]
+            except OSError:
+                continue
+            if values:
+                total += values[0] * 1024
+                break
+    return total
+
+
+def browser_memory(scraper):
+    """Memory of a scraper's chromedriver and the Chrome processes under it, or None"""
+    try:
+        return process_tree_memory(scraper.driver.service.process.pid)
+    except AttributeError:
+        return None
+
+
+def run_scrapes(urls, workers, scraper_options, metrics):
+    """
+    Scrape every URL with a pool of browsers, one thread per browser
+
+    Returns:
+        dict: scraped/failed counts, startup and scraping seconds, memory per browser
+    """
+    jobs = queue.Queue()
+    for url in urls:
+        jobs.put(url)
+    results = {'scraped': 0, 'failed': 0, 'startup_seconds': [], 'browser_memory': [], 'errors': []}
+    lock = threading.Lock()
+
+    def worker():
+        started = time.perf_counter()
+        scraper = NYCBuildingScraper(metrics=metrics, **scraper_options)
+        with lock:
+            results['startup_seconds'].append(time.perf_counter() - started)
+        try:
+            while True:
+                try:
+                    url = jobs.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    scraper.scrape_building(url)
+                    with lock:
+                        results['scraped'] += 1
+                except Exception as e:
+                    logger.error("✗ %s: %s", url, e)
+                    metrics.record_failure({'url': url}, e)
+                    with lock:
+                        results['failed'] += 1
+                        results['errors'].append(f'{url}: {e}')
+            memory = browser_memory(scraper)
+            if memory is not None:
+                with lock:
+                    results['browser_memory'].append(memory)
+        finally:
+            scraper.close()
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker, name=f'bench-worker-{i}') for i in range(max(1, workers))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    results['elapsed_seconds'] = time.perf_counter() - start
+    return results
+
+
+def measure_parsing(urls, repeat, scraper_options):
+    """
+    Parse throughput of each extraction strategy on rendered overview pages
+
+    'html' parses page_source offline with page_parser; 'script' and
+    'elements' read the live DOM over WebDriver, so they include round trips.
+
+    Returns:
+        dict: mode -> {'pages', 'median_ms', 'pages_per_second'} (+ 'mb_per_second' for html)
+    """
+    timings = {'html': [], 'script': [], 'elements': []}
+    html_bytes = 0
+    scraper = NYCBuildingScraper(**scraper_options)
+    try:
+        for url in urls:
+            scraper.driver.get(scraper._construct_tab_url(url, 'overview'))
+            scraper._wait_for_text('overview', OVERVIEW_READY_LABELS)
+            page_source = scraper.driver.page_source
+            html_bytes += len(page_source.encode('utf-8')) * repeat
+            for _ in range(repeat):
+                start = time.perf_counter()
+                document = page_parser.PageDocument(page_source)
+                page_parser.parse_overview(document.lines, document.h1, document.label_value_pairs, url=url)
+                timings['html'].append(time.perf_counter() - start)
+            for mode in ('script', 'elements'):
+                scraper.extraction_mode = mode
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    lines, h1, pairs = scraper._collect_live_overview()
+                    page_parser.parse_overview(lines, h1, pairs, url=url)
+                    timings[mode].append(time.perf_counter() - start)
+    finally:
+        scraper.close()
+
+    results = {}
+    for mode, values in timings.items():
+        if not values:
+            continue
+        total = sum(values)
+        results[mode] = {
+            'pages': len(values),
+            'median_ms': round(statistics.median(values) * 1000, 2),
+            'pages_per_second': round(len(values) / total, 1) if total else None,
+        }
+    if timings['html'] and sum(timings['html']):
+        results['html']['mb_per_second'] = round(html_bytes / sum(timings['html']) / (1024 * 1024), 1)
+    return results
+
+
+def print_report(report):
+    scrape = report['scrape']
+    print(f"\n{'='*60}")
+    print(f"OFFLINE BENCHMARK ({report['buildings']} buildings, {report['workers']} browsers):")
+    print(f"{'='*60}")
+    print(f"Options: {json.dumps(report['options'], sort_keys=True)}")
+    print(f"Scraped: {scrape['scraped']}  Failed: {scrape['failed']}  "
+          f"Server requests: {report['server_requests']}")
+    print(f"Throughput: {report['buildings_per_minute']} buildings/min "
+          f"({report['steady_buildings_per_minute']} excluding browser startup)")
+    print(f"Browser startup: median {report['startup_seconds_median']}s")
+    if report['browser_memory_mb']:
+        print(f"Memory per browser: median {statistics.median(report['browser_memory_mb'])} MB, "
+              f"max {max(report['browser_memory_mb'])} MB")
+    else:
+        print("Memory per browser: not available on this platform")
+    for mode, stats in report.get('parsing', {}).items():
+        extra = f", {stats['mb_per_second']} MB/s" if 'mb_per_second' in stats else ''
+        print(f"Parse {mode:8}: median {stats['median_ms']:8.2f} ms, {stats['pages_per_second']} pages/s{extra}")
+    print(f"{'='*60}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the scraper against a local MarketProof stand-in')
+    parser.add_argument('--buildings', type=int, default=20, help='Buildings to scrape')
+    parser.add_argument('--workers', type=int, default=1, help='Concurrent browsers')
+    parser.add_argument('--headless', action='store_true', help='Run Chrome headless')
+    parser.add_argument('--latency', type=float, default=0.05, help='Simulated API/tile latency in seconds')
+    parser.add_argument('--filler', type=int, default=200, help='Extra divs per page (DOM size)')
+    parser.add_argument('--pages', help='Serve recorded <slug>.<tab>.html pages from this directory')
+    parser.add_argument('--extraction-mode', choices=['html', 'script', 'elements'], default='html')
+    parser.add_argument('--footprint-mode', choices=['raster', 'vector'], default='raster')
+    parser.add_argument('--footprint-format', default='png', help='png, webp or jpeg')
+    parser.add_argument('--lean', action='store_true', help='Block fonts/photos/analytics')
+    parser.add_argument('--parse-pages', type=int, default=3, help='Pages for the parse throughput test (0 skips it)')
+    parser.add_argument('--parse-repeat', type=int, default=5, help='Parses per page and strategy')
+    parser.add_argument('--report', help='Optional path to write the results as JSON')
+    scrape_logging.add_arguments(parser)
+    args = parser.parse_args()
+    scrape_logging.configure_from_args(args)
+
+    server = StandinServer(latency=args.latency, filler=args.filler, pages_dir=args.pages).start()
+    print(f"✓ Stand-in server on {server.base_url}")
+    metrics = ScrapeMetrics()
+    footprint_dir = tempfile.mkdtemp(prefix='bench_footprints_')
+    scraper_options = {
+        'headless': args.headless,
+        'driver_path': get_chromedriver_path(),
+        'extraction_mode': args.extraction_mode,
+        'footprint_mode': args.footprint_mode,
+        'footprint_format': args.footprint_format,
+        'lean': args.lean,
+        # Footprints go to a throwaway store instead of ./scraped_buildings
+        'footprint_store': FootprintStore(footprint_dir),
+    }
+
+    try:
+        urls = building_urls(server, args.buildings)
+        scrape = run_scrapes(urls, args.workers, scraper_options, metrics)
+        parsing = {}
+        if args.parse_pages:
+            parse_options = {key: value for key, value in scraper_options.items() if key != 'footprint_store'}
+            parsing = measure_parsing(urls[:args.parse_pages], args.parse_repeat, parse_options)
+        server_requests = server.requests
+    finally:
+        server.stop()
+        shutil.rmtree(footprint_dir, ignore_errors=True)
+
+    elapsed = scrape['elapsed_seconds']
+    # Browsers start in parallel, so the slowest start is what the pool waited for
+    startup = max(scrape['startup_seconds'], default=0)
+    report = {
+        'buildings': args.buildings,
+        'workers': args.workers,
+        'options': {key: value for key, value in vars(args).items()
+                    if key in ('latency', 'filler', 'extraction_mode', 'footprint_mode', 'footprint_format', 'lean')},
+        'scrape': {key: value for key, value in scrape.items() if key not in ('startup_seconds', 'browser_memory')},
+        'buildings_per_minute': round(scrape['scraped'] / elapsed * 60, 2) if elapsed else 0.0,
+        'steady_buildings_per_minute': (round(scrape['scraped'] / (elapsed - startup) * 60, 2)
+                                        if elapsed > startup else 0.0),
+        'startup_seconds_median': round(statistics.median(scrape['startup_seconds']), 2) if scrape['startup_seconds'] else None,
+        'browser_memory_mb': [round(memory / (1024 * 1024), 1) for memory in scrape['browser_memory']],
+        'phases': metrics.summary()['phases'],
+        'parsing': parsing,
+        'server_requests': server_requests,
+    }
+
+    metrics.print_stats()
+    print_report(report)
+    if args.report:
+        os.makedirs(os.path.dirname(os.path.abspath(args.report)), exist_ok=True)
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"✓ Report saved to: {args.report}")
+
+
+if __name__ == "__main__":
+    main()
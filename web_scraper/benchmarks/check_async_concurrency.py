@@ -0,0 +1,80 @@
+"""
+Async Concurrency Check
+Runs AsyncScraper over stand-in scrapers that only sleep, and compares the
+most buildings ever in flight with the concurrency the scraper reports, for
+a few concurrency/per-domain combinations. No browser or network is used.
+
+Usage:
+    python benchmarks/check_async_concurrency.py
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from async_scraper import AsyncScraper
+
+
+# (concurrency, per_domain) pairs; None leaves per_domain at its default
+CASES = [(4, None), (4, 2), (2, 4), (1, None)]
+
+
+class InFlight:
+    """Counts scrapes running at once across all stand-in scrapers"""
+
+    def __init__(self):
+        self.current = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        with self._lock:
+            self.current += 1
+            self.peak = max(self.peak, self.current)
+
+    def __exit__(self, *exc_info):
+        with self._lock:
+            self.current -= 1
+
+
+class SleepingScraper:
+    def __init__(self, in_flight, seconds=0.05):
+        self.in_flight = in_flight
+        self.seconds = seconds
+
+    def scrape_by_address(self, address, zip_code=None):
+        with self.in_flight:
+            time.sleep(self.seconds)
+        return {'url': address}
+
+    def close(self):
+        pass
+
+
+async def peak_in_flight(concurrency, per_domain, jobs=24):
+    """Returns (concurrency reported by the AsyncScraper, most scrapes seen running at once)"""
+    in_flight = InFlight()
+    async with AsyncScraper(concurrency=concurrency, per_domain=per_domain, min_interval=0,
+                            scraper_factory=lambda: SleepingScraper(in_flight)) as scraper:
+        async for _ in scraper.scrape_many(f'{i} Test Street' for i in range(jobs)):
+            pass
+        return scraper.concurrency, in_flight.peak
+
+
+def main():
+    mismatches = 0
+    for concurrency, per_domain in CASES:
+        reported, peak = asyncio.run(peak_in_flight(concurrency, per_domain))
+        ok = reported == peak
+        mismatches += not ok
+        print(f"concurrency={concurrency} per_domain={per_domain}: reported {reported}, "
+              f"peak in flight {peak}  {'OK' if ok else 'MISMATCH'}")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
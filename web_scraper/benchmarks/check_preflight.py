@@ -0,0 +1,121 @@
+"""
+Pre-flight Check
+Runs Preflight against a local http.server stub that answers like the
+building pages can: 200, a 301 to the canonical URL, a redirect off
+/building/ to a search page, a HEAD answered with 405 (so the check falls
+back to GET), a 404, and a refused connection. Also checks that an address
+the AddressResolver has recorded as missing fails with the same PageNotFound
+a pre-flight 404 raises, so neither ends up in the dead-letter queue.
+
+Usage:
+    python benchmarks/check_preflight.py
+"""
+
+import os
+import socket
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from address_normalizer import AddressResolver
+from preflight import PageNotFound, Preflight
+
+
+BUILDING = '/building/manhattan/midtown/'
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        if self.path == f'{BUILDING}no-head':
+            self._send(405)
+        else:
+            self._route(head=True)
+
+    def do_GET(self):
+        self._route(head=False)
+
+    def _route(self, head):
+        path = self.path.split('?')[0]
+        if path in (f'{BUILDING}ok', f'{BUILDING}canonical', f'{BUILDING}no-head', '/search'):
+            self._send(200, head=head)
+        elif path == f'{BUILDING}old-slug':
+            self._send(301, location=f'{BUILDING}canonical')
+        elif path == f'{BUILDING}gone':
+            self._send(301, location='/search?q=gone')
+        else:
+            self._send(404, head=head)
+
+    def _send(self, status, location=None, head=True):
+        body = b'' if head else b'<html><body>stub</body></html>'
+        self.send_response(status)
+        if location:
+            self.send_header('Location', location)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def closed_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def main():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{server.server_address[1]}'
+
+    # (name, url, expected status, expected canonical url or None to skip)
+    cases = [
+        ('200', f'{base}{BUILDING}ok', 'ok', f'{base}{BUILDING}ok'),
+        ('301 to canonical', f'{base}{BUILDING}old-slug', 'redirected', f'{base}{BUILDING}canonical'),
+        ('redirect off /building/', f'{base}{BUILDING}gone', 'missing', None),
+        ('405 HEAD, GET fallback', f'{base}{BUILDING}no-head', 'ok', f'{base}{BUILDING}no-head'),
+        ('404', f'{base}{BUILDING}nope', 'missing', None),
+        ('connection refused', f'http://127.0.0.1:{closed_port()}{BUILDING}ok', 'error', None),
+    ]
+
+    failures = 0
+    preflight = Preflight(timeout=5)
+    try:
+        for name, url, expected, canonical in cases:
+            result = preflight.check(url)
+            ok = result['status'] == expected and (canonical is None or result['url'] == canonical)
+            if expected == 'missing':
+                try:
+                    preflight.resolve(url)
+                    ok = False
+                except PageNotFound:
+                    pass
+            failures += not ok
+            print(f"{name}: {result['status']} ({result['status_code']})  {'OK' if ok else 'MISMATCH'}")
+
+        before = preflight.stats()['cached']
+        preflight.check(cases[0][1])
+        memoized = preflight.stats()['cached'] == before + 1
+        failures += not memoized
+        print(f"memoized repeat: {'OK' if memoized else 'MISMATCH'}")
+    finally:
+        preflight.close()
+        server.shutdown()
+
+    resolver = AddressResolver()
+    resolver.mark_missing('1 Nowhere Street', '10019')
+    try:
+        resolver.resolve('1 Nowhere Street', '10019')
+        ok = False
+    except PageNotFound:
+        ok = True
+    failures += not ok
+    print(f"resolver miss raises PageNotFound: {'OK' if ok else 'MISMATCH'}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
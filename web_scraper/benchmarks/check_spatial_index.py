@@ -0,0 +1,89 @@
+"""
+Spatial Index Check
+Builds a SpatialIndex over random points spread across New York City and
+compares nearest() with a brute-force scan, for queries inside the city and
+for far-away points (upstate, the (0, 0) fix of a photo with bad EXIF GPS).
+Far queries must also finish within a time budget.
+
+Usage:
+    python benchmarks/check_spatial_index.py
+    python benchmarks/check_spatial_index.py --entries 20000 --queries 1000 --seed 7
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from spatial_index import SpatialIndex, distance_m
+
+
+# Rough bounding box of the five boroughs
+NYC_LAT = (40.50, 40.92)
+NYC_LON = (-74.26, -73.70)
+
+FAR_POINTS = {
+    '20 km east': (40.75, -73.50),
+    '78 km north': (41.45, -73.95),
+    'Albany': (42.6526, -73.7562),
+    'null island (0, 0)': (0.0, 0.0),
+    'Sydney': (-33.8688, 151.2093),
+}
+
+
+def random_entries(count, rng):
+    return [{'url': f'https://example.test/building/{i}', 'address': f'{i} Test Street',
+             'lat': rng.uniform(*NYC_LAT), 'lon': rng.uniform(*NYC_LON)} for i in range(count)]
+
+
+def brute_force(entries, lat, lon, k):
+    distances = sorted(distance_m(lat, lon, entry['lat'], entry['lon']) for entry in entries)
+    return [round(distance, 1) for distance in distances[:k]]
+
+
+def check(index, entries, lat, lon, k):
+    """Returns (seconds taken, True if nearest() matched the brute-force distances)"""
+    start = time.perf_counter()
+    results = index.nearest(lat, lon, k)
+    elapsed = time.perf_counter() - start
+    return elapsed, [result['distance_m'] for result in results] == brute_force(entries, lat, lon, k)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check SpatialIndex.nearest against brute force')
+    parser.add_argument('--entries', type=int, default=2000, help='Indexed points')
+    parser.add_argument('--queries', type=int, default=300, help='Random queries inside the city')
+    parser.add_argument('--cell-size', type=float, default=0.001, help='Grid cell size in degrees')
+    parser.add_argument('-k', type=int, default=5, help='Neighbours per query')
+    parser.add_argument('--far-budget', type=float, default=0.05, help='Seconds allowed per far-away query')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    entries = random_entries(args.entries, rng)
+    index = SpatialIndex(args.cell_size)
+    for entry in entries:
+        index.add_entry(entry)
+
+    failures = 0
+    total = 0.0
+    for _ in range(args.queries):
+        elapsed, ok = check(index, entries, rng.uniform(*NYC_LAT), rng.uniform(*NYC_LON), args.k)
+        total += elapsed
+        failures += not ok
+    print(f"{args.queries} city queries: {total / args.queries * 1e6:.0f} µs each, "
+          f"{failures} mismatches against brute force")
+
+    for name, (lat, lon) in FAR_POINTS.items():
+        elapsed, ok = check(index, entries, lat, lon, args.k)
+        slow = elapsed > args.far_budget
+        failures += (not ok) + slow
+        print(f"{name}: {elapsed * 1e3:.1f} ms  {'OK' if ok and not slow else 'MISMATCH' if not ok else 'TOO SLOW'}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Page Parser Differential Check
+Feeds randomized pages to page_parser and to the line loops the scraper ran
+before extraction became table-driven (kept below, copied from
+nyc_building_scraper_old.py), and reports every page where the two disagree.
+Run it after touching a FieldRule table.
+
+Usage:
+    python benchmarks/diff_page_parser.py
+    python benchmarks/diff_page_parser.py --pages 100000 --seed 7 --show 20
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import page_parser
+
+
+# Labels, values and near-misses (wrong case, run-together labels, digits glued to words)
+VOCABULARY = [
+    'Year Built', 'Built', 'built', 'BUILT', 'Built in', 'year built 1988', 'year builtyear built',
+    'Floors', 'Stories', 'Floors 10', 'stories 2022', 'floorsfloors', 'number floors units',
+    'Number of Units', 'Units Number', 'units', 'Unit type', 'Building Type', 'Property Type', 'Type',
+    'Condo', 'Borough', 'Manhattan', 'Brooklyn', 'Queens', 'Bronx', 'Staten Island',
+    'brooklyn', 'MANHATTAN', 'staten island', 'Manhattan Avenue', 'The Bronx',
+    '10019', '10019-1234', '123456', 'abc 10001 x', 'x10019', 'a_10019',
+    '1999', '2005', '12', '5', '0',
+    'DOB Violations', 'ECB Violation 3', 'HPD Violations', 'DOB Complaints 7', 'dob violationdob complaint',
+]
+
+
+def baseline_overview(lines, pairs):
+    """Strategies 1 and 3 of the old _scrape_overview"""
+    data = page_parser.empty_overview()
+    for i, line in enumerate(lines):
+        line_lower = line.lower()
+        next_line = lines[i + 1] if i + 1 < len(lines) else ""
+
+        if line in ['Manhattan', 'Brooklyn', 'Queens', 'Bronx', 'Staten Island']:
+            if not data['borough']:
+                data['borough'] = line
+
+        if 'year built' in line_lower or line_lower == 'built':
+            year_match = re.search(r'\b(19|20)\d{2}\b', next_line)
+            if year_match and not data['year_built']:
+                data['year_built'] = year_match.group(0)
+
+        if 'floors' in line_lower or 'stories' in line_lower:
+            num_match = re.search(r'\b(\d+)\b', next_line)
+            if num_match and not data['floors']:
+                data['floors'] = num_match.group(0)
+
+        if 'units' in line_lower and 'number' in line_lower:
+            num_match = re.search(r'\b(\d+)\b', next_line)
+            if num_match and not data['number_of_units']:
+                data['number_of_units'] = num_match.group(0)
+
+        if 'building type' in line_lower or 'property type' in line_lower:
+            if next_line and not data['building_type']:
+                data['building_type'] = next_line
+
+        zip_match = re.search(r'\b\d{5}(?:-\d{4})?\b', line)
+        if zip_match and not data['zip_code']:
+            data['zip_code'] = zip_match.group(0)
+
+    for label, value in pairs:
+        label_lower = label.lower()
+        if 'year built' in label_lower and not data['year_built']:
+            data['year_built'] = value
+        elif 'floors' in label_lower and not data['floors']:
+            data['floors'] = value
+        elif 'units' in label_lower and not data['number_of_units']:
+            data['number_of_units'] = value
+        elif 'type' in label_lower and not data['building_type']:
+            data['building_type'] = value
+        elif 'borough' in label_lower and not data['borough']:
+            data['borough'] = value
+    return data
+
+
+def baseline_violations(lines):
+    """The old _scrape_violations line loop"""
+    data = page_parser.empty_violations()
+    labels = [('dob_violations', 'dob violation'), ('ecb_violations', 'ecb violation'),
+              ('hpd_violations', 'hpd violation'), ('dob_complaints', 'dob complaint')]
+    for i, line in enumerate(lines):
+        line_lower = line.lower()
+        next_line = lines[i + 1] if i + 1 < len(lines) else ""
+        for field, label in labels:
+            if label in line_lower:
+                num_match = re.search(r'\b(\d+)\b', next_line)
+                if num_match:
+                    data[field] = num_match.group(0)
+                num_match = re.search(r'\b(\d+)\b', line)
+                if num_match and not data[field]:
+                    data[field] = num_match.group(0)
+    return data
+
+
+def random_page(rng, max_lines=8, max_pairs=3):
+    lines = [rng.choice(VOCABULARY) for _ in range(rng.randint(1, max_lines))]
+    pairs = [[rng.choice(VOCABULARY), rng.choice(VOCABULARY)] for _ in range(rng.randint(0, max_pairs))]
+    return lines, pairs
+
+
+def compare(pages, seed):
+    """
+    Parse `pages` random pages both ways
+
+    Returns:
+        list: (tab, lines, pairs, baseline result, page_parser result) per disagreement
+    """
+    rng = random.Random(seed)
+    mismatches = []
+    for _ in range(pages):
+        lines, pairs = random_page(rng)
+        expected = baseline_overview(lines, pairs)
+        # The baseline took the address from the live h1/URL, which random pages do not have
+        actual = page_parser.parse_overview(lines, label_value_pairs=pairs)
+        if expected != actual:
+            mismatches.append(('overview', lines, pairs, expected, actual))
+        expected = baseline_violations(lines)
+        actual = page_parser.parse_violations(lines)
+        if expected != actual:
+            mismatches.append(('violations', lines, pairs, expected, actual))
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare page_parser against the pre-table line loops')
+    parser.add_argument('--pages', type=int, default=20000, help='Random pages to compare')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed')
+    parser.add_argument('--show', type=int, default=5, help='Mismatches to print')
+    args = parser.parse_args()
+
+    mismatches = compare(args.pages, args.seed)
+    for tab, lines, pairs, expected, actual in mismatches[:args.show]:
+        print(f"✗ {tab}: lines={lines} pairs={pairs}\n  baseline:    {expected}\n  page_parser: {actual}")
+    if mismatches:
+        print(f"✗ {len(mismatches)} mismatches in {args.pages} pages")
+        sys.exit(1)
+    print(f"✓ page_parser matched the baseline on {args.pages} pages")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,335 @@
+"""
+MarketProof Stand-in Server
+Local HTTP server imitating the parts of nyc.marketproof.com the scraper
+touches, so benchmarks run offline and repeatably. Building pages are a small
+JavaScript app: the overview and violations tabs fetch their numbers as JSON
+from /api/..., render them as label/value divs, and the overview draws the
+footprint on a canvas.mapboxgl-canvas behind a fake Mapbox map object (idle
+event, GeoJSON source) so the readiness waits, canvas screenshots and vector
+footprints all exercise the same code paths as on the live site.
+
+Every building is generated deterministically from its URL slug; slugs
+starting with 'missing-' return 404. Recorded pages can be served instead:
+with --pages DIR, <slug>.overview.html / <slug>.violations.html are returned
+verbatim when present (e.g. page sources kept by DebugCapture).
+
+Usage:
+    python benchmarks/standin_server.py --port 8765 --latency 0.2
+    # then: http://127.0.0.1:8765/building/manhattan/midtown/110-west-57-street-10019?tab=overview
+"""
+
+import argparse
+import hashlib
+import html
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+BUILDING_TYPES = ['Condo', 'Co-op', 'Rental', 'Condop', 'Mixed Use']
+
+BOROUGH_NAMES = {
+    'manhattan': 'Manhattan', 'brooklyn': 'Brooklyn', 'queens': 'Queens',
+    'bronx': 'Bronx', 'staten-island': 'Staten Island',
+}
+
+# Rough borough centres, so generated footprints land in the right place
+BOROUGH_CENTERS = {
+    'manhattan': (40.7589, -73.9851), 'brooklyn': (40.6782, -73.9442), 'queens': (40.7282, -73.7949),
+    'bronx': (40.8448, -73.8648), 'staten-island': (40.5795, -74.1502),
+}
+
+_PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{title} | MarketProof stand-in</title>
+<style>
+body {{ font-family: sans-serif; margin: 0; }}
+.stat {{ display: inline-block; margin: 8px 16px; }}
+canvas {{ display: block; }}
+</style>
+</head>
+<body>
+<nav><div>Search</div><div>Buildings</div><div>Sign in</div></nav>
+<main id="app"><div class="loading">Loading...</div></main>
+{canvas}
+<footer>{filler}</footer>
+<script>
+const tab = {tab};
+const slug = {slug};
+const borough = {borough};
+const latency = {render_delay};
+const label = (name, value) => `<div class="stat"><div>${{name}}</div><div>${{value}}</div></div>`;
+
+function render(data) {{
+    const app = document.getElementById('app');
+    if (tab === 'violations') {{
+        const counts = data.counts;
+        app.innerHTML = '<h2>Violations</h2>' +
+            label('DOB Violations', counts.dob_violations) + label('ECB Violations', counts.ecb_violations) +
+            label('HPD Violations', counts.hpd_violations) + label('DOB Complaints', counts.dob_complaints);
+        return;
+    }}
+    const building = data.building;
+    app.innerHTML = `<h1>${{building.address}}</h1><div>${{building.borough}}</div>` +
+        `<div>New York, NY ${{building.zip_code}}</div>` +
+        label('Building Type', building.building_type) + label('Year Built', building.year_built) +
+        label('Floors', building.floors) + label('Number of Units', building.units);
+}}
+
+function drawFootprint(footprint) {{
+    const canvas = document.querySelector('canvas.mapboxgl-canvas');
+    const ctx = canvas.getContext('2d');
+    const ring = footprint.geometry.coordinates[0];
+    const xs = ring.map(p => p[0]), ys = ring.map(p => p[1]);
+    const minX = Math.min(...xs), maxX = Math.max(...xs), minY = Math.min(...ys), maxY = Math.max(...ys);
+    const scale = 0.6 * Math.min(canvas.width / (maxX - minX), canvas.height / (maxY - minY));
+    ctx.fillStyle = '#e8e4dc';
+    ctx.fillRect(0, 0, canvas.width, canvas.height);
+    ctx.fillStyle = '#4287f5';
+    ctx.strokeStyle = '#143c8c';
+    ctx.beginPath();
+    ring.forEach((p, i) => {{
+        const x = canvas.width / 2 + (p[0] - (minX + maxX) / 2) * scale;
+        const y = canvas.height / 2 - (p[1] - (minY + maxY) / 2) * scale;
+        if (i) ctx.lineTo(x, y); else ctx.moveTo(x, y);
+    }});
+    ctx.closePath();
+    ctx.fill();
+    ctx.stroke();
+}}
+
+// Just enough of a mapboxgl.Map for the scraper's idle and GeoJSON scripts
+if (tab === 'overview') {{
+    const canvas = document.querySelector('canvas.mapboxgl-canvas');
+    const map = {{
+        _idle: false, _handlers: [], _footprint: null, _center: null,
+        getCanvas() {{ return canvas; }},
+        loaded() {{ return this._idle; }},
+        areTilesLoaded() {{ return this._idle; }},
+        once(event, handler) {{
+            if (event !== 'idle') return;
+            if (this._idle) handler(); else this._handlers.push(handler);
+        }},
+        getStyle() {{
+            return this._footprint ? {{sources: {{'building-footprint': {{type: 'geojson'}}}}}} : null;
+        }},
+        getSource(id) {{
+            return id === 'building-footprint' && this._footprint ? {{_data: this._footprint}} : undefined;
+        }},
+        getCenter() {{ return {{lng: this._center[0], lat: this._center[1]}}; }},
+        project() {{ return {{x: canvas.width / 2, y: canvas.height / 2}}; }},
+        queryRenderedFeatures() {{ return []; }},
+        _setFootprint(footprint, center) {{
+            this._footprint = footprint;
+            this._center = center;
+            // Tiles "arrive" a little after the data
+            setTimeout(() => {{
+                drawFootprint(footprint);
+                this._idle = true;
+                this._handlers.splice(0).forEach(handler => handler());
+            }}, latency);
+        }},
+    }};
+    window.standinMap = map;
+}}
+
+const api = (tab === 'violations' ? `/api/buildings/${{slug}}/violations` : `/api/buildings/${{slug}}`) +
+    `?borough=${{borough}}`;
+fetch(api, {{headers: {{'Accept': 'application/json'}}}})
+    .then(response => response.json())
+    .then(data => {{
+        setTimeout(() => render(data), latency);
+        if (tab === 'overview') window.standinMap._setFootprint(data.footprint, data.center);
+    }});
+</script>
+</body>
+</html>
+"""
+
+
+def building_for_slug(slug, borough='manhattan'):
+    """Deterministic fake building (overview, violations and footprint) for a URL slug"""
+    rng = random.Random(hashlib.sha1(slug.encode('utf-8')).hexdigest())
+    words = slug.split('-')
+    zip_code = words[-1] if words[-1].isdigit() and len(words[-1]) == 5 else f'{10000 + rng.randrange(1000):05d}'
+    street = words[:-1] if words[-1] == zip_code else words
+    lat, lon = BOROUGH_CENTERS.get(borough, BOROUGH_CENTERS['manhattan'])
+    lat += rng.uniform(-0.02, 0.02)
+    lon += rng.uniform(-0.02, 0.02)
+    # A roughly 13-34 m by 20-60 m rectangle, as [lon, lat]
+    half_width, half_depth = rng.uniform(0.8, 2.0) * 1e-4, rng.uniform(0.9, 2.7) * 1e-4
+    ring = [[lon - half_width, lat - half_depth], [lon + half_width, lat - half_depth],
+            [lon + half_width, lat + half_depth], [lon - half_width, lat + half_depth],
+            [lon - half_width, lat - half_depth]]
+    return {
+        'building': {
+            'address': ' '.join(street).title(),
+            'zip_code': zip_code,
+            'borough': BOROUGH_NAMES.get(borough, 'Manhattan'),
+            'building_type': rng.choice(BUILDING_TYPES),
+            'year_built': rng.randrange(1880, 2024),
+            'floors': rng.randrange(3, 80),
+            'units': rng.randrange(4, 900),
+        },
+        'counts': {
+            'dob_violations': rng.randrange(0, 40),
+            'ecb_violations': rng.randrange(0, 25),
+            'hpd_violations': rng.randrange(0, 120),
+            'dob_complaints': rng.randrange(0, 30),
+        },
+        'footprint': {'type': 'Feature', 'properties': {'slug': slug},
+                      'geometry': {'type': 'Polygon', 'coordinates': [ring]}},
+        'center': [lon, lat],
+    }
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    server_version = 'MarketProofStandin/1.0'
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def do_HEAD(self):
+        self._route(head=True)
+
+    def do_GET(self):
+        self._route(head=False)
+
+    def _route(self, head):
+        self.server.count_request()
+        parsed = urlparse(self.path)
+        parts = [part for part in parsed.path.split('/') if part]
+        if len(parts) == 4 and parts[0] == 'building':
+            tab = parse_qs(parsed.query).get('tab', ['details'])[0]
+            self._building_page(parts[1], parts[3], 'violations' if tab == 'violations' else 'overview', head)
+        elif len(parts) >= 3 and parts[:2] == ['api', 'buildings']:
+            borough = parse_qs(parsed.query).get('borough', ['manhattan'])[0]
+            self._api(parts[2], parts[3:], borough, head)
+        else:
+            self._send(404, 'text/plain', b'Not found', head)
+
+    def _building_page(self, borough, slug, tab, head):
+        if slug.startswith('missing-'):
+            self._send(404, 'text/html', b'<html><body>Building not found</body></html>', head)
+            return
+        recorded = self.server.recorded_page(slug, tab)
+        if recorded is not None:
+            self._send(200, 'text/html; charset=utf-8', recorded, head)
+            return
+        filler = ''.join(f'<div class="filler"><span>Listing {i}</span><span>Details</span></div>'
+                         for i in range(self.server.filler))
+        page = _PAGE.format(
+            title=html.escape(slug), tab=json.dumps(tab), slug=json.dumps(slug), borough=json.dumps(borough),
+            render_delay=int(self.server.latency * 1000), filler=filler,
+            canvas='<canvas class="mapboxgl-canvas" width="800" height="600"></canvas>' if tab == 'overview' else '',
+        )
+        self._send(200, 'text/html; charset=utf-8', page.encode('utf-8'), head)
+
+    def _api(self, slug, rest, borough, head):
+        if slug.startswith('missing-'):
+            self._send(404, 'application/json', b'{"error": "not found"}', head)
+            return
+        time.sleep(self.server.latency)
+        building = building_for_slug(slug, borough)
+        if rest == ['violations']:
+            body = {'counts': building['counts']}
+        else:
+            body = {'building': building['building'], 'footprint': building['footprint'], 'center': building['center']}
+        self._send(200, 'application/json', json.dumps(body).encode('utf-8'), head)
+
+    def _send(self, status, content_type, body, head):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+
+
+class StandinServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.05, filler=200, pages_dir=None, verbose=False):
+        """
+        Create (but do not start) the stand-in server
+
+        Args:
+            host, port: Address to bind (port 0 picks a free port)
+            latency: Seconds added to each JSON API response and to map "tile" rendering
+            filler: Extra listing divs per page, to give the parsers a realistically sized DOM
+            pages_dir: Optional directory of recorded <slug>.<tab>.html pages served verbatim
+            verbose: Log every request
+        """
+        super().__init__((host, port), StandinHandler)
+        self.latency = latency
+        self.filler = filler
+        self.pages_dir = pages_dir
+        self.verbose = verbose
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def building_url(self, slug, borough='manhattan', neighborhood='midtown'):
+        return f'{self.base_url}/building/{borough}/{neighborhood}/{slug}?tab=details'
+
+    def count_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def recorded_page(self, slug, tab):
+        if not self.pages_dir:
+            return None
+        path = os.path.join(self.pages_dir, f'{slug}.{tab}.html')
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def start(self):
+        """Serve on a background thread and return self"""
+        self._thread = threading.Thread(target=self.serve_forever, name='standin-server', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve MarketProof-like building pages locally')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.05, help='Seconds of simulated API/tile latency')
+    parser.add_argument('--filler', type=int, default=200, help='Extra divs per page')
+    parser.add_argument('--pages', help='Directory of recorded <slug>.<tab>.html pages')
+    parser.add_argument('--verbose', action='store_true', help='Log every request')
+    args = parser.parse_args()
+
+    server = StandinServer(args.host, args.port, args.latency, args.filler, args.pages, args.verbose)
+    print(f"✓ Serving MarketProof stand-in on {server.base_url}")
+    print(f"  e.g. {server.building_url('110-west-57-street-10019')}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
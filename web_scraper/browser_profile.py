@@ -0,0 +1,186 @@
+"""
+Managed Chrome Profiles
+Reusable user-data directories so the browser's HTTP cache (JS bundles, Mapbox
+styles, tiles) stays warm across runs. Chrome refuses to share a profile
+between running instances, so the manager keeps a pool of profile slots,
+each guarded by an OS file lock, and trims their caches to a size limit.
+"""
+
+import os
+import shutil
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+import scrape_logging
+
+
+logger = scrape_logging.get_logger('profile')
+
+MB = 1024 * 1024
+
+# Trimmed in this order when a profile grows past its limit (cheapest to rebuild first)
+_TRIMMABLE_DIRS = [
+    'ShaderCache',
+    'GrShaderCache',
+    os.path.join('Default', 'GPUCache'),
+    os.path.join('Default', 'Service Worker', 'CacheStorage'),
+    os.path.join('Default', 'Code Cache'),
+    os.path.join('Default', 'Cache'),
+]
+
+
+def directory_size(path):
+    """Total size in bytes of all files below path"""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def _try_lock(handle):
+    try:
+        if fcntl:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+
+def _unlock(handle):
+    try:
+        if fcntl:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+        else:
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+    except OSError:
+        pass
+
+
+class ProfileLease:
+    """A profile slot held by one Chrome instance until release()"""
+
+    def __init__(self, manager, path, lock_handle):
+        self.manager = manager
+        self.path = path
+        self._lock_handle = lock_handle
+
+    def release(self):
+        """Trim the profile if it grew too large, then free the slot"""
+        if self._lock_handle is None:
+            return
+        self.manager.trim(self.path)
+        _unlock(self._lock_handle)
+        self._lock_handle.close()
+        self._lock_handle = None
+
+
+class ProfileManager:
+    def __init__(self, root='chrome_profiles', max_profiles=8, max_bytes=500 * MB, disk_cache_bytes=200 * MB):
+        """
+        Manage a pool of persistent Chrome profiles
+
+        Args:
+            root: Directory holding profile-<n> slots
+            max_profiles: Concurrent browsers that can hold a profile
+            max_bytes: Size a profile is trimmed back under when released
+            disk_cache_bytes: Chrome HTTP cache limit (--disk-cache-size)
+        """
+        self.root = root
+        self.max_profiles = max_profiles
+        self.max_bytes = max_bytes
+        self.disk_cache_bytes = disk_cache_bytes
+        os.makedirs(root, exist_ok=True)
+
+    def chrome_arguments(self, lease):
+        """Chrome flags for running on a leased profile"""
+        return [
+            f'--user-data-dir={os.path.abspath(lease.path)}',
+            f'--disk-cache-size={self.disk_cache_bytes}',
+            '--no-first-run',
+            '--no-default-browser-check',
+            '--hide-crash-restore-bubble',
+        ]
+
+    def acquire(self):
+        """
+        Lease the first free profile slot (warmest slots are the low numbers)
+
+        Returns:
+            ProfileLease
+
+        Raises:
+            RuntimeError: Every slot is in use by another browser
+        """
+        for slot in range(self.max_profiles):
+            path = os.path.join(self.root, f'profile-{slot}')
+            lock_handle = open(os.path.join(self.root, f'profile-{slot}.lock'), 'a+')
+            if _try_lock(lock_handle):
+                os.makedirs(path, exist_ok=True)
+                return ProfileLease(self, path, lock_handle)
+            lock_handle.close()
+        raise RuntimeError(f"All {self.max_profiles} Chrome profiles in {self.root} are in use")
+
+    def trim(self, path):
+        """
+        Delete cache directories from a profile until it is under max_bytes
+
+        Returns:
+            int: Bytes freed
+        """
+        size = directory_size(path)
+        freed = 0
+        for relative in _TRIMMABLE_DIRS:
+            if size - freed <= self.max_bytes:
+                break
+            cache_dir = os.path.join(path, relative)
+            if os.path.isdir(cache_dir):
+                cache_size = directory_size(cache_dir)
+                shutil.rmtree(cache_dir, ignore_errors=True)
+                freed += cache_size
+        if freed:
+            logger.info("✓ Trimmed %.0f MB from %s", freed / MB, path)
+        return freed
+
+    def cleanup(self):
+        """
+        Trim every idle profile and delete slots beyond max_profiles
+
+        Returns:
+            int: Bytes freed
+        """
+        freed = 0
+        for name in sorted(os.listdir(self.root)):
+            path = os.path.join(self.root, name)
+            if not name.startswith('profile-') or not os.path.isdir(path):
+                continue
+            with open(f'{path}.lock', 'a+') as lock_handle:
+                if not _try_lock(lock_handle):
+                    continue  # in use
+                try:
+                    slot = int(name.split('-', 1)[1])
+                except ValueError:
+                    slot = None
+                if slot is None or slot >= self.max_profiles:
+                    freed += directory_size(path)
+                    shutil.rmtree(path, ignore_errors=True)
+                else:
+                    freed += self.trim(path)
+                _unlock(lock_handle)
+        return freed
+
+    def usage(self):
+        """Bytes used by each profile slot"""
+        return {name: directory_size(os.path.join(self.root, name))
+                for name in sorted(os.listdir(self.root))
+                if os.path.isdir(os.path.join(self.root, name))}
@@ -0,0 +1,181 @@
+"""
+Debug Artifact Capture
+Opt-in page dumps for troubleshooting extraction. A scraper with a
+DebugCapture collects the page source (and a screenshot) of each tab it
+parses into a per-building bundle; bundles that are wanted (every page,
+a random sample, or pages whose extraction failed) are written as one
+compressed zip per building on a background thread, within a disk budget.
+"""
+
+import json
+import os
+import random
+import re
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import urlparse
+
+import page_parser
+import scrape_logging
+
+
+logger = scrape_logging.get_logger('debug_capture')
+
+MB = 1024 * 1024
+
+
+class DebugBundle:
+    """Artifacts for one building, kept in memory until the scrape finishes"""
+
+    def __init__(self, url, sampled):
+        self.url = url
+        self.sampled = sampled
+        self.started_at = datetime.now()
+        self.failures = {}
+        self.artifacts = []
+
+    @property
+    def wanted(self):
+        return self.sampled or bool(self.failures)
+
+    def record_failure(self, tab, reason):
+        self.failures[tab] = reason
+
+    def add(self, name, content):
+        self.artifacts.append((name, content))
+
+
+class DebugCapture:
+    def __init__(self, output_dir='debug_artifacts', always=False, sample_rate=0.0, on_failure=True,
+                 screenshots=True, max_bytes=200 * MB):
+        """
+        Configure debug capture for a run (share one instance between scrapers)
+
+        Args:
+            output_dir: Directory for the per-building zip archives
+            always: Capture every building
+            sample_rate: Fraction of buildings captured at random (e.g. 0.01)
+            on_failure: Capture buildings where a tab's extraction failed (readiness
+                wait timed out, parse error, or none of its core fields found)
+            screenshots: Include a PNG of each captured tab
+            max_bytes: Stop writing archives once the directory holds this much
+        """
+        self.output_dir = output_dir
+        self.always = always
+        self.sample_rate = sample_rate
+        self.on_failure = on_failure
+        self.screenshots = screenshots
+        self.max_bytes = max_bytes
+        self.archives = 0
+        self.skipped = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='debug-capture')
+
+        os.makedirs(output_dir, exist_ok=True)
+        self.bytes_used = sum(entry.stat().st_size for entry in os.scandir(output_dir)
+                              if entry.is_file() and entry.name.endswith('.zip'))
+
+    def begin(self, url):
+        """Start a bundle for one building (decides up front whether it is sampled)"""
+        sampled = self.always or (self.sample_rate > 0 and random.random() < self.sample_rate)
+        return DebugBundle(url, sampled)
+
+    def check(self, bundle, tab, data, timed_out=False, error=None):
+        """
+        Note a parsed tab and report whether its artifacts should be captured
+
+        A single absent field is normal (many buildings have no violations
+        section or year built), so only a failed extraction counts.
+
+        Args:
+            bundle: The building's DebugBundle
+            tab: Tab name, e.g. 'overview'
+            data: Fields parsed from the tab
+            timed_out: The tab's readiness wait expired before parsing
+            error: Exception the tab's parse caught, if any
+
+        Returns:
+            bool: True if the caller should add this tab's page source/screenshot
+        """
+        if self.on_failure:
+            reason = self._failure_reason(tab, data, timed_out, error)
+            if reason:
+                bundle.record_failure(tab, reason)
+        return bundle.wanted
+
+    @staticmethod
+    def _failure_reason(tab, data, timed_out, error):
+        if error is not None:
+            return f'error: {type(error).__name__}'
+        if timed_out:
+            return 'readiness timeout'
+        if all(data.get(field) in (None, '') for field in page_parser.SIGNAL_FIELDS.get(tab, data)):
+            return 'no core fields'
+        return None
+
+    def finish(self, bundle):
+        """Queue a wanted bundle for writing; the scrape never waits on the disk"""
+        if not bundle.wanted or not bundle.artifacts:
+            return
+        with self._lock:
+            if self.bytes_used >= self.max_bytes:
+                self.skipped += 1
+                return
+        self._executor.submit(self._write_archive, bundle)
+
+    def _archive_path(self, bundle):
+        slug = urlparse(bundle.url).path.rstrip('/').rsplit('/', 1)[-1] or 'building'
+        slug = re.sub(r'[^\w-]+', '_', slug)[:80]
+        stamp = bundle.started_at.strftime('%Y%m%d_%H%M%S_%f')
+        return os.path.join(self.output_dir, f'{slug}_{stamp}_{os.getpid()}.zip')
+
+    def _write_archive(self, bundle):
+        path = self._archive_path(bundle)
+        manifest = {
+            'url': bundle.url,
+            'captured_at': bundle.started_at.isoformat(),
+            'reason': 'failure' if bundle.failures else 'sample',
+            'failures': bundle.failures,
+            'artifacts': [name for name, _ in bundle.artifacts],
+        }
+        temp_path = f'{path}.tmp'
+        try:
+            with zipfile.ZipFile(temp_path, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=6) as archive:
+                archive.writestr('manifest.json', json.dumps(manifest, indent=2, ensure_ascii=False))
+                for name, content in bundle.artifacts:
+                    # PNGs are already compressed; deflating them again only costs time
+                    compression = zipfile.ZIP_STORED if name.endswith('.png') else zipfile.ZIP_DEFLATED
+                    archive.writestr(name, content, compress_type=compression)
+            os.replace(temp_path, path)
+        except Exception as e:
+            logger.error("✗ Could not write debug archive %s: %s", path, e)
+            return
+        with self._lock:
+            self.archives += 1
+            self.bytes_used += os.path.getsize(path)
+        logger.info("✓ Debug artifacts saved to %s", path)
+
+    def close(self):
+        """Wait for queued archives to be written"""
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def stats(self):
+        with self._lock:
+            return {'archives': self.archives, 'skipped': self.skipped, 'bytes': self.bytes_used}
+
+    def print_stats(self):
+        stats = self.stats()
+        print(f"\n{'='*60}")
+        print("DEBUG CAPTURE:")
+        print(f"{'='*60}")
+        print(f"Archives written: {stats['archives']}  Skipped (over budget): {stats['skipped']}")
+        print(f"Disk used in {self.output_dir}: {stats['bytes'] / MB:.1f} MB of {self.max_bytes / MB:.0f} MB")
+        print(f"{'='*60}\n")
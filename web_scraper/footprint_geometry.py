@@ -0,0 +1,144 @@
+"""
+Footprint Geometry
+Helpers for building footprints read as GeoJSON from the page's Mapbox map:
+choosing the building's polygon, measuring its area and centroid, and
+rendering it to an image when a raster footprint is still wanted.
+"""
+
+import math
+
+from PIL import Image, ImageDraw
+
+
+EARTH_RADIUS_M = 6378137.0
+
+
+def polygons(geometry):
+    """List of polygons (each a list of [lon, lat] rings, outer ring first)"""
+    if geometry['type'] == 'Polygon':
+        return [geometry['coordinates']]
+    if geometry['type'] == 'MultiPolygon':
+        return list(geometry['coordinates'])
+    raise ValueError(f"Not a polygon geometry: {geometry['type']}")
+
+
+def _ring_area(ring):
+    """Signed spherical area of a ring in square metres (same formula as geojson-area)"""
+    count = len(ring)
+    if count < 3:
+        return 0.0
+    total = 0.0
+    for i in range(count):
+        lower, middle, upper = ring[i], ring[(i + 1) % count], ring[(i + 2) % count]
+        total += (math.radians(upper[0]) - math.radians(lower[0])) * math.sin(math.radians(middle[1]))
+    return total * EARTH_RADIUS_M * EARTH_RADIUS_M / 2
+
+
+def area_m2(geometry):
+    """Area of a Polygon/MultiPolygon in square metres, holes subtracted"""
+    total = 0.0
+    for rings in polygons(geometry):
+        total += abs(_ring_area(rings[0]))
+        total -= sum(abs(_ring_area(hole)) for hole in rings[1:])
+    return total
+
+
+def centroid(geometry):
+    """
+    Area-weighted centroid as [lon, lat]
+
+    Uses a local equirectangular projection around the first vertex, which is
+    exact enough at building scale and avoids cancellation in the shoelace sums.
+    """
+    first = polygons(geometry)[0][0][0]
+    scale = math.cos(math.radians(first[1]))
+    weighted_x = weighted_y = total = 0.0
+    for rings in polygons(geometry):
+        for index, ring in enumerate(rings):
+            points = [((lon - first[0]) * scale, lat - first[1]) for lon, lat in ring]
+            area = cx = cy = 0.0
+            for (x1, y1), (x2, y2) in zip(points, points[1:] + points[:1]):
+                cross = x1 * y2 - x2 * y1
+                area += cross
+                cx += (x1 + x2) * cross
+                cy += (y1 + y2) * cross
+            area /= 2
+            if not area:
+                continue
+            # Outer rings add, holes subtract, whatever their winding order
+            sign = 1 if index == 0 else -1
+            weight = sign * abs(area)
+            weighted_x += cx / (6 * area) * weight
+            weighted_y += cy / (6 * area) * weight
+            total += weight
+    if not total:
+        return [first[0], first[1]]
+    return [round(first[0] + weighted_x / total / scale, 7), round(first[1] + weighted_y / total, 7)]
+
+
+def select_building(features, center=None):
+    """
+    Pick the building's polygon from the map's candidate features
+
+    Args:
+        features: [{'geometry', 'properties', 'source'}] as returned by the page script
+        center: Optional [lon, lat] of the map view (the building is centred on the page)
+
+    Returns:
+        dict: GeoJSON Feature with source, area_m2 and centroid properties, or None
+    """
+    candidates = []
+    for feature in features or []:
+        try:
+            candidates.append((feature, centroid(feature['geometry'])))
+        except (KeyError, IndexError, TypeError, ValueError):
+            continue
+    if not candidates:
+        return None
+    if center:
+        scale = math.cos(math.radians(center[1]))
+        candidates.sort(key=lambda item: ((item[1][0] - center[0]) * scale) ** 2 + (item[1][1] - center[1]) ** 2)
+    feature, point = candidates[0]
+    return {
+        'type': 'Feature',
+        'geometry': feature['geometry'],
+        'properties': {
+            **(feature.get('properties') or {}),
+            'source': feature.get('source'),
+            'area_m2': round(area_m2(feature['geometry']), 1),
+            'centroid': point,
+        },
+    }
+
+
+def render(geometry, size=512, padding=16, fill=(66, 135, 245), outline=(20, 60, 140), background=(255, 255, 255)):
+    """
+    Draw a footprint polygon, scaled to fit a square image
+
+    Returns:
+        PIL.Image.Image
+    """
+    shapes = polygons(geometry)
+    scale_x = math.cos(math.radians(shapes[0][0][0][1]))
+    points = [(lon * scale_x, lat) for rings in shapes for ring in rings for lon, lat in ring]
+    min_x = min(x for x, _ in points)
+    max_x = max(x for x, _ in points)
+    min_y = min(y for _, y in points)
+    max_y = max(y for _, y in points)
+    span = max(max_x - min_x, max_y - min_y) or 1e-9
+    factor = (size - 2 * padding) / span
+    offset_x = (size - (max_x - min_x) * factor) / 2
+    offset_y = (size - (max_y - min_y) * factor) / 2
+
+    def to_pixels(ring):
+        # Latitude grows northwards, pixel rows grow downwards
+        return [(offset_x + (lon * scale_x - min_x) * factor, size - offset_y - (lat - min_y) * factor)
+                for lon, lat in ring]
+
+    img = Image.new('RGB', (size, size), background)
+    draw = ImageDraw.Draw(img)
+    for rings in shapes:
+        draw.polygon(to_pixels(rings[0]), fill=fill, outline=outline)
+        for hole in rings[1:]:
+            draw.polygon(to_pixels(hole), fill=background, outline=outline)
+    return img
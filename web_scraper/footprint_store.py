@@ -0,0 +1,136 @@
+"""
+Content-Addressed Footprint Store
+Footprint images named by a hash of the captured canvas, so re-scraping an
+unchanged building reuses the existing file instead of writing a new one.
+An append-only index maps each building to its current image; with the
+perceptual option, a re-render that differs only by a few pixels (tile
+timing, anti-aliasing) also counts as unchanged.
+"""
+
+import hashlib
+import io
+import json
+import os
+import threading
+from datetime import datetime
+
+from PIL import Image
+
+
+def perceptual_hash(png_bytes, size=8):
+    """
+    Difference hash (dHash) of an image as a 64-bit int
+
+    Each bit says whether a pixel of a size+1 x size grayscale thumbnail is
+    brighter than its right-hand neighbour, so small rendering differences
+    flip few bits.
+    """
+    with Image.open(io.BytesIO(png_bytes)) as img:
+        pixels = list(img.convert('L').resize((size + 1, size), Image.BILINEAR).getdata())
+    bits = 0
+    for row in range(size):
+        for col in range(size):
+            left = pixels[row * (size + 1) + col]
+            right = pixels[row * (size + 1) + col + 1]
+            bits = (bits << 1) | (left > right)
+    return bits
+
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count('1')
+
+
+class FootprintStore:
+    def __init__(self, root='footprints', perceptual=False, max_distance=4):
+        """
+        Open (or create) a footprint store
+
+        Args:
+            root: Directory holding objects/ and index.jsonl
+            perceptual: Treat near-identical renders of a building's current image as unchanged
+            max_distance: Maximum dHash bit difference for a near duplicate (out of 64)
+        """
+        self.root = root
+        self.perceptual = perceptual
+        self.max_distance = max_distance
+        self.reused = 0
+        self.stored = 0
+        self._lock = threading.Lock()
+        self._index_path = os.path.join(root, 'index.jsonl')
+        os.makedirs(os.path.join(root, 'objects'), exist_ok=True)
+        # building key -> latest index entry
+        self._index = self._load_index()
+
+    def _load_index(self):
+        index = {}
+        if not os.path.exists(self._index_path):
+            return index
+        with open(self._index_path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # line cut short by a crash
+                index[entry['building']] = entry
+        return index
+
+    def current(self, building_key):
+        """Index entry for a building's current image, or None"""
+        with self._lock:
+            return self._index.get(building_key)
+
+    def prepare(self, building_key, png_bytes, extension, variant='', perceptual=None):
+        """
+        Work out where a captured footprint belongs
+
+        Args:
+            building_key: Stable building id (e.g. scrape_cache.cache_key(url))
+            png_bytes: Raw canvas screenshot (or other bytes that fully determine the image)
+            extension: Output file extension, e.g. '.webp'
+            variant: Encoding settings that change the output bytes (format/quality)
+            perceptual: Override the store's perceptual setting (False for exact content such as GeoJSON)
+
+        Returns:
+            dict: Index entry with 'path', 'sha256', 'phash' and 'exists'; when
+                'exists' is true the file is already on disk and nothing needs encoding
+        """
+        digest = hashlib.sha256(png_bytes + variant.encode('utf-8')).hexdigest()
+        perceptual = self.perceptual if perceptual is None else perceptual
+        phash = perceptual_hash(png_bytes) if perceptual else None
+        entry = {
+            'building': building_key,
+            'path': os.path.join(self.root, 'objects', digest[:2], f'{digest[:32]}{extension}'),
+            'sha256': digest,
+            'phash': None if phash is None else f'{phash:016x}',
+        }
+
+        current = self.current(building_key)
+        if current and os.path.exists(current['path']) and current['path'].endswith(extension):
+            near = (phash is not None and current.get('phash') and
+                    hamming_distance(phash, int(current['phash'], 16)) <= self.max_distance)
+            if current['sha256'] == digest or near:
+                return {**current, 'exists': True}
+
+        entry['exists'] = os.path.exists(entry['path'])
+        if not entry['exists']:
+            os.makedirs(os.path.dirname(entry['path']), exist_ok=True)
+        return entry
+
+    def record(self, entry):
+        """Point the building at entry's image; appends to the index only if it changed"""
+        with self._lock:
+            current = self._index.get(entry['building'])
+            if current and current['path'] == entry['path']:
+                self.reused += 1
+                return
+            record = {key: entry[key] for key in ('building', 'path', 'sha256', 'phash')}
+            record['updated_at'] = datetime.now().isoformat()
+            # One short line per append, so concurrent processes sharing the store don't interleave
+            with open(self._index_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            self._index[entry['building']] = record
+            self.stored += 1
+
+    def stats(self):
+        with self._lock:
+            return {'buildings': len(self._index), 'stored': self.stored, 'reused': self.reused}
@@ -7,23 +7,311 @@ Violation Metrics: DOB Violations, ECB Violations, HPD Violations, DOB Complaint
 
 import time
 import json
+import logging
 import os
 import re
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException, WebDriverException
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
 from webdriver_manager.chrome import ChromeDriverManager
 from datetime import datetime
 from PIL import Image
+import io
+import shutil
 import tempfile
+import threading
+
+import address_normalizer
+from debug_capture import DebugCapture
+import footprint_geometry
+import output_sink
+import page_parser
+from preflight import PageNotFound
+import retry_scheduler
+from scrape_cache import cache_key
+import scrape_logging
+
+
+logger = scrape_logging.get_logger('scraper')
+
+_chromedriver_path = None
+_chromedriver_lock = threading.Lock()
+
+# Seconds to wait for each readiness signal before parsing whatever is on the page
+DEFAULT_WAIT_TIMEOUTS = {
+    'overview': 15,
+    'violations': 15,
+    'map': 10,
+}
+
+# Labels whose presence in the rendered body text means a tab has finished loading
+OVERVIEW_READY_LABELS = ['year built', 'floors', 'stories', 'building type', 'property type', 'units']
+VIOLATIONS_READY_LABELS = ['dob violation', 'ecb violation', 'hpd violation', 'dob complaint']
+
+# Title and leading body text, for recognising bot-block pages
+_PAGE_TEXT_SAMPLE_SCRIPT = "return document.title + '\\n' + (document.body ? document.body.innerText.slice(0, 2000) : '');"
+
+# Returns true once the page text contains any of the given labels
+_TEXT_READY_SCRIPT = """
+const body = document.body;
+if (!body) return false;
+const text = (body.innerText || '').toLowerCase();
+return arguments[0].some(label => text.includes(label));
+"""
+
+# Returns true once the Mapbox map has fired 'idle' (or reports loaded tiles).
+# The map instance is not exposed under a fixed name, so look for any global
+# object that quacks like a mapboxgl.Map and owns the rendered canvas.
+_MAP_IDLE_SCRIPT = """
+const canvas = document.querySelector('canvas.mapboxgl-canvas');
+if (!canvas || !canvas.width || !canvas.height) return false;
+if (window.__scraperMapIdle) return true;
+if (!window.__scraperMapHooked) {
+    for (const key of Object.keys(window)) {
+        let candidate;
+        try { candidate = window[key]; } catch (e) { continue; }
+        if (candidate && typeof candidate.once === 'function' &&
+                typeof candidate.getCanvas === 'function' && candidate.getCanvas() === canvas) {
+            window.__scraperMapHooked = true;
+            window.__scraperMap = candidate;
+            if (candidate.loaded() && (!candidate.areTilesLoaded || candidate.areTilesLoaded())) {
+                window.__scraperMapIdle = true;
+            } else {
+                candidate.once('idle', () => { window.__scraperMapIdle = true; });
+            }
+            break;
+        }
+    }
+}
+if (!window.__scraperMapHooked) {
+    // No reachable map instance: settled once no new resources (tiles) arrive between polls
+    const loaded = performance.getEntriesByType('resource').length;
+    const settled = window.__scraperMapResources === loaded;
+    window.__scraperMapResources = loaded;
+    return settled;
+}
+return !!window.__scraperMapIdle;
+"""
+
+# URL patterns blocked in lean mode (Network.setBlockedURLs wildcards). Only text
+# and the Mapbox canvas are read, so fonts, photos and third-party trackers are
+# dead weight. PNG and SVG stay allowed: Mapbox sprites and raster tiles are PNGs,
+# and vector tiles/glyphs are .pbf, so the footprint map keeps rendering.
+LEAN_BLOCKED_URL_PATTERNS = [
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',
+    '*.jpg', '*.jpg?*', '*.jpeg', '*.jpeg?*', '*.gif', '*.gif?*', '*.webp', '*.webp?*',
+    '*.mp4', '*.webm',
+    '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*',
+    '*facebook.net*', '*connect.facebook.com*', '*hotjar.com*', '*segment.io*',
+    '*segment.com*', '*mixpanel.com*', '*intercom.io*', '*intercomcdn.com*',
+    '*fullstory.com*', '*hs-scripts.com*', '*hs-analytics.net*', '*clarity.ms*',
+    '*sentry.io*', '*events.mapbox.com*',
+]
+
+# Lets the resource timing buffer hold every request of a heavy page (default is 250)
+_RESOURCE_BUFFER_SCRIPT = "performance.setResourceTimingBufferSize(10000);"
+
+# Requests, bytes over the wire and load time for the current document
+_NETWORK_STATS_SCRIPT = """
+const entries = performance.getEntriesByType('navigation').concat(performance.getEntriesByType('resource'));
+const navigation = performance.getEntriesByType('navigation')[0];
+let bytes = 0;
+for (const entry of entries) bytes += entry.transferSize || 0;
+return {
+    requests: entries.length,
+    bytes: bytes,
+    load_seconds: navigation ? (navigation.loadEventEnd || navigation.domContentLoadedEventEnd) / 1000 : null
+};
+"""
+
+# Single-pass version of Strategy 3: returns [label, value] for every visible div
+# whose text is short and splits into exactly two lines
+_LABEL_VALUE_SCRIPT = """
+const pairs = [];
+for (const div of document.getElementsByTagName('div')) {
+    if (!div.getClientRects().length) continue;
+    const text = (div.innerText || '').trim();
+    if (!text || text.length > 200 || !text.includes('\\n')) continue;
+    const parts = text.split('\\n').map(part => part.trim()).filter(part => part);
+    if (parts.length === 2) pairs.push(parts);
+}
+return pairs;
+"""
+
+
+# Footprint output formats: name -> (Pillow format, file extension)
+FOOTPRINT_FORMATS = {
+    'png': ('PNG', '.png'),
+    'webp': ('WEBP', '.webp'),
+    'jpeg': ('JPEG', '.jpg'),
+}
+
+# Pixels cropped off the bottom of the map canvas (Mapbox attribution/buttons)
+FOOTPRINT_CROP_BOTTOM = 50
+
+
+# Returns {center: [lng, lat], features: [...]} with the polygon features of the
+# Mapbox map's GeoJSON sources (or, failing that, rendered building/lot features
+# under the map centre), or null while the map has no such data yet
+_FOOTPRINT_GEOMETRY_SCRIPT = """
+const canvas = document.querySelector('canvas.mapboxgl-canvas');
+if (!canvas) return null;
+let map = window.__scraperMap;
+if (!map) {
+    for (const key of Object.keys(window)) {
+        let candidate;
+        try { candidate = window[key]; } catch (e) { continue; }
+        if (candidate && typeof candidate.getStyle === 'function' &&
+                typeof candidate.getCanvas === 'function' && candidate.getCanvas() === canvas) {
+            map = window.__scraperMap = candidate;
+            break;
+        }
+    }
+}
+if (!map || !map.getStyle()) return null;
+const polygonal = f => f && f.geometry && (f.geometry.type === 'Polygon' || f.geometry.type === 'MultiPolygon');
+const features = [];
+const sources = map.getStyle().sources || {};
+for (const id of Object.keys(sources)) {
+    if (sources[id].type !== 'geojson') continue;
+    const source = map.getSource(id);
+    const data = source && (source._data || (source.serialize && source.serialize().data));
+    if (!data || typeof data !== 'object') continue;
+    const list = data.type === 'FeatureCollection' ? data.features :
+        data.type === 'Feature' ? [data] : [{geometry: data, properties: {}}];
+    for (const f of list) {
+        if (polygonal(f)) features.push({geometry: f.geometry, properties: f.properties || {}, source: id});
+    }
+}
+if (!features.length && map.loaded()) {
+    for (const f of map.queryRenderedFeatures(map.project(map.getCenter()))) {
+        if (polygonal(f) && /building|footprint|lot|parcel/i.test(f.layer.id + ' ' + (f.sourceLayer || ''))) {
+            features.push({geometry: f.geometry, properties: f.properties || {}, source: f.layer.id});
+        }
+    }
+}
+if (!features.length) return null;
+const center = map.getCenter();
+return {center: [center.lng, center.lat], features: features};
+"""
+
+
+def save_image(img, path, image_format='png', quality=85):
+    """Encode a PIL image once in a FOOTPRINT_FORMATS format (temp file + rename)"""
+    pil_format = FOOTPRINT_FORMATS[image_format][0]
+    if pil_format == 'JPEG':
+        img = img.convert('RGB')
+    options = {} if pil_format == 'PNG' else {'quality': quality}
+    temp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    img.save(temp_path, format=pil_format, **options)
+    os.replace(temp_path, path)
+    return path
+
+
+def encode_footprint(png_bytes, path, image_format='png', quality=85):
+    """
+    Crop a canvas screenshot and encode it once, straight from memory
+
+    Args:
+        png_bytes: PNG screenshot of the Mapbox canvas
+        path: Destination file (written via a temp file + rename)
+        image_format: Key of FOOTPRINT_FORMATS
+        quality: Quality for WebP/JPEG
+
+    Returns:
+        str: path
+    """
+    with Image.open(io.BytesIO(png_bytes)) as img:
+        width, height = img.size
+        return save_image(img.crop((0, 0, width, height - FOOTPRINT_CROP_BOTTOM)), path, image_format, quality)
+
+
+def building_id(url):
+    """Short id for log records: the building's address slug"""
+    return cache_key(url).rsplit('/', 1)[-1]
+
+
+def _log_field_summary(title, values):
+    """Log each extracted field at DEBUG (skipped entirely unless DEBUG is on)"""
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+    logger.debug("%s:\n%s", title, '\n'.join(
+        f"{'✓' if value else '✗'} {key.replace('_', ' ').title()}: {value if value else 'NOT FOUND'}"
+        for key, value in values.items()))
+
 
+def get_chromedriver_path():
+    """
+    Resolve the ChromeDriver binary once per process
+
+    ChromeDriverManager().install() checks versions (and may hit the network)
+    on every call, so batch workers share a single resolved path.
+    """
+    global _chromedriver_path
+    with _chromedriver_lock:
+        if _chromedriver_path is None:
+            _chromedriver_path = ChromeDriverManager().install()
+        return _chromedriver_path
 
 
 class NYCBuildingScraper:
-    def __init__(self, headless=False):
-        """Initialize the scraper with Chrome webdriver"""
+    # Independently scrapeable parts of a building page
+    TABS = ('overview', 'footprint', 'violations')
+
+    def __init__(self, headless=False, driver_path=None, wait_timeouts=None, extraction_mode='html',
+                 cache=None, lazy_start=False, lean=False, profile_manager=None, debug_capture=None,
+                 footprint_format='png', footprint_quality=85, footprint_encoder=None, footprint_store=None,
+                 footprint_mode='raster', render_footprints=True, address_resolver=None, preflight=None,
+                 api_capture=None, metrics=None, retry_scheduler=None, rate_limiter=None):
+        """
+        Initialize the scraper with Chrome webdriver
+
+        Args:
+            headless: Run Chrome without a visible window
+            driver_path: Optional ChromeDriver path (resolved once per process if omitted)
+            wait_timeouts: Optional overrides for DEFAULT_WAIT_TIMEOUTS (seconds per signal)
+            extraction_mode: 'html' parses page_source offline-style with page_parser,
+                'script' collects structured fields from the live DOM in one in-browser call,
+                'elements' uses the legacy per-div WebDriver loop
+            cache: Optional ScrapeCache consulted before any page load
+            lazy_start: Defer launching Chrome until a page actually has to be loaded
+                (with a warm cache, fully cached runs never start a browser)
+            lean: Block fonts, photos and analytics (LEAN_BLOCKED_URL_PATTERNS) for faster loads
+            profile_manager: Optional ProfileManager supplying a persistent, warm-cache profile;
+                without one each browser gets a temporary profile deleted on close
+            debug_capture: Optional DebugCapture that archives page sources/screenshots
+                (off by default; nothing is written to the working directory)
+            footprint_format: 'png', 'webp' or 'jpeg' for footprint images
+            footprint_quality: Quality for lossy footprint formats (1-100)
+            footprint_encoder: Optional executor (e.g. a ThreadPoolExecutor shared by a batch)
+                that crops and encodes footprints so the browser is not kept waiting on Pillow
+            footprint_store: Optional FootprintStore; footprints are then hash-named and
+                shared, and re-scraping an unchanged building writes nothing
+            footprint_mode: 'raster' screenshots the map canvas; 'vector' reads the building
+                polygon (GeoJSON, with area and centroid) from the map in one script call
+            render_footprints: In vector mode, also draw the polygon to an image file
+            address_resolver: Optional AddressResolver (defaults to the process-wide memoizing one)
+            preflight: Optional Preflight that checks URLs over plain HTTP first; 404s raise
+                PageNotFound and redirects are followed before Chrome loads anything
+            api_capture: Optional ApiCapture; every parsed page teaches it the JSON endpoints
+                behind the tab, and tabs it can already answer are fetched without Chrome
+            metrics: Optional ScrapeMetrics receiving phase spans, field hit rates and
+                WebDriver round-trip counts for every building
+            retry_scheduler: Optional RetryScheduler; tabs that fail transiently (timeout,
+                missing canvas, bot block, empty parse) are reloaded on their own after a backoff.
+                Failures left over are recorded in building_data['failures'] either way
+            rate_limiter: Optional RateLimiter (shared with other scrapers) that every page
+                load and JSON API fetch waits on; load times, timeouts and bot blocks are
+                reported back so the shared rate adapts
+        """
+        if footprint_mode not in ('raster', 'vector'):
+            raise ValueError(f"Unknown footprint mode '{footprint_mode}' (choose 'raster' or 'vector')")
+        if footprint_format not in FOOTPRINT_FORMATS:
+            raise ValueError(f"Unknown footprint format '{footprint_format}' (choose from {', '.join(FOOTPRINT_FORMATS)})")
+
         chrome_options = Options()
         if headless:
             chrome_options.add_argument('--headless')
@@ -32,12 +320,132 @@ class NYCBuildingScraper:
         chrome_options.add_argument('--disable-blink-features=AutomationControlled')
         chrome_options.add_argument('--window-size=1920,1080')
         chrome_options.add_argument('user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
-        chrome_options.add_argument(f'--user-data-dir={tempfile.mkdtemp()}')
+        if lean:
+            chrome_options.add_argument('--disable-extensions')
+            chrome_options.add_argument('--disable-background-networking')
+            chrome_options.add_argument('--disable-component-update')
+            chrome_options.add_argument('--mute-audio')
+
+        self._chrome_options = chrome_options
+        self._driver_path = driver_path
+        self._driver = None
+        self.profile_manager = profile_manager
+        self._profile_lease = None
+        self._temp_profile_dir = None
+        self.wait_timeouts = {**DEFAULT_WAIT_TIMEOUTS, **(wait_timeouts or {})}
+        self.waits = {}
+        self.wait = None
+        self._timings = {}
+        self._network = {}
+        self.lean = lean
+        self.extraction_mode = extraction_mode
+        self.cache = cache
+        self.debug_capture = debug_capture
+        self._debug_bundle = None
+        self.footprint_format = footprint_format
+        self.footprint_quality = footprint_quality
+        self.footprint_encoder = footprint_encoder
+        self.footprint_store = footprint_store
+        self.footprint_mode = footprint_mode
+        self.render_footprints = render_footprints
+        self.address_resolver = address_resolver or address_normalizer.default_resolver
+        self.preflight = preflight
+        self.api_capture = api_capture
+        self.metrics = metrics
+        self.retry_scheduler = retry_scheduler
+        self.rate_limiter = rate_limiter
+        self._webdriver_commands = 0
+        # What went wrong in the current attempt at a building's tabs
+        self._phase_errors = {}
+        self._timed_out = set()
+        self._attempt = 0
+        self._last_scrape = {}
+        self._pending_footprints = []
+
+        if not lazy_start:
+            self.start()
+
+    def start(self):
+        """Launch Chrome if it is not running yet and return the driver"""
+        if self._driver is None:
+            chrome_options = Options()
+            for argument in self._chrome_options.arguments:
+                chrome_options.add_argument(argument)
+            for argument in self._profile_arguments():
+                chrome_options.add_argument(argument)
+            if self.api_capture:
+                # Exposes network events, and so JSON response bodies, to ApiCapture.learn
+                chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+
+            # Use webdriver-manager to automatically handle ChromeDriver
+            service = Service(self._driver_path or get_chromedriver_path())
+            try:
+                self._driver = webdriver.Chrome(service=service, options=chrome_options)
+            except Exception:
+                self._release_profile()
+                raise
+            self.waits = {
+                signal: WebDriverWait(self._driver, timeout, poll_frequency=0.25)
+                for signal, timeout in self.wait_timeouts.items()
+            }
+            self.wait = self.waits['overview']
+            if self.metrics:
+                self._count_webdriver_commands()
+            self._configure_network()
+        return self._driver
+
+    def _count_webdriver_commands(self):
+        """Count every WebDriver command (each is one HTTP round trip to chromedriver)"""
+        execute = self._driver.execute
+
+        def counted_execute(driver_command, params=None):
+            self._webdriver_commands += 1
+            self.metrics.inc('webdriver_commands', command=driver_command)
+            return execute(driver_command, params)
+
+        self._driver.execute = counted_execute
+
+    def _profile_arguments(self):
+        """Lease a managed profile, or fall back to a throwaway temporary one"""
+        if self.profile_manager:
+            self._profile_lease = self.profile_manager.acquire()
+            logger.info("✓ Using Chrome profile %s", self._profile_lease.path)
+            return self.profile_manager.chrome_arguments(self._profile_lease)
+        self._temp_profile_dir = tempfile.mkdtemp(prefix='nyc_scraper_profile_')
+        return [f'--user-data-dir={self._temp_profile_dir}']
+
+    def _release_profile(self):
+        """Return the managed profile to the pool, or delete the temporary one"""
+        if self._profile_lease:
+            self._profile_lease.release()
+            self._profile_lease = None
+        if self._temp_profile_dir:
+            shutil.rmtree(self._temp_profile_dir, ignore_errors=True)
+            self._temp_profile_dir = None
+
+    def _configure_network(self):
+        """Set up page-load measurement and, in lean mode, request blocking via CDP"""
+        try:
+            self._driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument',
+                                         {'source': _RESOURCE_BUFFER_SCRIPT})
+            if self.lean:
+                self._driver.execute_cdp_cmd('Network.enable', {})
+                self._driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': LEAN_BLOCKED_URL_PATTERNS})
+                logger.info("✓ Lean mode: blocking %d URL patterns", len(LEAN_BLOCKED_URL_PATTERNS))
+        except Exception as e:
+            logger.warning("✗ Could not configure network settings: %s", e)
+
+    def _record_network(self, tab):
+        """Record requests, transferred bytes and load time of the current page under network[tab]"""
+        try:
+            self._network[tab] = self.driver.execute_script(_NETWORK_STATS_SCRIPT)
+        except Exception as e:
+            logger.warning("✗ Could not read network stats: %s", e)
 
-        # Use webdriver-manager to automatically handle ChromeDriver
-        service = Service(ChromeDriverManager().install())
-        self.driver = webdriver.Chrome(service=service, options=chrome_options)
-        self.wait = WebDriverWait(self.driver, 15)
+    @property
+    def driver(self):
+        """The Chrome webdriver, started on first use when lazy_start is set"""
+        return self.start()
 
     def scrape_building(self, url):
         """
@@ -49,41 +457,448 @@ class NYCBuildingScraper:
         Returns:
             dict: Building data including overview, violations, and footprint
         """
-        print(f"\n{'='*60}")
-        print(f"Scraping: {url}")
-        print(f"{'='*60}\n")
+        with scrape_logging.building(building_id(url)):
+            logger.info("Scraping: %s", url)
+            building_data = self._new_building_data(url)
+            scrape_start = time.perf_counter()
+
+            cached = self._apply_cached(url, building_data)
+            tabs = [tab for tab in self.TABS if self._cache_section(tab) not in cached]
+
+            preflight_seconds = None
+            if tabs and self.preflight:
+                # Raises PageNotFound before any browser time is spent on a dead URL
+                phase_start = time.perf_counter()
+                with scrape_logging.phase('preflight'):
+                    canonical = self.preflight.resolve(url)
+                preflight_seconds = round(time.perf_counter() - phase_start, 3)
+                if canonical != url:
+                    url = building_data['url'] = canonical
+                    # The canonical URL may already be cached under its own key
+                    cached = self._apply_cached(url, building_data)
+                    tabs = [tab for tab in self.TABS if self._cache_section(tab) not in cached]
+
+            self.scrape_tabs(url, tabs, building_data)
+
+            if preflight_seconds is not None:
+                building_data['timings']['preflight'] = preflight_seconds
+            building_data['timings']['total'] = round(time.perf_counter() - scrape_start, 3)
+            self._record_metrics(building_data)
+            self._log_summary(building_data)
+            return building_data
+
+    def _apply_cached(self, url, building_data):
+        """Copy fresh cached sections for url into building_data and return them"""
+        cached = {}
+        if self.cache:
+            cached = self.cache.get(url)
+            building_data['cache'] = {section: ('hit' if section in cached else 'miss')
+                                      for section in ('overview', 'violations')}
+
+        if 'overview' in cached:
+            logger.info("✓ Overview and footprint served from cache")
+            building_data['building_info'].update(cached['overview']['data']['building_info'])
+            building_data['building_footprint_url'] = cached['overview']['data']['building_footprint_url']
+            building_data['building_footprint'] = cached['overview']['data'].get('building_footprint')
+        if 'violations' in cached:
+            logger.info("✓ Violations served from cache")
+            building_data['violations'] = cached['violations']['data']
+        return cached
+
+    def scrape_tabs(self, url, tabs=TABS, building_data=None):
+        """
+        Scrape only the requested tabs and merge them into existing building data
 
-        # Extract address from URL for use in filename
+        'overview' and 'footprint' share one overview page load; 'violations'
+        loads the violations tab. Tabs not requested are left untouched. With
+        an api_capture, tabs it can answer from the JSON API skip the browser.
+
+        Args:
+            url: Full URL to the building page
+            tabs: Any of 'overview', 'footprint', 'violations'
+            building_data: Existing data to update (e.g. loaded from save_data output)
+
+        Returns:
+            dict: The updated building data
+        """
+        tabs = set(tabs)
+        unknown = tabs - set(self.TABS)
+        if unknown:
+            raise ValueError(f"Unknown tabs: {', '.join(sorted(unknown))}")
+
+        if building_data is None:
+            building_data = self._new_building_data(url)
+        building_data.setdefault('building_info', {})
+        building_data.setdefault('violations', {})
+        building_data.setdefault('building_footprint_url', None)
+        building_data.setdefault('building_footprint', None)
+        self._timings = building_data['timings'] = {}
+        self._network = building_data['network'] = {}
+        self._webdriver_commands = 0
         url_address = self._extract_address_from_url(url)
+        self._debug_bundle = self.debug_capture.begin(url) if self.debug_capture else None
+
+        browser_tabs = tabs
+        api_tabs = set()
+        if self.api_capture:
+            phase_start = time.perf_counter()
+            with scrape_logging.phase('api'):
+                api_tabs = self._fetch_api(url, tabs, building_data)
+            if api_tabs:
+                self._timings['api'] = round(time.perf_counter() - phase_start, 3)
+                browser_tabs = tabs - api_tabs
+
+        failures = {}
+        try:
+            pending = browser_tabs
+            self._attempt = 0
+            while pending:
+                attempt_failures = self._scrape_browser_tabs(url, pending, building_data)
+                if self._attempt:
+                    self.retry_scheduler.record_recovered(pending - set(attempt_failures), failures)
+                failures.update(attempt_failures)
+                for tab in pending - set(attempt_failures):
+                    failures.pop(tab, None)
+                if not self.retry_scheduler:
+                    break
+                # Only the tabs that failed are loaded again
+                pending = self.retry_scheduler.retry_tabs(attempt_failures, self._attempt)
+                self._attempt += 1
+
+            # Ensure we have the URL address if page scraping didn't find one
+            if not building_data['building_info'].get('address'):
+                building_data['building_info']['address'] = url_address
+        finally:
+            if self._debug_bundle is not None:
+                self.debug_capture.finish(self._debug_bundle)
+                self._debug_bundle = None
+
+        # Tabs scraped now replace their old outcome; other tabs keep theirs
+        recorded = building_data.setdefault('failures', {})
+        for tab in tabs:
+            recorded.pop(tab, None)
+        recorded.update(failures)
+
+        if tabs:
+            now = datetime.now().isoformat()
+            building_data['scraped_at'] = now
+            tabs_scraped_at = building_data.setdefault('tabs_scraped_at', {})
+            for tab in tabs:
+                tabs_scraped_at[tab] = now
+
+        if self.cache and tabs:
+            self._update_cache(url, building_data, tabs)
+
+        # What _record_metrics attributes to this scrape
+        self._last_scrape = {
+            'tab_sources': {tab: 'api' if tab in api_tabs else 'browser' for tab in tabs},
+            'fields': {tab: dict(building_data['building_info'] if tab == 'overview' else building_data['violations'])
+                       for tab in tabs if tab in ('overview', 'violations')},
+        }
+        return building_data
+
+    def _scrape_browser_tabs(self, url, tabs, building_data):
+        """
+        Load and parse the given tabs once in the browser
+
+        Returns:
+            dict: {tab: failure kind} for tabs that produced nothing (see retry_scheduler.classify_phase)
+        """
+        self._phase_errors = {}
+        self._timed_out = set()
+        overview_tabs = tabs & {'overview', 'footprint'}
+        if overview_tabs:
+            try:
+                with scrape_logging.phase('overview'):
+                    self._scrape_overview_tab(url, building_data, overview_tabs)
+            except TimeoutException as e:
+                # The page load itself timed out; without a scheduler this stays fatal as before
+                if not self.retry_scheduler:
+                    raise
+                logger.warning("✗ Overview navigation timed out: %s", e)
+                for tab in overview_tabs:
+                    self._phase_errors.setdefault(tab, e)
+
+        if 'violations' in tabs:
+            # Scrape violations by navigating to violations URL
+            phase_start = time.perf_counter()
+            with scrape_logging.phase('violations'):
+                building_data['violations'] = self._scrape_violations(url)
+            self._timings['violations'] = round(time.perf_counter() - phase_start, 3)
+
+        return self._phase_failures(tabs, building_data)
+
+    def _phase_failures(self, tabs, building_data):
+        """Classify each tab of the attempt just made; a block page on screen overrides the other kinds"""
+        failures = {}
+        for tab in tabs:
+            if tab == 'footprint':
+                data = building_data['building_footprint_url'] or building_data['building_footprint']
+                signal = 'map'
+            else:
+                data = building_data['building_info'] if tab == 'overview' else building_data['violations']
+                signal = tab
+            kind = retry_scheduler.classify_phase(tab, data, self._phase_errors.get(tab), signal in self._timed_out)
+            if kind:
+                failures[tab] = kind
+
+        if failures and self._driver is not None:
+            try:
+                page_text = self._driver.execute_script(_PAGE_TEXT_SAMPLE_SCRIPT)
+            except WebDriverException:
+                page_text = None
+            if retry_scheduler.is_bot_block(page_text):
+                failures = {tab: (retry_scheduler.BOT_BLOCK if kind != retry_scheduler.BROWSER_ERROR else kind)
+                            for tab, kind in failures.items()}
+                if self.rate_limiter:
+                    self.rate_limiter.record_block()
+
+        for tab, kind in failures.items():
+            logger.warning("✗ %s failed: %s", tab.title(), kind)
+        return failures
+
+    def _record_metrics(self, building_data):
+        """Hand the finished building's timings, field hits and round trips to the metrics"""
+        if self.metrics:
+            self.metrics.record_building(building_data, self._last_scrape.get('tab_sources'),
+                                         self._last_scrape.get('fields'), self._webdriver_commands,
+                                         worker=threading.current_thread().name)
+
+    def _log_summary(self, building_data):
+        """Log the one summary record per building (all that --quiet keeps besides warnings)"""
+        fields = {**building_data.get('building_info', {}), **building_data.get('violations', {})}
+        found = sum(1 for value in fields.values() if value)
+        sources = self._last_scrape.get('tab_sources') or {}
+        scrape_logging.summary_logger.info(
+            "%s: %d/%d fields, %s, %.2fs", building_data['url'], found, len(fields),
+            ', '.join(f'{tab} via {source}' for tab, source in sorted(sources.items())) or 'all cached',
+            building_data.get('timings', {}).get('total', 0),
+            extra={'summary': {
+                'url': building_data['url'],
+                'fields_found': found,
+                'fields_total': len(fields),
+                'missing_fields': [field for field, value in fields.items() if not value],
+                'tabs': sources,
+                'cache': building_data.get('cache'),
+                'timings': building_data.get('timings'),
+            }})
+
+    def refresh_saved(self, json_path, tabs=('violations',)):
+        """
+        Re-scrape selected tabs for a building saved by save_data and rewrite its JSON in place
 
-        building_data = {
+        Args:
+            json_path: Path to a JSON file written by save_data
+            tabs: Tabs to refresh (defaults to violations only: one page load, no screenshot)
+
+        Returns:
+            dict: The merged building data
+        """
+        with open(json_path, encoding='utf-8') as f:
+            building_data = json.load(f)
+
+        with scrape_logging.building(building_id(building_data['url'])):
+            logger.info("Refreshing %s for: %s", ', '.join(tabs), building_data['url'])
+            self.scrape_tabs(building_data['url'], tabs, building_data)
+            self._record_metrics(building_data)
+            self._log_summary(building_data)
+
+        temp_path = f'{json_path}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(building_data, f, indent=2, ensure_ascii=False)
+        os.replace(temp_path, json_path)
+        logger.info("✓ Data updated in: %s", json_path)
+
+        return building_data
+
+    def _new_building_data(self, url):
+        return {
             'url': url,
             'scraped_at': datetime.now().isoformat(),
-            'building_info': {'address': url_address},  # Pre-populate with URL address
+            'building_info': {'address': self._extract_address_from_url(url)},  # Pre-populate with URL address
             'violations': {},
-            'building_footprint_url': None
+            'building_footprint_url': None,
+            'building_footprint': None,
+            'timings': {}
         }
 
+    @staticmethod
+    def _cache_section(tab):
+        """Cache section holding a tab's data (footprint is stored with the overview)"""
+        return 'violations' if tab == 'violations' else 'overview'
+
+    def _scrape_overview_tab(self, url, building_data, tabs=TABS):
+        """Load the overview tab once, then parse it and/or capture the footprint into building_data"""
         # Navigate to overview tab first
         overview_url = self._construct_tab_url(url, 'overview')
-        self.driver.get(overview_url)
-        time.sleep(5)
+        phase_start = self._navigate(overview_url)
+        self._timings['overview_navigate'] = round(time.perf_counter() - phase_start, 3)
+        ready = self._wait_for_text('overview', OVERVIEW_READY_LABELS)
+        self._report_page_load(phase_start, ready, self._timings['overview_navigate'])
+
+        if 'overview' in tabs:
+            # Scrape overview information (will update address if found on page)
+            phase_start = time.perf_counter()
+            scraped_info = self._scrape_overview()
+            self._timings['overview_parse'] = round(time.perf_counter() - phase_start, 3)
+            building_data['building_info'].update(scraped_info)
+
+        if 'footprint' in tabs:
+            # Get building footprint photo from overview tab
+            phase_start = time.perf_counter()
+            with scrape_logging.phase('footprint'):
+                if self.footprint_mode == 'vector':
+                    self._get_footprint_vector(building_data, cache_key(url))
+                else:
+                    building_data['building_footprint_url'] = self._get_footprint_image(building_key=cache_key(url))
+            self._timings['footprint'] = round(time.perf_counter() - phase_start, 3)
+
+        # Measured last so map tiles fetched for the footprint are counted
+        self._record_network('overview')
+
+        if self.api_capture:
+            learned = {}
+            if 'overview' in tabs:
+                learned['overview'] = dict(scraped_info)
+                if scraped_info['address'] == self._extract_address_from_url(url):
+                    # Taken from the URL, not from anything the page fetched
+                    learned['overview']['address'] = None
+            if 'footprint' in tabs and self.footprint_mode == 'vector' and building_data['building_footprint']:
+                learned['footprint'] = {'geometry': building_data['building_footprint']['geometry']}
+            self._learn_api(url, learned)
+
+    def _fetch_api(self, url, tabs, building_data):
+        """
+        Fill the tabs the api_capture can answer from replayed JSON endpoints
 
-        # Scrape overview information (will update address if found on page)
-        scraped_info = self._scrape_overview()
-        building_data['building_info'].update(scraped_info)
+        Raster footprints always need the map canvas, so 'footprint' is only
+        fetched in vector mode.
 
-        # Ensure we have the URL address if page scraping didn't find one
-        if not building_data['building_info'].get('address'):
-            building_data['building_info']['address'] = url_address
+        Returns:
+            set: Tabs filled in (the rest still need the browser)
+        """
+        wanted = [tab for tab in tabs if tab != 'footprint' or self.footprint_mode == 'vector']
+        if self.rate_limiter and any(self.api_capture.replayable(tab) for tab in wanted):
+            self._wait_for_rate_limit()
+        fetched = self.api_capture.fetch(url, wanted)
+
+        if 'footprint' in fetched:
+            feature = footprint_geometry.select_building(
+                [{'geometry': fetched['footprint']['geometry'], 'properties': {}, 'source': 'api'}])
+            if feature is None:
+                del fetched['footprint']
+            else:
+                building_data['building_footprint'] = feature
+                if self.render_footprints:
+                    building_data['building_footprint_url'] = self._render_footprint(feature, cache_key(url))
+        if 'overview' in fetched:
+            building_data['building_info'].update(fetched['overview'])
+        if 'violations' in fetched:
+            building_data['violations'] = fetched['violations']
+
+        if fetched:
+            logger.info("✓ %s fetched from the JSON API (no page load)", ', '.join(sorted(fetched)).title())
+        return set(fetched)
+
+    def _learn_api(self, url, tabs_data):
+        """Teach the api_capture which JSON responses of the current page hold the parsed fields"""
+        phase_start = time.perf_counter()
+        self.api_capture.learn(self.driver, url, tabs_data)
+        self._timings['api_learn'] = round(self._timings.get('api_learn', 0) + time.perf_counter() - phase_start, 3)
+
+    def _update_cache(self, url, building_data, tabs):
+        """Store the sections touched by the scraped tabs, skipping ones that came back empty"""
+        fresh = {}
+        info = building_data['building_info']
+        if ('overview' in tabs or 'footprint' in tabs) and any(value for key, value in info.items() if key != 'address'):
+            fresh['overview'] = {
+                'building_info': info,
+                'building_footprint_url': building_data['building_footprint_url'],
+                'building_footprint': building_data['building_footprint'],
+            }
+        if 'violations' in tabs and any(value is not None for value in building_data['violations'].values()):
+            fresh['violations'] = building_data['violations']
+        if fresh:
+            self.cache.put(url, fresh)
+
+    def _wait_for_rate_limit(self):
+        """Take a token from the shared rate_limiter, recording any wait as 'rate_limit_wait'"""
+        waited = self.rate_limiter.acquire()
+        if waited:
+            self._timings['rate_limit_wait'] = round(self._timings.get('rate_limit_wait', 0) + waited, 3)
+
+    def _navigate(self, url):
+        """
+        Load a page, after a token from the rate_limiter if there is one
+
+        Returns:
+            float: perf_counter() when the load started (after any rate-limit wait)
+        """
+        if self.rate_limiter:
+            self._wait_for_rate_limit()
+        # Started first (lazy_start) so browser startup is not counted as load time
+        driver = self.driver
+        started = time.perf_counter()
+        try:
+            driver.get(url)
+        except WebDriverException:
+            if self.rate_limiter:
+                self.rate_limiter.record(time.perf_counter() - started, ok=False)
+            raise
+        return started
+
+    def _report_page_load(self, started, ready, navigate_seconds):
+        """
+        Tell the rate_limiter how long a page took to load
 
-        # Get building footprint photo from overview tab
-        building_data['building_footprint_url'] = self._get_footprint_image()
+        A readiness timeout usually means the building simply lacks the awaited
+        labels, so it is not counted as an error and only the navigation time is
+        reported (the full wait would read as a slowdown). Transport failures and
+        bot blocks are reported by _navigate and _phase_failures.
+        """
+        if self.rate_limiter:
+            seconds = time.perf_counter() - started if ready else navigate_seconds
+            self.rate_limiter.record(seconds, ok=True)
 
-        # Scrape violations by navigating to violations URL
-        building_data['violations'] = self._scrape_violations(url)
+    def _wait_for(self, signal, condition):
+        """
+        Block until a readiness condition holds or its timeout expires
 
-        return building_data
+        The time spent is recorded as '<signal>_wait' in the current timings.
+
+        Args:
+            signal: Key into self.wait_timeouts ('overview', 'violations', 'map')
+            condition: Callable taking the driver and returning truthy when ready
+
+        Returns:
+            bool: True if the signal fired, False on timeout
+        """
+        start = time.perf_counter()
+        try:
+            self.waits[signal].until(condition)
+            ready = True
+        except TimeoutException:
+            logger.warning("✗ Timed out after %ss waiting for %s; parsing anyway", self.wait_timeouts[signal], signal)
+            ready = False
+            self._timed_out.add(signal)
+            if self.metrics:
+                self.metrics.inc('wait_timeouts', signal=signal)
+        self._timings[f'{signal}_wait'] = round(time.perf_counter() - start, 3)
+        return ready
+
+    def _wait_for_text(self, signal, labels):
+        """Wait until the rendered body text contains any of the given labels"""
+        return self._wait_for(signal, lambda driver: driver.execute_script(_TEXT_READY_SCRIPT, labels))
+
+    def _wait_for_map_idle(self):
+        """Wait until the Mapbox canvas has finished rendering"""
+        def map_idle(driver):
+            try:
+                return driver.execute_script(_MAP_IDLE_SCRIPT)
+            except WebDriverException:
+                # Tainted canvases or navigation mid-poll; keep polling
+                return False
+        return self._wait_for('map', map_idle)
 
     def _extract_address_from_url(self, url):
         """
@@ -105,7 +920,7 @@ class NYCBuildingScraper:
                     address = address_part.replace('-', ' ').title()
                     return address
         except Exception as e:
-            print(f"Could not extract address from URL: {e}")
+            logger.warning("Could not extract address from URL: %s", e)
 
         return "Unknown Address"
 
@@ -118,386 +933,361 @@ class NYCBuildingScraper:
 
     def _scrape_overview(self):
         """Scrape overview tab information - focusing on specific fields"""
-        print("Extracting building overview data...")
-
-        overview_data = {
-            'address': None,
-            'zip_code': None,
-            'borough': None,
-            'building_type': None,
-            'floors': None,
-            'number_of_units': None,
-            'year_built': None
-        }
+        logger.debug("Extracting building overview data...")
 
-        try:
-            # Save page source for debugging
-            try:
-                with open('debug_page_source.html', 'w', encoding='utf-8') as f:
-                    f.write(self.driver.page_source)
-                print("✓ Page source saved to debug_page_source.html")
-            except Exception as e:
-                print(f"✗ Could not save page source: {e}")
+        overview_data = page_parser.empty_overview()
 
-            # Take a screenshot for debugging
-            try:
-                self.driver.save_screenshot('debug_screenshot.png')
-                print("✓ Screenshot saved to debug_screenshot.png")
-            except:
-                pass
-
-            # Strategy 1: Extract from page text
-            print("\n--- Strategy 1: Text parsing ---")
-            body_text = self.driver.find_element(By.TAG_NAME, 'body').text
-            lines = [line.strip() for line in body_text.split('\n') if line.strip()]
-
-            # Look for data patterns in text
-            for i, line in enumerate(lines):
-                line_lower = line.lower()
-                next_line = lines[i + 1] if i + 1 < len(lines) else ""
-
-                # Borough detection
-                if line in ['Manhattan', 'Brooklyn', 'Queens', 'Bronx', 'Staten Island']:
-                    if not overview_data['borough']:
-                        overview_data['borough'] = line
-                        print(f"  Found Borough: {line}")
-
-                # Year built
-                if 'year built' in line_lower or line_lower == 'built':
-                    year_match = re.search(r'\b(19|20)\d{2}\b', next_line)
-                    if year_match and not overview_data['year_built']:
-                        overview_data['year_built'] = year_match.group(0)
-                        print(f"  Found Year Built: {year_match.group(0)}")
-
-                # Floors/Stories
-                if 'floors' in line_lower or 'stories' in line_lower:
-                    num_match = re.search(r'\b(\d+)\b', next_line)
-                    if num_match and not overview_data['floors']:
-                        overview_data['floors'] = num_match.group(0)
-                        print(f"  Found Floors: {num_match.group(0)}")
-
-                # Units
-                if 'units' in line_lower and 'number' in line_lower:
-                    num_match = re.search(r'\b(\d+)\b', next_line)
-                    if num_match and not overview_data['number_of_units']:
-                        overview_data['number_of_units'] = num_match.group(0)
-                        print(f"  Found Units: {num_match.group(0)}")
-
-                # Building type
-                if 'building type' in line_lower or 'property type' in line_lower:
-                    if next_line and not overview_data['building_type']:
-                        overview_data['building_type'] = next_line
-                        print(f"  Found Building Type: {next_line}")
-
-                # Zip code
-                zip_match = re.search(r'\b\d{5}(?:-\d{4})?\b', line)
-                if zip_match and not overview_data['zip_code']:
-                    overview_data['zip_code'] = zip_match.group(0)
-                    print(f"  Found Zip Code: {zip_match.group(0)}")
-
-            # Strategy 2: Try to find H1 for address
-            print("\n--- Strategy 2: Header extraction ---")
-            try:
-                h1 = self.driver.find_element(By.TAG_NAME, 'h1')
-                address_text = h1.text.strip()
-                if address_text and not overview_data['address']:
-                    overview_data['address'] = address_text
-                    print(f"  Found Address in H1: {address_text}")
-            except:
-                pass
+        page_source = None
+        try:
+            logger.debug("--- Parsing overview (%s) ---", self.extraction_mode)
+            if self.extraction_mode == 'html':
+                # Fetch the rendered HTML once; it feeds both the parser and any debug capture
+                page_source = self.driver.page_source
+                document = page_parser.PageDocument(page_source)
+                lines, h1, pairs = document.lines, document.h1, document.label_value_pairs
+            else:
+                lines, h1, pairs = self._collect_live_overview()
 
-            # Strategy 3: Look for structured data in divs/spans
-            print("\n--- Strategy 3: Structured element search ---")
-            try:
-                # Find all divs that might contain key-value pairs
-                all_divs = self.driver.find_elements(By.TAG_NAME, 'div')
-
-                for div in all_divs:
-                    try:
-                        text = div.text.strip()
-                        if not text or len(text) > 200:
-                            continue
-
-                        # Check if this looks like a label-value pair
-                        if '\n' in text:
-                            parts = text.split('\n')
-                            if len(parts) == 2:
-                                label, value = parts[0].strip(), parts[1].strip()
-                                label_lower = label.lower()
-
-                                if 'year built' in label_lower and not overview_data['year_built']:
-                                    overview_data['year_built'] = value
-                                    print(f"  Found Year Built: {value}")
-                                elif 'floors' in label_lower and not overview_data['floors']:
-                                    overview_data['floors'] = value
-                                    print(f"  Found Floors: {value}")
-                                elif 'units' in label_lower and not overview_data['number_of_units']:
-                                    overview_data['number_of_units'] = value
-                                    print(f"  Found Units: {value}")
-                                elif 'type' in label_lower and not overview_data['building_type']:
-                                    overview_data['building_type'] = value
-                                    print(f"  Found Building Type: {value}")
-                                elif 'borough' in label_lower and not overview_data['borough']:
-                                    overview_data['borough'] = value
-                                    print(f"  Found Borough: {value}")
-                    except:
-                        continue
-            except Exception as e:
-                print(f"  Error in structured search: {e}")
-
-            # Strategy 4: Extract from URL if address still missing
-            if not overview_data['address']:
-                try:
-                    url_parts = self.driver.current_url.split('/')
-                    for part in url_parts:
-                        if '-' in part and any(c.isdigit() for c in part) and 'building' not in part.lower():
-                            address_candidate = part.replace('-', ' ').title()
-                            overview_data['address'] = address_candidate
-                            print(f"  Extracted Address from URL: {address_candidate}")
-                            break
-                except:
-                    pass
-
-            # Print summary
-            print(f"\n{'='*60}")
-            print("EXTRACTED DATA SUMMARY:")
-            print(f"{'='*60}")
-            for key, value in overview_data.items():
-                status = "✓" if value else "✗"
-                print(f"{status} {key.replace('_', ' ').title()}: {value if value else 'NOT FOUND'}")
-            print(f"{'='*60}\n")
+            overview_data = page_parser.parse_overview(
+                lines, h1, pairs, url=self.driver.current_url, log=logger.debug
+            )
+            _log_field_summary('EXTRACTED DATA SUMMARY', overview_data)
 
         except Exception as e:
-            print(f"Error scraping overview: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error scraping overview: %s", e)
+            self._phase_errors['overview'] = e
 
+        self._capture_debug('overview', overview_data, page_source)
         return overview_data
 
-    def _get_footprint_image(self, output_dir='scraped_buildings'):
-        """Screenshot the Mapbox canvas building footprint and crop out button"""
-        print("\nExtracting building footprint image...")
+    def _capture_debug(self, tab, data, page_source=None):
+        """Add the current page to this building's debug bundle if the DebugCapture wants it"""
+        bundle = self._debug_bundle
+        if bundle is None or not self.debug_capture.check(bundle, tab, data, timed_out=tab in self._timed_out,
+                                                            error=self._phase_errors.get(tab)):
+            return
+        # Every attempt at a retried tab is kept
+        name = f'{tab}.retry{self._attempt}' if self._attempt else tab
+        try:
+            if page_source is None:
+                page_source = self.driver.page_source
+            bundle.add(f'{name}.html', page_source)
+            if self.debug_capture.screenshots:
+                bundle.add(f'{name}.png', self.driver.get_screenshot_as_png())
+        except Exception as e:
+            logger.warning("✗ Could not capture debug artifacts for %s: %s", tab, e)
+
+    def _collect_live_overview(self):
+        """
+        Read overview text, H1 and label/value pairs from the live DOM
+
+        Used by the 'script' and 'elements' extraction modes; 'html' mode reads
+        the same things from page_source instead.
+
+        Returns:
+            tuple: (lines, h1 text or None, [label, value] pairs)
+        """
+        body_text = self.driver.find_element(By.TAG_NAME, 'body').text
+        lines = page_parser.text_to_lines(body_text)
+
+        h1 = None
+        try:
+            h1 = self.driver.find_element(By.TAG_NAME, 'h1').text.strip()
+        except:
+            pass
+
+        pairs = []
+        try:
+            if self.extraction_mode == 'elements':
+                pairs = self._collect_label_value_pairs_elements()
+            else:
+                pairs = self._collect_label_value_pairs_script()
+        except Exception as e:
+            logger.warning("Error in structured search: %s", e)
+
+        return lines, h1, pairs
+
+    def _collect_label_value_pairs_script(self):
+        """
+        Collect candidate label/value pairs from every div in one execute_script call
+
+        Mirrors _collect_label_value_pairs_elements (visible divs whose text is
+        at most 200 characters and splits into exactly two lines) but runs the
+        filtering in the browser, so the cost is one WebDriver round trip
+        instead of one per div.
+
+        Returns:
+            list: [label, value] pairs in document order
+        """
+        return self.driver.execute_script(_LABEL_VALUE_SCRIPT) or []
+
+    def _collect_label_value_pairs_elements(self):
+        """
+        Collect candidate label/value pairs by reading each div's text over WebDriver
+
+        This is the original per-element loop and costs one round trip per div;
+        kept for comparison and as a fallback via extraction_mode='elements'.
+
+        Returns:
+            list: [label, value] pairs in document order
+        """
+        pairs = []
+        for div in self.driver.find_elements(By.TAG_NAME, 'div'):
+            try:
+                text = div.text.strip()
+                if not text or len(text) > 200:
+                    continue
+
+                # Check if this looks like a label-value pair
+                if '\n' in text:
+                    parts = text.split('\n')
+                    if len(parts) == 2:
+                        pairs.append([parts[0].strip(), parts[1].strip()])
+            except:
+                continue
+        return pairs
+
+    def _get_footprint_image(self, output_dir='scraped_buildings', building_key=None):
+        """
+        Screenshot the Mapbox canvas building footprint and crop out button
+
+        The canvas PNG is cropped and encoded in memory; with a footprint_encoder
+        pool the encode runs off this thread and the file appears shortly after
+        (wait_for_footprints() or close() waits for it). With a footprint_store
+        the image is content-addressed and an unchanged footprint is not re-encoded.
+
+        Returns:
+            str: Path of the footprint image, or None if no canvas was found
+        """
+        logger.debug("Extracting building footprint image...")
 
         try:
             # Wait for map to render
-            time.sleep(3)
+            self._wait_for_map_idle()
 
             # Find the Mapbox canvas element
             canvas = self.driver.find_element(By.CSS_SELECTOR, 'canvas.mapboxgl-canvas')
 
             if canvas:
-                print("✓ Found Mapbox canvas element")
-                os.makedirs(output_dir, exist_ok=True)
-
-                # Generate filename
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                temp_path = os.path.join(output_dir, f'footprint_temp_{timestamp}.png')
-                screenshot_path = os.path.join(output_dir, f'footprint_{self.address}_{timestamp}.png')
+                logger.debug("✓ Found Mapbox canvas element")
+                extension = FOOTPRINT_FORMATS[self.footprint_format][1]
 
                 # Take screenshot
-                canvas.screenshot(temp_path)
-                print("✓ Captured footprint screenshot")
-
-                # Crop bottom 50px to remove button
-                img = Image.open(temp_path)
-                width, height = img.size
-                cropped_img = img.crop((0, 0, width, height - 50))
-                cropped_img.save(screenshot_path)
-                print(f"✓ Cropped and saved: {screenshot_path}")
-
-                # Delete temp file
-                os.remove(temp_path)
+                png_bytes = canvas.screenshot_as_png
+                logger.debug("✓ Captured footprint screenshot")
+
+                store_entry = None
+                if self.footprint_store and building_key:
+                    store_entry = self.footprint_store.prepare(
+                        building_key, png_bytes, extension, variant=f'{self.footprint_format}:{self.footprint_quality}')
+                    screenshot_path = store_entry['path']
+                    if store_entry['exists']:
+                        self.footprint_store.record(store_entry)
+                        logger.info("✓ Footprint unchanged, reusing: %s", screenshot_path)
+                        return screenshot_path
+                else:
+                    screenshot_path = self._footprint_path(output_dir, building_key, extension)
+
+                self._submit_footprint(screenshot_path,
+                                       lambda: self._write_footprint(png_bytes, screenshot_path, store_entry))
 
                 return screenshot_path
             else:
-                print("✗ No Mapbox canvas found")
+                logger.warning("✗ No Mapbox canvas found")
                 return None
 
         except Exception as e:
-            print(f"Error getting footprint image: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error getting footprint image: %s", e)
+            self._phase_errors['footprint'] = e
             return None
 
+    def _get_footprint_vector(self, building_data, building_key, output_dir='scraped_buildings'):
+        """
+        Read the building polygon from the map's sources into building_data['building_footprint']
+
+        With render_footprints the polygon is also drawn to building_footprint_url;
+        if the page exposes no geometry, that falls back to a canvas screenshot.
+        """
+        logger.debug("Extracting building footprint geometry...")
+        result = {}
+
+        def geometry_ready(driver):
+            try:
+                result['map'] = driver.execute_script(_FOOTPRINT_GEOMETRY_SCRIPT)
+            except WebDriverException:
+                return False
+            return result['map'] is not None
+
+        feature = None
+        if self._wait_for('map', geometry_ready):
+            feature = footprint_geometry.select_building(result['map']['features'], result['map']['center'])
+        if feature is None:
+            logger.warning("✗ No footprint geometry found in the map sources")
+            if self.render_footprints:
+                building_data['building_footprint_url'] = self._get_footprint_image(output_dir, building_key)
+            return
+
+        building_data['building_footprint'] = feature
+        properties = feature['properties']
+        logger.info("✓ Footprint polygon from '%s': %s m², centroid %s",
+                    properties['source'], properties['area_m2'], properties['centroid'])
+        if self.render_footprints:
+            building_data['building_footprint_url'] = self._render_footprint(feature, building_key, output_dir)
+
+    def _render_footprint(self, feature, building_key, output_dir='scraped_buildings'):
+        """Draw a footprint polygon to an image file (encoded off-thread with a footprint_encoder)"""
+        extension = FOOTPRINT_FORMATS[self.footprint_format][1]
+        store_entry = None
+        if self.footprint_store and building_key:
+            # Identical geometry renders identically, so hash the GeoJSON rather than pixels
+            geometry_bytes = json.dumps(feature['geometry'], sort_keys=True).encode('utf-8')
+            store_entry = self.footprint_store.prepare(
+                building_key, geometry_bytes, extension,
+                variant=f'render:{self.footprint_format}:{self.footprint_quality}', perceptual=False)
+            path = store_entry['path']
+            if store_entry['exists']:
+                self.footprint_store.record(store_entry)
+                logger.info("✓ Footprint unchanged, reusing: %s", path)
+                return path
+        else:
+            path = self._footprint_path(output_dir, building_key, extension)
+
+        def write():
+            save_image(footprint_geometry.render(feature['geometry']), path,
+                       self.footprint_format, self.footprint_quality)
+            if store_entry:
+                self.footprint_store.record(store_entry)
+
+        self._submit_footprint(path, write)
+        return path
+
+    def _footprint_path(self, output_dir, building_key, extension):
+        """
+        Timestamped footprint filename for runs without a footprint_store
+
+        Named after the building URL's slug: URL jobs go straight to
+        scrape_building and never resolve an address.
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        name = building_key.rsplit('/', 1)[-1] if building_key else getattr(self, 'address', None)
+        name = re.sub(r'[^\w.-]+', '_', name or 'building')
+        return os.path.join(output_dir, f'footprint_{name}_{timestamp}{extension}')
+
+    def _submit_footprint(self, path, write):
+        """Run a footprint write on the encoder pool (or inline without one)"""
+        if self.footprint_encoder:
+            future = self.footprint_encoder.submit(write)
+            # Forget finished encodes so a long-lived scraper does not accumulate them
+            self._pending_footprints = [(pending_path, pending) for pending_path, pending in self._pending_footprints
+                                        if not pending.done() or pending.exception()]
+            self._pending_footprints.append((path, future))
+            logger.debug("✓ Queued encode: %s", path)
+        else:
+            write()
+            logger.info("✓ Saved: %s", path)
+
+    def _write_footprint(self, png_bytes, path, store_entry=None):
+        """Encode a footprint, then point its building at it in the store (runs on the encoder pool)"""
+        encode_footprint(png_bytes, path, self.footprint_format, self.footprint_quality)
+        if store_entry:
+            self.footprint_store.record(store_entry)
+
+    def wait_for_footprints(self):
+        """
+        Block until footprint images queued on the encoder pool are written
+
+        Returns:
+            list: Paths whose encode failed
+        """
+        failed = []
+        pending, self._pending_footprints = self._pending_footprints, []
+        for path, future in pending:
+            try:
+                future.result()
+            except Exception as e:
+                logger.error("✗ Footprint encode failed for %s: %s", path, e)
+                failed.append(path)
+        return failed
 
     def _scrape_violations(self, base_url):
         """Navigate to violations tab and extract violation counts"""
-        print("\nExtracting violations data...")
+        logger.debug("Extracting violations data...")
 
-        violations_data = {
-            'dob_violations': None,
-            'ecb_violations': None,
-            'hpd_violations': None,
-            'dob_complaints': None
-        }
+        violations_data = page_parser.empty_violations()
+        page_source = None
 
         try:
             # Construct violations URL
             violations_url = self._construct_tab_url(base_url, 'violations')
 
-            print(f"Navigating to: {violations_url}")
-            self.driver.get(violations_url)
-            time.sleep(5)  # Wait for page to load
-
-            # Save violations page source for debugging
-            try:
-                with open('debug_violations_source.html', 'w', encoding='utf-8') as f:
-                    f.write(self.driver.page_source)
-                print("✓ Violations page source saved to debug_violations_source.html")
-            except:
-                pass
+            logger.debug("Navigating to: %s", violations_url)
+            phase_start = self._navigate(violations_url)
+            self._timings['violations_navigate'] = round(time.perf_counter() - phase_start, 3)
+            ready = self._wait_for_text('violations', VIOLATIONS_READY_LABELS)
+            self._report_page_load(phase_start, ready, self._timings['violations_navigate'])
+            self._record_network('violations')
 
+            phase_start = time.perf_counter()
             # Extract violations data from page text
-            body_text = self.driver.find_element(By.TAG_NAME, 'body').text
-            lines = [line.strip() for line in body_text.split('\n') if line.strip()]
-
-            # Look for specific violation types
-            for i, line in enumerate(lines):
-                line_lower = line.lower()
-                next_line = lines[i + 1] if i + 1 < len(lines) else ""
-
-                # DOB Violations
-                if 'dob violations' in line_lower or 'dob violation' in line_lower:
-                    num_match = re.search(r'\b(\d+)\b', next_line)
-                    if num_match:
-                        violations_data['dob_violations'] = num_match.group(0)
-                        print(f"  Found DOB Violations: {num_match.group(0)}")
-                    # Check if number is in the same line
-                    num_match = re.search(r'\b(\d+)\b', line)
-                    if num_match and not violations_data['dob_violations']:
-                        violations_data['dob_violations'] = num_match.group(0)
-                        print(f"  Found DOB Violations: {num_match.group(0)}")
-
-                # ECB Violations
-                if 'ecb violations' in line_lower or 'ecb violation' in line_lower:
-                    num_match = re.search(r'\b(\d+)\b', next_line)
-                    if num_match:
-                        violations_data['ecb_violations'] = num_match.group(0)
-                        print(f"  Found ECB Violations: {num_match.group(0)}")
-                    num_match = re.search(r'\b(\d+)\b', line)
-                    if num_match and not violations_data['ecb_violations']:
-                        violations_data['ecb_violations'] = num_match.group(0)
-                        print(f"  Found ECB Violations: {num_match.group(0)}")
-
-                # HPD Violations
-                if 'hpd violations' in line_lower or 'hpd violation' in line_lower:
-                    num_match = re.search(r'\b(\d+)\b', next_line)
-                    if num_match:
-                        violations_data['hpd_violations'] = num_match.group(0)
-                        print(f"  Found HPD Violations: {num_match.group(0)}")
-                    num_match = re.search(r'\b(\d+)\b', line)
-                    if num_match and not violations_data['hpd_violations']:
-                        violations_data['hpd_violations'] = num_match.group(0)
-                        print(f"  Found HPD Violations: {num_match.group(0)}")
-
-                # DOB Complaints
-                if 'dob complaints' in line_lower or 'dob complaint' in line_lower:
-                    num_match = re.search(r'\b(\d+)\b', next_line)
-                    if num_match:
-                        violations_data['dob_complaints'] = num_match.group(0)
-                        print(f"  Found DOB Complaints: {num_match.group(0)}")
-                    num_match = re.search(r'\b(\d+)\b', line)
-                    if num_match and not violations_data['dob_complaints']:
-                        violations_data['dob_complaints'] = num_match.group(0)
-                        print(f"  Found DOB Complaints: {num_match.group(0)}")
-
-            # Print summary
-            print(f"\n{'='*60}")
-            print("VIOLATIONS SUMMARY:")
-            print(f"{'='*60}")
-            for key, value in violations_data.items():
-                status = "✓" if value else "✗"
-                print(f"{status} {key.replace('_', ' ').title()}: {value if value else 'NOT FOUND'}")
-            print(f"{'='*60}\n")
+            if self.extraction_mode == 'html':
+                page_source = self.driver.page_source
+                lines = page_parser.PageDocument(page_source).lines
+            else:
+                body_text = self.driver.find_element(By.TAG_NAME, 'body').text
+                lines = page_parser.text_to_lines(body_text)
+            violations_data = page_parser.parse_violations(lines, log=logger.debug)
+            self._timings['violations_parse'] = round(time.perf_counter() - phase_start, 3)
+            if self.api_capture:
+                self._learn_api(base_url, {'violations': violations_data})
+
+            _log_field_summary('VIOLATIONS SUMMARY', violations_data)
 
         except Exception as e:
-            print(f"Error scraping violations: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error scraping violations: %s", e)
+            self._phase_errors['violations'] = e
 
+        self._capture_debug('violations', violations_data, page_source)
         return violations_data
 
     def save_data(self, building_data, output_dir='scraped_buildings'):
-        """Save scraped data to JSON"""
-        os.makedirs(output_dir, exist_ok=True)
-
-        # Create safe filename
-        address = building_data['building_info'].get('address') or 'unknown_building'
-        if address:
-            safe_name = re.sub(r'[^\w\s-]', '', address)
-            safe_name = re.sub(r'[-\s]+', '_', safe_name).strip('_')
-        else:
-            safe_name = 'unknown_building'
-
-        # Fallback to timestamp if still empty
-        if not safe_name or safe_name == '':
-            safe_name = f'building_{datetime.now().strftime("%Y%m%d_%H%M%S")}'
-
-        # Save JSON data
-        json_path = os.path.join(output_dir, f'{safe_name}.json')
-        with open(json_path, 'w', encoding='utf-8') as f:
-            json.dump(building_data, f, indent=2, ensure_ascii=False)
-        print(f"\n✓ Data saved to: {json_path}")
+        """Save scraped data to JSON (one file per building; see output_sink for bulk formats)"""
+        phase_start = time.perf_counter()
+        json_path = output_sink.save_json_file(building_data, output_dir)
+        if self.metrics:
+            self.metrics.observe('save', time.perf_counter() - phase_start)
+        logger.info("✓ Data saved to: %s", json_path)
 
         return json_path
 
     def close(self):
         """Close the browser"""
-        self.driver.quit()
+        self.wait_for_footprints()
+        if self._driver is not None:
+            try:
+                self._driver.quit()
+            finally:
+                self._driver = None
+                self._release_profile()
     def address_to_url(self, address, zip_code=None):
         """
         Convert NYC address to MarketProof URL format
 
+        Suffixes and directionals are normalized token by token, and the
+        borough/neighborhood come from the address's ZIP code (see
+        address_normalizer). Results are memoized by the resolver.
+
         Args:
             address: Street address (e.g., "110 West 57 Street")
             zip_code: Optional ZIP code (e.g., "10019")
 
         Returns:
             str: MarketProof URL
-        """
-        # Clean and format address
-        address_clean = address.lower().strip()
-
-        # Replace common abbreviations
-        replacements = {
-            ' street': '-street',
-            ' st': '-street',
-            ' avenue': '-avenue',
-            ' ave': '-avenue',
-            ' road': '-road',
-            ' rd': '-road',
-            ' boulevard': '-boulevard',
-            ' blvd': '-boulevard',
-            ' place': '-place',
-            ' pl': '-place',
-            ' drive': '-drive',
-            ' dr': '-drive',
-            'east ': 'east-',
-            'west ': 'west-',
-            'north ': 'north-',
-            'south ': 'south-',
-        }
-
-        for old, new in replacements.items():
-            address_clean = address_clean.replace(old, new)
-
-        # Replace spaces with hyphens
-        address_clean = address_clean.replace(' ', '-')
-
-        # Remove special characters except hyphens
-        address_clean = re.sub(r'[^\w\-]', '', address_clean)
-
-        self.address = address_clean
-        # Default borough to manhattan if not specified
-        borough = 'manhattan'
-        neighborhood = 'midtown'
-
-        # Construct URL
-        if zip_code:
-            url = f"https://nyc.marketproof.com/building/{borough}/{neighborhood}/{address_clean}-{zip_code}?tab=details"
-        else:
-            url = f"https://nyc.marketproof.com/building/{borough}/{neighborhood}/{address_clean}?tab=details"
 
+        Raises:
+            ValueError: The resolver has recorded that this address has no page
+        """
+        url, self.address = self.address_resolver.resolve(address, zip_code)
         return url
 
     def scrape_by_address(self, address, zip_code=None):
@@ -512,8 +1302,16 @@ class NYCBuildingScraper:
             dict: Building data
         """
         url = self.address_to_url(address, zip_code)
-        print(f"Generated URL: {url}")
-        return self.scrape_building(url)
+        logger.info("Generated URL: %s", url)
+        try:
+            building_data = self.scrape_building(url)
+        except PageNotFound:
+            # Never spend another pre-flight (or page load) on this address
+            self.address_resolver.mark_missing(address, zip_code)
+            raise
+        if building_data['url'] != url:
+            self.address_resolver.remember(address, zip_code, building_data['url'])
+        return building_data
 
 
 
@@ -525,37 +1323,43 @@ def main():
     # scraper = NYCBuildingScraper(headless=False)
     # building_data = scraper.scrape_building(url)
 
-    import sys
-    # Get address and zip code from command-line arguments if provided
-    if len(sys.argv) >= 3:
-        address = sys.argv[1]
-        zip_code = sys.argv[2]
-    elif len(sys.argv) == 2:
-        address = sys.argv[1]
-        zip_code = None
-    else:
-        address = "110 West 57 Street"
+    import argparse
+    parser = argparse.ArgumentParser(description='Scrape one NYC building from MarketProof by address')
+    parser.add_argument('address', nargs='?', default='110 West 57 Street', help='Street address')
+    parser.add_argument('zip_code', nargs='?', help='Optional ZIP code (e.g. 10019)')
+    parser.add_argument('--debug', choices=['failure', 'always'],
+                        help='Archive page sources/screenshots for pages whose extraction failed, or for every page')
+    parser.add_argument('--debug-dir', default='debug_artifacts', help='Directory for debug archives')
+    args = parser.parse_args()
+    zip_code = args.zip_code
+    if zip_code is None and args.address == parser.get_default('address'):
         zip_code = "10019"
+    scrape_logging.configure()
 
-    scraper = NYCBuildingScraper(headless=False)  # Set to True for headless mode
+    # Page dumps are off unless asked for
+    debug_capture = None
+    if args.debug:
+        debug_capture = DebugCapture(args.debug_dir, always=args.debug == 'always', on_failure=args.debug == 'failure')
+    scraper = NYCBuildingScraper(headless=False, debug_capture=debug_capture)  # Set to True for headless mode
 
     try:
-        building_data = scraper.scrape_by_address(address, zip_code)
+        building_data = scraper.scrape_by_address(args.address, zip_code)
         output_file = scraper.save_data(building_data)
 
         print(f"\n{'='*60}")
         print("SCRAPING COMPLETE!")
         print(f"{'='*60}")
         print(f"Output file: {output_file}")
-        print(f"Check debug_page_source.html and debug_screenshot.png for troubleshooting")
+        if debug_capture:
+            print(f"Debug artifacts are archived in {debug_capture.output_dir}/")
         print(f"{'='*60}\n")
 
     except Exception as e:
-        print(f"\nError during scraping: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error during scraping: %s", e)
     finally:
         scraper.close()
+        if debug_capture:
+            debug_capture.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,463 @@
+"""
+Output Sinks
+Where scraped building records go. The per-file JSON mode keeps the original
+save_data format, one file per building named by its address and a hash of
+its URL (so same-address buildings never collide); the JSONL sink streams
+records into rotating files and the Parquet sink writes a columnar copy for
+analytics. Bulk sinks buffer records, flush in batches, and only publish a
+file under its final name once it is complete, so readers never see
+half-written output.
+
+A process that dies mid-file leaves it behind as '<name>.part', and records
+still in its buffer are lost. recover_parts() (run at startup by the batch
+and sharded runners) publishes the complete lines of a stale JSONL part and
+sets a Parquet part that never got its footer aside as '<name>.truncated',
+since it cannot be read. A part counts as stale once the process id in its
+name is gone, so runs on different machines need separate output dirs.
+"""
+
+import abc
+import hashlib
+import json
+import os
+import re
+import threading
+from datetime import datetime
+
+import page_parser
+from scrape_cache import cache_key
+import scrape_logging
+
+
+logger = scrape_logging.get_logger('output')
+
+
+def safe_filename(building_data):
+    """
+    Filesystem-safe name from the building address plus a hash of its URL
+
+    The hash keeps buildings that share a street address (other borough or
+    ZIP) from overwriting each other's file, while a re-scrape of the same
+    building still replaces its own.
+    """
+    address = building_data['building_info'].get('address') or 'unknown_building'
+    safe_name = re.sub(r'[^\w\s-]', '', address)
+    safe_name = re.sub(r'[-\s]+', '_', safe_name).strip('_')
+
+    # Fallback to timestamp if still empty
+    if not safe_name:
+        safe_name = f'building_{datetime.now().strftime("%Y%m%d_%H%M%S")}'
+    url = building_data.get('url')
+    if url:
+        safe_name = f'{safe_name}_{hashlib.sha1(cache_key(url).encode()).hexdigest()[:8]}'
+    return safe_name
+
+
+def save_json_file(building_data, output_dir='scraped_buildings'):
+    """
+    Write one pretty-printed JSON file per building (the original save_data format)
+
+    Returns:
+        str: Path of the written file
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    json_path = os.path.join(output_dir, f'{safe_filename(building_data)}.json')
+    temp_path = f'{json_path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(building_data, f, indent=2, ensure_ascii=False)
+    os.replace(temp_path, json_path)
+    return json_path
+
+
+class JsonFileSink:
+    """Compatibility sink: one JSON file per building, named after its address and URL hash"""
+
+    # Every write() is on disk under its final name when it returns
+    durable = True
+
+    def __init__(self, output_dir='scraped_buildings'):
+        self.output_dir = output_dir
+
+    def write(self, building_data):
+        return save_json_file(building_data, self.output_dir)
+
+    def flush(self):
+        pass
+
+    def rotate(self):
+        pass
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class _RotatingSink(abc.ABC):
+    """
+    Shared buffering/rotation logic for the bulk sinks
+
+    Records are buffered and flushed every `flush_every` records into a
+    '<name>.part' file. When the file reaches max_records or max_bytes (or the
+    sink is closed) it is renamed to its final name.
+
+    `durable` tells callers whether a record survives the process dying right
+    after write() returns (directly or via recover_parts); a resumable run
+    should only mark a record done once that holds or rotate() has published it.
+    """
+
+    extension = None
+
+    def __init__(self, output_dir='scraped_buildings', prefix='buildings', max_records=50000,
+                 max_bytes=256 * 1024 * 1024, flush_every=100):
+        self.output_dir = output_dir
+        self.prefix = prefix
+        self.max_records = max_records
+        self.max_bytes = max_bytes
+        self.flush_every = max(1, flush_every)
+        self.files_written = []
+        self._buffer = []
+        self._part_path = None
+        self._final_path = None
+        self._file_records = 0
+        self._sequence = 0
+        self._lock = threading.Lock()
+        os.makedirs(output_dir, exist_ok=True)
+
+    def write(self, building_data):
+        """
+        Buffer one record
+
+        Returns:
+            str: Final path of the file the record will end up in
+        """
+        with self._lock:
+            if self._part_path is None:
+                self._open_file()
+            self._buffer.append(building_data)
+            location = self._final_path
+            if len(self._buffer) >= self.flush_every:
+                self._flush_locked()
+            return location
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    @property
+    def durable(self):
+        return False
+
+    def rotate(self):
+        """Flush remaining records and publish the current file (the next write starts a new one)"""
+        with self._lock:
+            self._flush_locked()
+            self._publish()
+
+    def close(self):
+        """Flush remaining records and publish the current file"""
+        self.rotate()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _open_file(self):
+        self._sequence += 1
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        name = f'{self.prefix}-{stamp}-{os.getpid()}-{self._sequence:04d}{self.extension}'
+        self._final_path = os.path.join(self.output_dir, name)
+        self._part_path = f'{self._final_path}.part'
+        self._file_records = 0
+        self._open_part()
+
+    def _flush_locked(self):
+        if not self._buffer:
+            return
+        self._write_batch(self._buffer)
+        self._file_records += len(self._buffer)
+        self._buffer = []
+        if self._file_records >= self.max_records or self._part_size() >= self.max_bytes:
+            self._publish()
+
+    def _publish(self):
+        if self._part_path is None:
+            return
+        self._close_part()
+        os.replace(self._part_path, self._final_path)
+        self.files_written.append(self._final_path)
+        logger.info("✓ Wrote %d records to %s", self._file_records, self._final_path)
+        self._part_path = None
+        self._final_path = None
+
+    def _part_size(self):
+        try:
+            return os.path.getsize(self._part_path)
+        except OSError:
+            return 0
+
+    @abc.abstractmethod
+    def _open_part(self):
+        """Open self._part_path for writing"""
+
+    @abc.abstractmethod
+    def _write_batch(self, records):
+        """Append records to the open part"""
+
+    @abc.abstractmethod
+    def _close_part(self):
+        """Close the open part so it can be published"""
+
+
+class JsonlSink(_RotatingSink):
+    """Compact JSON lines, one record per line, in rotating files"""
+
+    extension = '.jsonl'
+
+    @property
+    def durable(self):
+        # Each batch is fsynced and recover_parts keeps every complete line
+        return self.flush_every == 1
+
+    def _open_part(self):
+        self._file = open(self._part_path, 'a', encoding='utf-8')
+
+    def _write_batch(self, records):
+        self._file.write(''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in records))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def _close_part(self):
+        self._file.close()
+
+
+# Nested sections stored as JSON text columns in Parquet
+_JSON_COLUMNS = ['building_footprint', 'timings', 'network', 'cache', 'tabs_scraped_at', 'failures']
+
+
+def flatten_record(building_data):
+    """
+    Flatten a building record into a fixed set of string columns
+
+    building_info.* and violations.* become their own columns; other nested
+    sections are kept as JSON text so the schema never drifts between batches.
+    """
+    row = {
+        'url': building_data.get('url'),
+        'scraped_at': building_data.get('scraped_at'),
+        'building_footprint_url': building_data.get('building_footprint_url'),
+    }
+    info = building_data.get('building_info') or {}
+    for field in page_parser.OVERVIEW_FIELDS:
+        value = info.get(field)
+        row[field] = None if value is None else str(value)
+    violations = building_data.get('violations') or {}
+    for field in page_parser.VIOLATION_FIELDS:
+        value = violations.get(field)
+        row[field] = None if value is None else str(value)
+    for column in _JSON_COLUMNS:
+        value = building_data.get(column)
+        row[column] = None if value is None else json.dumps(value, ensure_ascii=False)
+    return row
+
+
+class ParquetSink(_RotatingSink):
+    """Columnar output (one row group per flush) for analytics; needs pyarrow"""
+
+    extension = '.parquet'
+
+    def __init__(self, *args, **kwargs):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError("Parquet output needs pyarrow: pip install pyarrow")
+        self._pa = pyarrow
+        self._pq = pyarrow.parquet
+        columns = (['url', 'scraped_at', 'building_footprint_url'] + page_parser.OVERVIEW_FIELDS
+                   + page_parser.VIOLATION_FIELDS + _JSON_COLUMNS)
+        self._schema = pyarrow.schema([(column, pyarrow.string()) for column in columns])
+        super().__init__(*args, **kwargs)
+
+    def _open_part(self):
+        self._writer = self._pq.ParquetWriter(self._part_path, self._schema, compression='zstd')
+
+    def _write_batch(self, records):
+        table = self._pa.Table.from_pylist([flatten_record(record) for record in records], schema=self._schema)
+        self._writer.write_table(table)
+
+    def _close_part(self):
+        self._writer.close()
+
+
+SINKS = {
+    'json': JsonFileSink,
+    'jsonl': JsonlSink,
+    'parquet': ParquetSink,
+}
+
+
+def open_sink(output_format='json', output_dir='scraped_buildings', **options):
+    """
+    Create a sink by name
+
+    Args:
+        output_format: 'json' (one file per building), 'jsonl' or 'parquet'
+        output_dir: Directory for output files
+        **options: Rotation/batching options for the bulk sinks
+
+    Returns:
+        A sink with write(), flush() and close()
+    """
+    if output_format not in SINKS:
+        raise ValueError(f"Unknown output format '{output_format}' (choose from {', '.join(SINKS)})")
+    if output_format == 'json':
+        return JsonFileSink(output_dir)
+    return SINKS[output_format](output_dir, **options)
+
+
+# '<prefix>-<stamp>-<pid>-<sequence><extension>.part', as named by _RotatingSink._open_file
+_PART_NAME = re.compile(r'-(\d+)-\d{4}(\.jsonl|\.parquet)\.part$')
+
+
+def _process_alive(pid):
+    if pid == os.getpid():
+        return True
+    if os.name == 'nt':
+        # os.kill would terminate the process on Windows
+        import ctypes
+        handle = ctypes.windll.kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return False
+        ctypes.windll.kernel32.CloseHandle(handle)
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _recover_jsonl(part_path, final_path):
+    """Publish the complete records of a JSONL part; returns (records kept, lines dropped)"""
+    kept = []
+    dropped = 0
+    with open(part_path, encoding='utf-8', errors='replace') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                # A line cut off mid-write has no newline or is not valid JSON
+                if not line.endswith('\n'):
+                    raise ValueError('no newline')
+                json.loads(line)
+            except ValueError:
+                dropped += 1
+                continue
+            kept.append(line)
+    if kept:
+        temp_path = f'{final_path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(''.join(kept))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, final_path)
+    os.remove(part_path)
+    return len(kept), dropped
+
+
+def _parquet_complete(path):
+    """True if a Parquet file has both magic markers (the footer is written last, on close)"""
+    with open(path, 'rb') as f:
+        if f.read(4) != b'PAR1':
+            return False
+        f.seek(0, os.SEEK_END)
+        if f.tell() < 12:
+            return False
+        f.seek(-4, os.SEEK_END)
+        return f.read(4) == b'PAR1'
+
+
+def recover_parts(output_dir):
+    """
+    Publish or set aside '.part' files left by bulk sinks whose process died
+
+    Complete JSONL lines are published under the file's final name (a line cut
+    off mid-write is dropped); a complete Parquet part is renamed, one without
+    its footer is moved to '<final name>.truncated' and its records are lost.
+    Parts of processes still running on this machine are left alone.
+
+    Args:
+        output_dir: Directory the sinks write to
+
+    Returns:
+        list: {'part', 'path', 'records', 'status'} per stale part, status being
+            'recovered', 'empty' or 'truncated'
+    """
+    if not os.path.isdir(output_dir):
+        return []
+
+    results = []
+    for name in sorted(os.listdir(output_dir)):
+        match = _PART_NAME.search(name)
+        if not match or _process_alive(int(match.group(1))):
+            continue
+        part_path = os.path.join(output_dir, name)
+        final_path = part_path[:-len('.part')]
+        result = {'part': part_path, 'path': final_path, 'records': None, 'status': 'recovered'}
+        try:
+            if match.group(2) == '.jsonl':
+                result['records'], dropped = _recover_jsonl(part_path, final_path)
+                if not result['records']:
+                    result.update(path=None, status='empty')
+                else:
+                    logger.warning("✓ Recovered %d records from stale %s into %s",
+                                   result['records'], name, final_path)
+                if dropped:
+                    logger.warning("✗ Dropped %d incomplete lines from stale %s", dropped, name)
+            elif _parquet_complete(part_path):
+                os.replace(part_path, final_path)
+                logger.warning("✓ Recovered stale %s into %s", name, final_path)
+            else:
+                result.update(path=f'{final_path}.truncated', status='truncated')
+                os.replace(part_path, result['path'])
+                logger.warning("✗ Stale %s has no Parquet footer and cannot be read; moved to %s "
+                               "(its records need scraping again)", name, result['path'])
+        except OSError as e:
+            # Another process may have recovered it first
+            logger.warning("✗ Could not recover %s: %s", part_path, e)
+            continue
+        results.append(result)
+    return results
+
+
+def read_records(paths):
+    """
+    Iterate building records written by the json or jsonl sinks
+
+    Args:
+        paths: Files (.json/.jsonl) or directories containing them
+
+    Yields:
+        dict: building_data records
+    """
+    for path in paths:
+        if os.path.isdir(path):
+            names = sorted(name for name in os.listdir(path) if name.endswith(('.json', '.jsonl')))
+            yield from read_records(os.path.join(path, name) for name in names)
+        elif path.endswith('.jsonl'):
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+        elif path.endswith('.json'):
+            with open(path, encoding='utf-8') as f:
+                yield json.load(f)
@@ -0,0 +1,428 @@
+"""
+MarketProof Page Parser
+Browser-free parsing for the overview and violations tabs. Works on raw HTML
+strings (a live driver's page_source or archived debug_*.html files) so stored
+pages can be re-parsed without Selenium and parsing can be tested offline.
+"""
+
+import bisect
+import itertools
+import re
+from html.parser import HTMLParser
+
+
+BOROUGHS = ['Manhattan', 'Brooklyn', 'Queens', 'Bronx', 'Staten Island']
+
+# Elements whose start/end begins a new line of rendered text
+_BLOCK_TAGS = {
+    'address', 'article', 'aside', 'blockquote', 'br', 'dd', 'details', 'dialog', 'div',
+    'dl', 'dt', 'fieldset', 'figcaption', 'figure', 'footer', 'form', 'h1', 'h2', 'h3',
+    'h4', 'h5', 'h6', 'header', 'hr', 'li', 'main', 'nav', 'ol', 'p', 'pre', 'section',
+    'summary', 'table', 'tbody', 'td', 'tfoot', 'th', 'thead', 'tr', 'ul',
+}
+
+# Elements whose content never shows up in rendered text
+_HIDDEN_TAGS = {'head', 'script', 'style', 'noscript', 'template', 'svg', 'title'}
+
+# Elements without an end tag
+_VOID_TAGS = {
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta',
+    'source', 'track', 'wbr',
+}
+
+# Raw (pre-whitespace-collapse) text longer than this cannot be a short label/value div
+_MAX_RAW_DIV_TEXT = 2000
+
+_LINE_BREAK = '\n'
+
+
+class PageDocument(HTMLParser):
+    """
+    Single-pass HTML reader producing what the scraper reads from a live page
+
+    Attributes:
+        lines: Non-empty rendered text lines, like body.text split on newlines
+        h1: Text of the first <h1>, or None
+        label_value_pairs: [label, value] for every div whose text is at most
+            200 characters and has exactly two lines (Strategy 3 candidates)
+    """
+
+    def __init__(self, html):
+        super().__init__(convert_charrefs=True)
+        self.lines = []
+        self.h1 = None
+        self.label_value_pairs = []
+        self._tokens = []
+        self._text_length = 0
+        self._hidden_depth = 0
+        self._div_starts = []
+        self._h1_start = None
+        self.feed(html)
+        self.close()
+        self.lines = _split_lines(self._tokens)
+
+    def _append(self, token):
+        self._tokens.append(token)
+        self._text_length += len(token)
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _HIDDEN_TAGS:
+            self._hidden_depth += 1
+            return
+        if self._hidden_depth:
+            return
+        if tag in _BLOCK_TAGS:
+            self._append(_LINE_BREAK)
+        if tag == 'div':
+            self._div_starts.append((len(self._tokens), self._text_length))
+        elif tag == 'h1' and self.h1 is None and self._h1_start is None:
+            self._h1_start = len(self._tokens)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in _VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag in _HIDDEN_TAGS:
+            self._hidden_depth = max(0, self._hidden_depth - 1)
+            return
+        if self._hidden_depth:
+            return
+        if tag == 'div' and self._div_starts:
+            start_index, start_length = self._div_starts.pop()
+            if self._text_length - start_length <= _MAX_RAW_DIV_TEXT:
+                self._record_div(self._tokens[start_index:])
+        elif tag == 'h1' and self._h1_start is not None:
+            text = ' '.join(_split_lines(self._tokens[self._h1_start:]))
+            self.h1 = text or None
+            self._h1_start = None
+        if tag in _BLOCK_TAGS:
+            self._append(_LINE_BREAK)
+
+    def handle_data(self, data):
+        if not self._hidden_depth and data:
+            self._append(data)
+
+    def _record_div(self, tokens):
+        div_lines = _split_lines(tokens)
+        if len(div_lines) == 2 and len('\n'.join(div_lines)) <= 200:
+            self.label_value_pairs.append(div_lines)
+
+
+def _split_lines(tokens):
+    """Collapse whitespace the way a browser renders it and split into non-empty lines"""
+    text = ''.join(tokens)
+    return [' '.join(line.split()) for line in text.split(_LINE_BREAK) if line.strip()]
+
+
+def text_to_lines(body_text):
+    """Split a live element's .text into stripped, non-empty lines"""
+    return [line.strip() for line in body_text.split('\n') if line.strip()]
+
+
+def _noop(message):
+    pass
+
+
+class FieldRule:
+    """
+    Declarative description of one extracted field
+
+    Args:
+        field: Output key (several rules may feed the same field)
+        label: Lowercase regex announcing the field; start it with a literal so the
+            combined scanner keeps Python's fast prefix search
+        value: Regex for the value; None takes the whole line the source points at
+        source: 'next' reads the value from the following line, 'line' uses the
+            matching line itself, 'match' uses the text the label matched
+        whole_line: The label only counts when it is the entire line
+        cased: Regex the label's text must also match in its original case (the
+            scanners only see lowercased text)
+        overwrite: Later matches replace earlier ones instead of first-match-wins
+        same_line_fallback: If the next line has no value, look in the label's own line
+        title: Name used in log messages
+    """
+
+    def __init__(self, field, label, value=None, source='next', whole_line=False, overwrite=False,
+                 same_line_fallback=False, cased=None, title=None):
+        self.field = field
+        self.label = label
+        self.label_regex = re.compile(label, re.M)
+        self.cased = re.compile(cased) if cased else None
+        self.value = re.compile(value) if value else None
+        self.source = source
+        self.whole_line = whole_line
+        self.overwrite = overwrite
+        self.same_line_fallback = same_line_fallback
+        self.title = title or field.replace('_', ' ').title()
+
+    def extract(self, text):
+        if self.value is None:
+            return text or None
+        match = self.value.search(text)
+        return match.group(0) if match else None
+
+
+class FieldMatcher:
+    """
+    Table-driven extractor
+
+    Rule labels are compiled into combined alternations and run over the whole
+    text at once, so adding fields does not add passes. Labels that start with a
+    literal share one scanner (the regex engine can then skip ahead on their first
+    characters); pattern-led labels such as the zip code get a second one. Python
+    work only happens where a label actually occurs.
+    """
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+        keyword_rules = [rule for rule in self.rules if rule.label[:1].isalnum()]
+        pattern_rules = [rule for rule in self.rules if not rule.label[:1].isalnum()]
+        self._scanners = [
+            # Joined without wrapping groups: any group in front defeats the prefix search
+            (re.compile('|'.join(rule.label for rule in group), re.M), group)
+            for group in (keyword_rules, pattern_rules) if group
+        ]
+
+    @staticmethod
+    def _rule_at(rules, text, position):
+        """The rule whose label a scanner matched at position (first in table order)"""
+        for rule in rules:
+            match = rule.label_regex.match(text, position)
+            if match:
+                return rule, match
+        return None, None
+
+    def find(self, lines):
+        """
+        Yield (line index, rule, label text) for every label occurrence
+
+        Args:
+            lines: Rendered text lines
+        """
+        text = '\n'.join(lines).lower()
+        lowered = text.split('\n')
+        line_starts = [0]
+        line_starts.extend(itertools.accumulate(len(line) + 1 for line in lowered[:-1]))
+
+        found = []
+        for scanner, rules in self._scanners:
+            for scanned in scanner.finditer(text):
+                rule, match = self._rule_at(rules, text, scanned.start())
+                if rule is None:
+                    continue
+                index = bisect.bisect_right(line_starts, scanned.start()) - 1
+                if rule.whole_line and match.group(0) != lowered[index]:
+                    continue
+                if rule.cased:
+                    column = scanned.start() - line_starts[index]
+                    if not rule.cased.fullmatch(lines[index][column:column + len(match.group(0))]):
+                        continue
+                found.append((scanned.start(), index, rule, match.group(0)))
+        # Document order, so first-match-wins fields keep the earliest occurrence
+        found.sort(key=lambda item: item[0])
+        for _, index, rule, label_text in found:
+            yield index, rule, label_text
+
+    def scan(self, lines, data, log=_noop):
+        """Fill data from rendered text lines"""
+        for i, rule, label_text in self.find(lines):
+            line = lines[i]
+            if rule.source == 'next':
+                next_line = lines[i + 1] if i + 1 < len(lines) else ""
+                value = rule.extract(next_line)
+                if value and (rule.overwrite or not data[rule.field]):
+                    data[rule.field] = value
+                    log(f"  Found {rule.title}: {value}")
+                if rule.same_line_fallback and not data[rule.field]:
+                    value = rule.extract(line)
+                    if value:
+                        data[rule.field] = value
+                        log(f"  Found {rule.title}: {value}")
+            else:
+                value = line if rule.source == 'line' else label_text
+                if rule.overwrite or not data[rule.field]:
+                    data[rule.field] = value
+                    log(f"  Found {rule.title}: {value}")
+        return data
+
+    def apply_pairs(self, pairs, data, log=_noop):
+        """
+        Fill data from [label, value] pairs
+
+        Each pair feeds the first rule (in table order) whose label it contains
+        and whose field is still empty.
+        """
+        for label, value in pairs:
+            matched = {id(rule) for _, rule, _ in self.find([label])}
+            for rule in self.rules:
+                if id(rule) in matched and not data[rule.field]:
+                    data[rule.field] = value
+                    log(f"  Found {rule.title}: {value}")
+                    break
+        return data
+
+
+_NUMBER = r'\b\d+\b'
+_YEAR = r'\b(?:19|20)\d{2}\b'
+
+OVERVIEW_FIELDS = ['address', 'zip_code', 'borough', 'building_type', 'floors', 'number_of_units', 'year_built']
+
+# Strategy 1: labels and values in the rendered page text
+OVERVIEW_RULES = [
+    # Exact case, as on the page: a lowercase 'brooklyn' line is prose, not the borough field
+    FieldRule('borough', '|'.join(borough.lower() for borough in BOROUGHS), source='line', whole_line=True,
+              cased='|'.join(BOROUGHS)),
+    FieldRule('year_built', r'year built', value=_YEAR),
+    FieldRule('year_built', r'built', value=_YEAR, whole_line=True),
+    FieldRule('floors', r'floors|stories', value=_NUMBER),
+    FieldRule('number_of_units', r'number(?=.*units)|units(?=.*number)', value=_NUMBER, title='Units'),
+    FieldRule('building_type', r'building type|property type'),
+    FieldRule('zip_code', r'(?<![0-9a-z_])[0-9]{5}(?:-[0-9]{4})?(?![0-9a-z_])', source='match'),
+]
+
+# Strategy 3: short label/value divs; earlier rules win when a label matches several
+OVERVIEW_PAIR_RULES = [
+    FieldRule('year_built', r'year built'),
+    FieldRule('floors', r'floors'),
+    FieldRule('number_of_units', r'units', title='Units'),
+    FieldRule('building_type', r'type'),
+    FieldRule('borough', r'borough'),
+]
+
+VIOLATION_FIELDS = ['dob_violations', 'ecb_violations', 'hpd_violations', 'dob_complaints']
+
+# A count on the next line overrides; the label's own line is the fallback
+VIOLATION_RULES = [
+    FieldRule('dob_violations', r'dob violation', value=_NUMBER, overwrite=True,
+              same_line_fallback=True, title='DOB Violations'),
+    FieldRule('ecb_violations', r'ecb violation', value=_NUMBER, overwrite=True,
+              same_line_fallback=True, title='ECB Violations'),
+    FieldRule('hpd_violations', r'hpd violation', value=_NUMBER, overwrite=True,
+              same_line_fallback=True, title='HPD Violations'),
+    FieldRule('dob_complaints', r'dob complaint', value=_NUMBER, overwrite=True,
+              same_line_fallback=True, title='DOB Complaints'),
+]
+
+OVERVIEW_MATCHER = FieldMatcher(OVERVIEW_RULES)
+OVERVIEW_PAIR_MATCHER = FieldMatcher(OVERVIEW_PAIR_RULES)
+VIOLATION_MATCHER = FieldMatcher(VIOLATION_RULES)
+
+# Fields whose absence means a tab produced nothing; address/ZIP/borough also come
+# from the URL, and a few missing fields are just missing data
+SIGNAL_FIELDS = {
+    'overview': [field for field in OVERVIEW_FIELDS if field not in ('address', 'zip_code', 'borough')],
+    'violations': VIOLATION_FIELDS,
+}
+
+
+def empty_overview():
+    return dict.fromkeys(OVERVIEW_FIELDS)
+
+
+def empty_violations():
+    return dict.fromkeys(VIOLATION_FIELDS)
+
+
+def parse_overview(lines, h1=None, label_value_pairs=None, url=None, log=None):
+    """
+    Extract overview fields from rendered page content
+
+    Args:
+        lines: Rendered body text lines
+        h1: Text of the page's first <h1>, if any
+        label_value_pairs: Short two-line div texts as [label, value]
+        url: Page URL, used as a last resort for the address
+        log: Optional callable receiving a message per field found
+
+    Returns:
+        dict: Overview fields, None where not found
+    """
+    log = log or _noop
+    overview_data = empty_overview()
+
+    # Strategy 1: Extract from page text
+    OVERVIEW_MATCHER.scan(lines, overview_data, log)
+
+    # Strategy 2: H1 for address
+    if h1 and h1.strip() and not overview_data['address']:
+        overview_data['address'] = h1.strip()
+        log(f"  Found Address in H1: {h1.strip()}")
+
+    # Strategy 3: Structured label/value pairs
+    OVERVIEW_PAIR_MATCHER.apply_pairs(label_value_pairs or [], overview_data, log)
+
+    # Strategy 4: Extract from URL if address still missing
+    if not overview_data['address'] and url:
+        for part in url.split('/'):
+            if '-' in part and any(c.isdigit() for c in part) and 'building' not in part.lower():
+                address_candidate = part.replace('-', ' ').title()
+                overview_data['address'] = address_candidate
+                log(f"  Extracted Address from URL: {address_candidate}")
+                break
+
+    return overview_data
+
+
+def parse_violations(lines, log=None):
+    """
+    Extract violation counts from rendered violations tab text
+
+    Args:
+        lines: Rendered body text lines
+        log: Optional callable receiving a message per field found
+
+    Returns:
+        dict: Violation counts as strings, None where not found
+    """
+    return VIOLATION_MATCHER.scan(lines, empty_violations(), log or _noop)
+
+
+def parse_overview_html(html, url=None, log=None):
+    """Parse overview fields straight from HTML (live page_source or a saved file)"""
+    document = PageDocument(html)
+    return parse_overview(document.lines, document.h1, document.label_value_pairs, url=url, log=log)
+
+
+def parse_violations_html(html, log=None):
+    """Parse violation counts straight from HTML (live page_source or a saved file)"""
+    return parse_violations(PageDocument(html).lines, log=log)
+
+
+def main():
+    import argparse
+    import json
+    import os
+    import time
+
+    parser = argparse.ArgumentParser(description='Re-parse saved MarketProof pages without a browser')
+    parser.add_argument('paths', nargs='+', help='HTML files or directories of .html files')
+    parser.add_argument('--tab', choices=['auto', 'overview', 'violations'], default='auto',
+                        help="Parser to use (auto picks violations for files named '*violations*')")
+    args = parser.parse_args()
+
+    files = []
+    for path in args.paths:
+        if os.path.isdir(path):
+            files.extend(os.path.join(path, name) for name in sorted(os.listdir(path)) if name.endswith('.html'))
+        else:
+            files.append(path)
+
+    start = time.perf_counter()
+    for path in files:
+        with open(path, encoding='utf-8', errors='replace') as f:
+            html = f.read()
+        tab = args.tab
+        if tab == 'auto':
+            tab = 'violations' if 'violations' in os.path.basename(path).lower() else 'overview'
+        data = parse_violations_html(html) if tab == 'violations' else parse_overview_html(html)
+        print(json.dumps({'file': path, 'tab': tab, 'data': data}, ensure_ascii=False))
+    elapsed = time.perf_counter() - start
+
+    rate = len(files) / elapsed if elapsed else 0.0
+    print(f"✓ Parsed {len(files)} pages in {elapsed:.3f}s ({rate:.0f} pages/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+HTTP Pre-flight for Building URLs
+Checks a building URL with a cheap HEAD (or streamed GET) over a pooled
+requests.Session before a browser slot is spent on it: 404s are rejected,
+redirects are followed to the canonical URL, and every outcome is counted.
+Results are memoized per URL for the life of the Preflight.
+"""
+
+import threading
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import scrape_logging
+
+
+logger = scrape_logging.get_logger('preflight')
+
+
+class PageNotFound(ValueError):
+    """The URL does not point at an existing building page"""
+
+
+class Preflight:
+    STATUSES = ('ok', 'redirected', 'missing', 'unverified', 'error')
+
+    def __init__(self, session=None, timeout=10, pool_size=16, building_path='/building/',
+                 user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+                            '(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'):
+        """
+        Create a pre-flight checker (share one between threads)
+
+        Args:
+            session: Optional requests.Session (e.g. pointed at a local stub server)
+            timeout: Seconds per request
+            pool_size: Pooled keep-alive connections per host
+            building_path: Path fragment a URL must still contain after redirects;
+                a redirect away from it (e.g. to a search page) counts as missing
+            user_agent: User-Agent header, matching the browser's
+        """
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            session.headers['User-Agent'] = user_agent
+        self.session = session
+        self.timeout = timeout
+        self.building_path = building_path
+        self.counts = {status: 0 for status in self.STATUSES}
+        self.counts['cached'] = 0
+        self._results = {}
+        self._lock = threading.Lock()
+
+    def check(self, url):
+        """
+        Look a URL up over HTTP without rendering it
+
+        Only 404/410 (or a redirect off the building pages) count as missing;
+        blocked, throttled or failing requests come back 'unverified'/'error'
+        so the browser still gets to try.
+
+        Returns:
+            dict: {'url': canonical URL, 'status': one of STATUSES, 'status_code': int or None}
+        """
+        with self._lock:
+            result = self._results.get(url)
+            if result is not None:
+                self.counts['cached'] += 1
+                return result
+
+        try:
+            response = self.session.head(url, allow_redirects=True, timeout=self.timeout)
+            if response.status_code in (405, 501):
+                # HEAD not supported: fetch headers only and drop the body
+                response = self.session.get(url, allow_redirects=True, timeout=self.timeout, stream=True)
+                response.close()
+        except requests.RequestException as e:
+            result = {'url': url, 'status': 'error', 'status_code': None, 'error': str(e)}
+        else:
+            code = response.status_code
+            redirected = bool(response.history) and response.url != url
+            if code in (404, 410):
+                status = 'missing'
+            elif redirected and self.building_path not in urlparse(response.url).path:
+                status = 'missing'
+            elif code >= 400:
+                status = 'unverified'
+            elif redirected:
+                status = 'redirected'
+            else:
+                status = 'ok'
+            result = {'url': response.url if status == 'redirected' else url, 'status': status, 'status_code': code}
+            if redirected and status == 'missing':
+                result['location'] = response.url
+
+        with self._lock:
+            self.counts[result['status']] += 1
+            # Transient outcomes are not remembered, so a later call checks again
+            if result['status'] in ('ok', 'redirected', 'missing'):
+                self._results[url] = result
+        return result
+
+    def resolve(self, url):
+        """
+        Canonical URL to scrape
+
+        Raises:
+            PageNotFound: The URL is missing (404/410 or redirected off the building pages)
+        """
+        result = self.check(url)
+        if result['status'] == 'missing':
+            if 'location' in result:
+                raise PageNotFound(f"{url} redirects to {result['location']}, which is not a building page")
+            raise PageNotFound(f"{url} does not exist (HTTP {result['status_code']})")
+        if result['status'] == 'redirected':
+            logger.info("✓ Pre-flight: %s redirects to %s", url, result['url'])
+        return result['url']
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counts)
+
+    def print_stats(self):
+        stats = self.stats()
+        print(f"\n{'='*60}")
+        print("PRE-FLIGHT:")
+        print(f"{'='*60}")
+        print(f"OK: {stats['ok']}  Redirected: {stats['redirected']}  Missing: {stats['missing']}")
+        print(f"Unverified: {stats['unverified']}  Errors: {stats['error']}  Memoized: {stats['cached']}")
+        print(f"{'='*60}\n")
+
+    def close(self):
+        self.session.close()
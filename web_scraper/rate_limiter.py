@@ -0,0 +1,267 @@
+"""
+Shared Rate Limiter
+A token bucket shared by every scraper pointed at the same state file:
+threads, worker processes and separate runs on one machine all draw from it,
+so parallel browsers never add up to more than the site tolerates. The
+bucket is a small JSON file guarded by an OS file lock (no external service).
+
+The rate adapts AIMD-style from the outcomes the scrapers report: it creeps
+up while pages load quickly and cleanly, is halved when the error rate or
+load times climb, and a bot-block page halves it and pauses everyone for a
+cool-down. The learned rate is kept in the file, so the next run starts at
+what the site last sustained.
+
+Usage:
+    python rate_limiter.py rate_limit.json            # show the shared state
+    python rate_limiter.py rate_limit.json --reset    # forget the learned rate
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+import scrape_logging
+
+
+logger = scrape_logging.get_logger('rate_limiter')
+
+
+def _lock(handle):
+    if fcntl:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        return
+    while True:
+        try:
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+            return
+        except OSError:
+            # LK_LOCK gives up after ~10 seconds; keep waiting
+            continue
+
+
+def _unlock(handle):
+    try:
+        if fcntl:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+        else:
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+    except OSError:
+        pass
+
+
+class RateLimiter:
+    def __init__(self, path=None, max_rate=1.0, min_rate=0.05, start_rate=None, burst=2,
+                 window=10, max_error_rate=0.1, slowdown=2.0, cooldown=60.0, sleep=time.sleep):
+        """
+        Create a limiter (share one per process; processes share the state file)
+
+        Args:
+            path: JSON state file shared across processes (None keeps the bucket in this process)
+            max_rate: Ceiling in page loads per second for everyone sharing the bucket
+            min_rate: Floor the rate is never cut below
+            start_rate: Rate for a new state file (defaults to half of max_rate)
+            burst: Tokens that can accumulate while idle
+            window: Outcomes per adjustment step
+            max_error_rate: Error share in a window above which the rate is halved
+            slowdown: Mean load time over this multiple of the healthy baseline halves the rate
+            cooldown: Seconds nobody navigates after a bot-block page
+            sleep: Function used to wait for a token
+        """
+        self.path = path
+        self.max_rate = max_rate
+        self.min_rate = max(0.001, min(min_rate, max_rate))
+        self.start_rate = start_rate or max_rate / 2
+        self.burst = max(1, burst)
+        self.window = max(1, int(window))
+        self.max_error_rate = max_error_rate
+        self.slowdown = slowdown
+        self.cooldown = cooldown
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._memory_state = None
+        self.counts = {'acquired': 0, 'waited_seconds': 0.0, 'errors': 0, 'blocks': 0}
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def _new_state(self, now):
+        return {'rate': self.start_rate, 'tokens': 1.0, 'updated': now, 'blocked_until': 0.0,
+                'baseline_seconds': None, 'window': {'requests': 0, 'errors': 0, 'seconds': 0.0}}
+
+    def _update(self, change):
+        """Apply change(state, now) to the shared state under the locks and return its result"""
+        with self._lock:
+            now = time.time()
+            if not self.path:
+                if self._memory_state is None:
+                    self._memory_state = self._new_state(now)
+                return change(self._memory_state, now)
+
+            with open(f'{self.path}.lock', 'a+') as lock_handle:
+                _lock(lock_handle)
+                try:
+                    try:
+                        with open(self.path, encoding='utf-8') as f:
+                            state = json.load(f)
+                    except (OSError, ValueError):
+                        state = self._new_state(now)
+                    result = change(state, now)
+                    temp_path = f'{self.path}.{os.getpid()}.{threading.get_ident()}.tmp'
+                    with open(temp_path, 'w', encoding='utf-8') as f:
+                        json.dump(state, f)
+                    os.replace(temp_path, self.path)
+                    return result
+                finally:
+                    _unlock(lock_handle)
+
+    def _rate(self, state):
+        """The shared rate within this limiter's bounds (processes may be configured differently)"""
+        return min(self.max_rate, max(self.min_rate, state['rate']))
+
+    def _refill(self, state, now):
+        # No tokens accrue during a block cool-down
+        elapsed = max(0.0, now - max(state['updated'], state['blocked_until']))
+        state['tokens'] = min(self.burst, state['tokens'] + elapsed * self._rate(state))
+        state['updated'] = max(now, state['updated'])
+
+    def acquire(self):
+        """
+        Block until a page load may start
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        def take(state, now):
+            self._refill(state, now)
+            if now < state['blocked_until']:
+                return state['blocked_until'] - now
+            if state['tokens'] >= 1:
+                state['tokens'] -= 1
+                return 0.0
+            return (1 - state['tokens']) / self._rate(state)
+
+        waited = 0.0
+        while True:
+            wait = self._update(take)
+            if not wait:
+                break
+            # Others may take the token first; wait and ask again
+            self._sleep(wait)
+            waited += wait
+        with self._lock:
+            self.counts['acquired'] += 1
+            self.counts['waited_seconds'] += waited
+        return waited
+
+    def record(self, seconds, ok=True):
+        """
+        Report how a page load went; every `window` reports the shared rate is adjusted
+
+        Args:
+            seconds: Time from navigation to the page being ready
+            ok: False for a failed navigation (transport or HTTP error); a page
+                that loads but lacks some labels is not an error
+        """
+        def observe(state, now):
+            window = state['window']
+            window['requests'] += 1
+            window['errors'] += 0 if ok else 1
+            window['seconds'] += seconds
+            if window['requests'] < self.window:
+                return None
+
+            error_rate = window['errors'] / window['requests']
+            mean_seconds = window['seconds'] / window['requests']
+            baseline = state['baseline_seconds'] or mean_seconds
+            previous = self._rate(state)
+            if error_rate > self.max_error_rate:
+                reason = f'{error_rate:.0%} errors'
+                state['rate'] = max(self.min_rate, previous / 2)
+            elif mean_seconds > baseline * self.slowdown:
+                reason = f'loads slowed to {mean_seconds:.1f}s (baseline {baseline:.1f}s)'
+                state['rate'] = max(self.min_rate, previous / 2)
+            else:
+                reason = 'healthy'
+                state['rate'] = min(self.max_rate, previous + self.max_rate / 20)
+                # Only healthy windows move the baseline, so a slowdown cannot become the norm
+                state['baseline_seconds'] = round(baseline * 0.8 + mean_seconds * 0.2, 3)
+            state['window'] = {'requests': 0, 'errors': 0, 'seconds': 0.0}
+            return previous, state['rate'], reason
+
+        if not ok:
+            with self._lock:
+                self.counts['errors'] += 1
+        change = self._update(observe)
+        if change and change[0] != change[1]:
+            log = logger.info if change[1] > change[0] else logger.warning
+            log("Rate %.2f → %.2f page loads/s (%s)", change[0], change[1], change[2])
+
+    def record_block(self):
+        """Report a bot-block page: halve the rate and pause every scraper for the cool-down"""
+        def block(state, now):
+            self._refill(state, now)
+            state['rate'] = max(self.min_rate, self._rate(state) / 2)
+            state['tokens'] = 0.0
+            state['blocked_until'] = now + self.cooldown
+            state['window'] = {'requests': 0, 'errors': 0, 'seconds': 0.0}
+            return state['rate']
+
+        with self._lock:
+            self.counts['blocks'] += 1
+        rate = self._update(block)
+        logger.warning("✗ Blocked by the site: pausing %.0fs, rate cut to %.2f page loads/s", self.cooldown, rate)
+
+    def state(self):
+        """The shared bucket as it stands now"""
+        def snapshot(state, now):
+            self._refill(state, now)
+            return dict(state)
+        return self._update(snapshot)
+
+    def reset(self):
+        """Forget the learned rate and baseline"""
+        def clear(state, now):
+            state.clear()
+            state.update(self._new_state(now))
+        self._update(clear)
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self.counts)
+        counts['waited_seconds'] = round(counts['waited_seconds'], 2)
+        counts['rate'] = round(self.state()['rate'], 3)
+        return counts
+
+    def print_stats(self):
+        stats = self.stats()
+        print(f"\n{'='*60}")
+        print("RATE LIMITER:")
+        print(f"{'='*60}")
+        print(f"Page loads: {stats['acquired']}  Waited: {stats['waited_seconds']}s  "
+              f"Errors: {stats['errors']}  Blocks: {stats['blocks']}")
+        print(f"Shared rate now: {stats['rate']} page loads/s (max {self.max_rate})")
+        print(f"{'='*60}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Inspect or reset a shared rate limiter')
+    parser.add_argument('state', help='State file passed to --rate-limit')
+    parser.add_argument('--reset', action='store_true', help='Forget the learned rate and baseline')
+    args = parser.parse_args()
+    limiter = RateLimiter(args.state)
+    if args.reset:
+        limiter.reset()
+    print(json.dumps(limiter.state(), indent=2, sort_keys=True))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+"""
+Retry Scheduler
+Classifies scrape failures per phase (navigation timeout, missing canvas,
+bot block, empty parse, browser error) so a transient failure is no longer
+indistinguishable from a building that has no data. Only the failing tab is
+scraped again, after a jittered exponential backoff; a building that still
+fails is written to a dead-letter queue (JSONL) that a later run can replay
+tab by tab. Permanent failures such as a missing page are never retried.
+
+Usage:
+    python retry_scheduler.py dead_letters.jsonl    # failures by phase and kind
+"""
+
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+import page_parser
+from preflight import PageNotFound
+import scrape_logging
+
+
+logger = scrape_logging.get_logger('retry')
+
+NAVIGATION_TIMEOUT = 'navigation_timeout'
+MISSING_CANVAS = 'missing_canvas'
+BOT_BLOCK = 'bot_block'
+EMPTY_PARSE = 'empty_parse'
+BROWSER_ERROR = 'browser_error'
+NOT_FOUND = 'not_found'
+ERROR = 'error'
+
+# Failure kinds worth reloading a tab for, with their backoff multiplier
+# (a bot block needs the site to calm down, not just another try)
+TAB_BACKOFF = {
+    NAVIGATION_TIMEOUT: 1.0,
+    MISSING_CANVAS: 1.0,
+    EMPTY_PARSE: 1.0,
+    BOT_BLOCK: 5.0,
+}
+
+# Failure kinds worth re-running a whole job for (on a fresh browser)
+JOB_BACKOFF = {
+    NAVIGATION_TIMEOUT: 1.0,
+    BROWSER_ERROR: 1.0,
+    BOT_BLOCK: 5.0,
+}
+
+# Lower-cased phrases of interstitial/challenge pages served instead of the building page
+BOT_BLOCK_MARKERS = (
+    'captcha',
+    'are you a robot',
+    'verify you are human',
+    'unusual traffic',
+    'access denied',
+    'request blocked',
+    'too many requests',
+    'attention required',
+    'just a moment...',
+)
+
+
+def classify_error(error):
+    """Failure kind of an exception raised while scraping"""
+    if isinstance(error, PageNotFound):
+        return NOT_FOUND
+    if isinstance(error, TimeoutException):
+        return NAVIGATION_TIMEOUT
+    if isinstance(error, WebDriverException):
+        return BROWSER_ERROR
+    return ERROR
+
+
+def is_bot_block(page_text):
+    """True if a page's title/leading text looks like a challenge or block page"""
+    text = (page_text or '')[:5000].lower()
+    return any(marker in text for marker in BOT_BLOCK_MARKERS)
+
+
+def classify_phase(tab, data, error=None, timed_out=False):
+    """
+    Failure kind of one scraped tab, or None if it produced data
+
+    Args:
+        tab: 'overview', 'footprint' or 'violations'
+        data: The tab's parsed fields, or for 'footprint' its image path/feature
+        error: Exception the phase caught (and logged) instead of raising
+        timed_out: The tab's readiness wait expired before parsing
+
+    Returns:
+        str: One of the failure kinds above, or None
+    """
+    if tab == 'footprint':
+        if data:
+            return None
+    elif any((data or {}).get(field) for field in page_parser.SIGNAL_FIELDS[tab]):
+        return None
+    if error is not None:
+        return classify_error(error)
+    if timed_out:
+        return NAVIGATION_TIMEOUT
+    return MISSING_CANVAS if tab == 'footprint' else EMPTY_PARSE
+
+
+class RetryScheduler:
+    def __init__(self, max_retries=2, base_delay=2.0, max_delay=60.0, metrics=None, sleep=time.sleep):
+        """
+        Configure retries (share one instance between workers)
+
+        Args:
+            max_retries: Extra attempts per building (tab retries) and per job (whole-job retries)
+            base_delay: Backoff before the first retry, doubled on each further retry
+            max_delay: Cap on a single backoff before jitter
+            metrics: Optional ScrapeMetrics; each retry increments 'retries' by kind and phase
+            sleep: Function used to wait out a backoff
+        """
+        self.max_retries = max(0, int(max_retries))
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.metrics = metrics
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self.counts = {'failures': Counter(), 'retries': Counter(), 'recovered': Counter(), 'exhausted': Counter()}
+
+    def delay(self, kind, retry, backoff=TAB_BACKOFF):
+        """Full-jitter exponential backoff: uniform(0, min(max_delay, base_delay * 2**retry) * multiplier)"""
+        ceiling = min(self.max_delay, self.base_delay * 2 ** retry) * backoff.get(kind, 1.0)
+        return random.uniform(0, ceiling)
+
+    def retry_tabs(self, failures, retry):
+        """
+        Decide which failed tabs get another attempt and wait out the backoff
+
+        Args:
+            failures: {tab: failure kind} from the attempt just made
+            retry: Retries already made for this building
+
+        Returns:
+            set: Tabs to scrape again (empty once everything left is final)
+        """
+        tabs = {tab for tab, kind in failures.items() if kind in TAB_BACKOFF and retry < self.max_retries}
+        with self._lock:
+            self.counts['failures'].update(failures.values())
+            self.counts['exhausted'].update(kind for tab, kind in failures.items() if tab not in tabs)
+        if tabs:
+            # One wait covers every retried tab, sized for the failure that needs the longest
+            kind = max((failures[tab] for tab in tabs), key=TAB_BACKOFF.get)
+            self._wait(kind, retry, ','.join(sorted(tabs)), TAB_BACKOFF)
+        return tabs
+
+    def record_recovered(self, tabs, previous_failures):
+        """Count tabs that succeeded on a retry"""
+        with self._lock:
+            self.counts['recovered'].update(previous_failures[tab] for tab in tabs if tab in previous_failures)
+
+    def retry_job(self, error, retry):
+        """
+        Decide whether a job that raised is run again, waiting out the backoff if so
+
+        Args:
+            error: The exception the job raised
+            retry: Retries already made for this job
+
+        Returns:
+            bool: True if the caller should run the job again (on a fresh browser)
+        """
+        kind = classify_error(error)
+        again = kind in JOB_BACKOFF and retry < self.max_retries
+        with self._lock:
+            self.counts['failures'][kind] += 1
+            if not again:
+                self.counts['exhausted'][kind] += 1
+        if again:
+            self._wait(kind, retry, 'job', JOB_BACKOFF)
+        return again
+
+    def _wait(self, kind, retry, phase, backoff):
+        delay = self.delay(kind, retry, backoff)
+        with self._lock:
+            self.counts['retries'][kind] += 1
+        if self.metrics:
+            self.metrics.inc('retries', kind=kind, phase=phase)
+        logger.warning("↻ Retrying %s after %s (retry %d of %d) in %.1fs",
+                       phase, kind, retry + 1, self.max_retries, delay)
+        self._sleep(delay)
+
+    def stats(self):
+        with self._lock:
+            return {name: dict(counter) for name, counter in self.counts.items()}
+
+    def print_stats(self):
+        stats = self.stats()
+        print(f"\n{'='*60}")
+        print("RETRIES:")
+        print(f"{'='*60}")
+        for name in ('failures', 'retries', 'recovered', 'exhausted'):
+            counts = ', '.join(f'{kind} {count}' for kind, count in sorted(stats[name].items()))
+            print(f"{name.title() + ':':<11}{counts or 'none'}")
+        print(f"{'='*60}\n")
+
+
+class DeadLetterQueue:
+    def __init__(self, path):
+        """
+        Append-only JSONL record of buildings that kept failing (share one between workers)
+
+        Args:
+            path: JSONL file; existing entries are kept
+        """
+        self.path = path
+        self.count = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def add(self, job, failures, url=None, error=None, output_file=None, worker=None):
+        """
+        Record a job that still failed after its retries
+
+        Args:
+            job: The batch job dict (address/zip_code or json_path)
+            failures: {tab: failure kind}, or {'job': kind} when the whole job raised
+            url: Building URL, if it was resolved
+            error: Error message for a job that raised
+            output_file: Where the partial record was written (a JSON file can be refreshed in place)
+            worker: Worker id
+        """
+        entry = {'at': datetime.now().isoformat(), 'job': job, 'url': url, 'failures': failures,
+                 'error': error, 'output_file': output_file, 'worker': worker}
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False, default=str) + '\n')
+            self.count += 1
+
+    @staticmethod
+    def load(path):
+        """Entries of a dead-letter file, keeping only the latest one per job"""
+        entries = {}
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                entries[json.dumps(entry.get('job'), sort_keys=True)] = entry
+        return list(entries.values())
+
+
+def summarize_dead_letters(path):
+    """Counts of dead-lettered failures by phase and kind"""
+    entries = DeadLetterQueue.load(path)
+    by_failure = Counter(f'{phase}:{kind}' for entry in entries for phase, kind in (entry.get('failures') or {}).items())
+    return {'entries': len(entries), 'failures': dict(by_failure.most_common())}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Summarize a dead-letter queue')
+    parser.add_argument('dead_letters', help='JSONL file written with --dead-letters')
+    args = parser.parse_args()
+    print(json.dumps(summarize_dead_letters(args.dead_letters), indent=2, sort_keys=True))
+
+
+if __name__ == "__main__":
+    main()
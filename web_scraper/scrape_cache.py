@@ -0,0 +1,296 @@
+"""
+Persistent Scrape Cache
+On-disk cache in front of NYCBuildingScraper.scrape_building, keyed by the
+normalized building URL produced by address_to_url. The overview (building
+info + footprint) and the violations counts are stored as separate sections
+with their own TTLs, since violations change far more often.
+
+Several processes can share one cache directory: an entry is read, merged
+and rewritten under an OS file lock (one of a fixed set of lock files in
+'.locks/'), so sections written by different processes are all kept.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+DAY = 24 * 60 * 60
+
+SECTIONS = ('overview', 'violations')
+
+# Entries hash onto this many lock files, so locking never adds a file per entry
+LOCK_STRIPES = 256
+
+# Puts between rescans of the directory while the index is well inside its limits
+RESCAN_EVERY = 100
+
+# Fraction of max_entries/max_bytes at which every put rescans before evicting
+RESCAN_THRESHOLD = 0.9
+
+# Eviction goes down to this fraction of the limits, so a full cache is not
+# rescanned (and evicted from) again on the very next put
+EVICT_TO = 0.8
+
+
+def _lock(handle):
+    if fcntl:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        return
+    while True:
+        try:
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+            return
+        except OSError:
+            # LK_LOCK gives up after ~10 seconds; keep waiting
+            continue
+
+
+def _unlock(handle):
+    try:
+        if fcntl:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+        else:
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+    except OSError:
+        pass
+
+
+def cache_key(url):
+    """Normalize a building URL into a cache key (no tab/query, lowercase, no trailing slash)"""
+    base = url.split('#')[0].split('?')[0]
+    return base.strip().rstrip('/').lower()
+
+
+class ScrapeCache:
+    def __init__(self, cache_dir='scrape_cache', overview_ttl=30 * DAY, violations_ttl=DAY,
+                 max_entries=50000, max_bytes=500 * 1024 * 1024):
+        """
+        Open (or create) a cache directory
+
+        Args:
+            cache_dir: Directory holding one JSON file per building
+            overview_ttl: Seconds an overview/footprint section stays fresh
+            violations_ttl: Seconds a violations section stays fresh
+            max_entries: Evict least recently used buildings beyond this count
+                (down to EVICT_TO of it)
+            max_bytes: Evict least recently used buildings beyond this total size
+        """
+        self.cache_dir = cache_dir
+        self.ttls = {'overview': overview_ttl, 'violations': violations_ttl}
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = {section: 0 for section in SECTIONS}
+        self.misses = {section: 0 for section in SECTIONS}
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        self._lock_dir = os.path.join(cache_dir, '.locks')
+        os.makedirs(self._lock_dir, exist_ok=True)
+        # file name -> [last access time, size in bytes]; other processes sharing
+        # the directory add and evict files, so it is rescanned periodically and
+        # whenever it gets close to a limit
+        self._index = {}
+        self._bytes = 0
+        self._puts_since_rescan = 0
+        self._rescan()
+
+    def _rescan(self):
+        """Refresh the index from the directory, keeping this process's newer access times"""
+        index = {}
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and entry.name.endswith('.json'):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                known = self._index.get(entry.name)
+                index[entry.name] = [max(stat.st_mtime, known[0] if known else 0), stat.st_size]
+        self._index = index
+        self._bytes = sum(size for _, size in index.values())
+        self._puts_since_rescan = 0
+
+    def _track(self, filename, accessed, size):
+        previous = self._index.get(filename)
+        self._bytes += size - (previous[1] if previous else 0)
+        self._index[filename] = [accessed, size]
+
+    def _untrack(self, filename):
+        previous = self._index.pop(filename, None)
+        if previous:
+            self._bytes -= previous[1]
+
+    def _filename(self, key):
+        return hashlib.sha1(key.encode('utf-8')).hexdigest() + '.json'
+
+    def _load(self, filename):
+        try:
+            with open(os.path.join(self.cache_dir, filename), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def get(self, url):
+        """
+        Look up the fresh sections cached for a building
+
+        Args:
+            url: Building URL (any tab)
+
+        Returns:
+            dict: Section name -> {'data': ..., 'fetched_at': epoch seconds} for
+                every section that is still within its TTL (may be empty)
+        """
+        filename = self._filename(cache_key(url))
+        now = time.time()
+        with self._lock:
+            # Not trusting the index alone: another process may have written the entry since
+            entry = self._load(filename)
+            if entry is None:
+                self._untrack(filename)
+            fresh = {}
+            for section in SECTIONS:
+                cached = (entry or {}).get(section)
+                if cached and now - cached['fetched_at'] <= self.ttls[section] and self._usable(section, cached):
+                    fresh[section] = cached
+                    self.hits[section] += 1
+                else:
+                    self.misses[section] += 1
+            if fresh:
+                if filename not in self._index:
+                    try:
+                        self._track(filename, now, os.path.getsize(os.path.join(self.cache_dir, filename)))
+                    except OSError:
+                        pass
+                else:
+                    self._index[filename][0] = now
+            return fresh
+
+    @staticmethod
+    def _usable(section, cached):
+        # A cached footprint path is only useful while the image still exists
+        if section == 'overview':
+            footprint = cached['data'].get('building_footprint_url')
+            if footprint and not os.path.exists(footprint):
+                return False
+        return True
+
+    def put(self, url, sections):
+        """
+        Store freshly scraped sections for a building, keeping any others
+
+        Args:
+            url: Building URL (any tab)
+            sections: Section name -> data dict, e.g. {'violations': {...}}
+        """
+        key = cache_key(url)
+        filename = self._filename(key)
+        path = os.path.join(self.cache_dir, filename)
+        now = time.time()
+        with self._lock:
+            # Other processes may be merging their sections into the same entry
+            with open(self._lock_path(filename), 'a+') as lock_handle:
+                _lock(lock_handle)
+                try:
+                    entry = self._load(filename) or {'key': key}
+                    for section, data in sections.items():
+                        entry[section] = {'data': data, 'fetched_at': now}
+
+                    temp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+                    with open(temp_path, 'w', encoding='utf-8') as f:
+                        json.dump(entry, f, ensure_ascii=False)
+                    os.replace(temp_path, path)
+                finally:
+                    _unlock(lock_handle)
+
+            self._track(filename, now, os.path.getsize(path))
+            self._puts_since_rescan += 1
+            self._evict()
+
+    def _lock_path(self, filename):
+        stripe = int(filename[:8], 16) % LOCK_STRIPES
+        return os.path.join(self._lock_dir, f'{stripe:03d}.lock')
+
+    def _near_limit(self):
+        return (len(self._index) >= self.max_entries * RESCAN_THRESHOLD
+                or self._bytes >= self.max_bytes * RESCAN_THRESHOLD)
+
+    def _evict(self):
+        """Drop least recently used entries until under the count and size limits"""
+        # Count entries other processes wrote too, but only scan the directory
+        # every RESCAN_EVERY puts or when this process's view is close to a limit
+        if self._puts_since_rescan >= RESCAN_EVERY or self._near_limit():
+            self._rescan()
+        if len(self._index) <= self.max_entries and self._bytes <= self.max_bytes:
+            return
+        max_entries, max_bytes = int(self.max_entries * EVICT_TO), self.max_bytes * EVICT_TO
+        for filename, _ in sorted(self._index.items(), key=lambda item: item[1][0]):
+            if len(self._index) <= max_entries and self._bytes <= max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.cache_dir, filename))
+            except OSError:
+                pass
+            self._untrack(filename)
+            self.evictions += 1
+
+    def prune(self, max_age=None):
+        """
+        Delete entries whose every section is older than max_age
+
+        Args:
+            max_age: Seconds (defaults to the longest TTL)
+
+        Returns:
+            int: Number of entries removed
+        """
+        max_age = max_age if max_age is not None else max(self.ttls.values())
+        now = time.time()
+        removed = 0
+        with self._lock:
+            self._rescan()
+            for filename in list(self._index):
+                entry = self._load(filename) or {}
+                fetched = [entry[section]['fetched_at'] for section in SECTIONS if section in entry]
+                if not fetched or now - max(fetched) > max_age:
+                    try:
+                        os.remove(os.path.join(self.cache_dir, filename))
+                    except OSError:
+                        pass
+                    self._untrack(filename)
+                    removed += 1
+        return removed
+
+    def stats(self):
+        """Hit/miss counts per section plus current size"""
+        with self._lock:
+            self._rescan()
+            return {
+                'hits': dict(self.hits),
+                'misses': dict(self.misses),
+                'evictions': self.evictions,
+                'entries': len(self._index),
+                'bytes': self._bytes,
+            }
+
+    def print_stats(self):
+        stats = self.stats()
+        print(f"\n{'='*60}")
+        print("SCRAPE CACHE:")
+        print(f"{'='*60}")
+        for section in SECTIONS:
+            hits, misses = stats['hits'][section], stats['misses'][section]
+            rate = hits / (hits + misses) * 100 if hits + misses else 0.0
+            print(f"{section.title()}: {hits} hits, {misses} misses ({rate:.0f}% hit rate)")
+        print(f"Entries: {stats['entries']} ({stats['bytes'] / 1024:.0f} KB), evictions: {stats['evictions']}")
+        print(f"{'='*60}\n")
@@ -0,0 +1,174 @@
+"""
+Scraper Logging
+Logging shared by the scraper modules, replacing per-field prints. Every
+record carries the worker (thread name), the building being scraped and the
+current phase from a per-thread context, so output from many workers stays
+attributable. configure() sets the level and format (text or JSON lines);
+quiet mode keeps only one summary record per building plus warnings and
+errors; queued mode hands records to a QueueHandler and formats/writes them
+on a background listener thread, so a slow terminal or disk never holds up
+a browser.
+
+Per-field details and page summaries are logged at DEBUG, progress at INFO.
+Until configure() is called, only warnings and errors reach stderr.
+"""
+
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+from contextlib import contextmanager
+from datetime import datetime
+
+
+ROOT = 'nyc_scraper'
+
+TEXT_FORMAT = '%(asctime)s %(levelname)-7s [%(threadName)s %(building)s %(phase)s] %(message)s'
+
+_building = contextvars.ContextVar('building', default='-')
+_phase = contextvars.ContextVar('phase', default='-')
+_listener = None
+
+
+def get_logger(name):
+    """Logger under the scraper's namespace, e.g. get_logger('scraper')"""
+    return logging.getLogger(f'{ROOT}.{name}')
+
+
+# One record per finished building; the only INFO output left in quiet mode
+summary_logger = get_logger('summary')
+
+
+@contextmanager
+def building(building_id):
+    """Tag records logged inside the block (in this thread) with a building id"""
+    token = _building.set(building_id)
+    try:
+        yield
+    finally:
+        _building.reset(token)
+
+
+@contextmanager
+def phase(name):
+    """Tag records logged inside the block (in this thread) with a scrape phase"""
+    token = _phase.set(name)
+    try:
+        yield
+    finally:
+        _phase.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """Copies the calling thread's building/phase onto each record (must run in that thread)"""
+
+    def filter(self, record):
+        record.building = _building.get()
+        record.phase = _phase.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; a record's 'summary' extra is included as a nested object"""
+
+    def format(self, record):
+        entry = {
+            'at': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'worker': record.threadName,
+            'building': getattr(record, 'building', '-'),
+            'phase': getattr(record, 'phase', '-'),
+            'message': record.getMessage(),
+        }
+        if getattr(record, 'summary', None) is not None:
+            entry['summary'] = record.summary
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def configure(level='INFO', quiet=False, json_format=False, log_file=None, queued=False, stream=None):
+    """
+    Route the scraper's records to stdout (and optionally a file)
+
+    Safe to call again (e.g. in a worker process); previous handlers are replaced.
+
+    Args:
+        level: Level name or number ('DEBUG' shows every field; above INFO hides summaries too)
+        quiet: Only per-building summaries, warnings and errors (overrides level)
+        json_format: JSON lines instead of text
+        log_file: Optional file receiving the same records
+        queued: Write records on a background thread (QueueHandler/QueueListener)
+        stream: Stream for console output (defaults to sys.stdout)
+    """
+    global _listener
+    shutdown()
+
+    formatter = JsonFormatter() if json_format else logging.Formatter(TEXT_FORMAT)
+    handlers = [logging.StreamHandler(stream or sys.stdout)]
+    if log_file:
+        handlers.append(logging.FileHandler(log_file, encoding='utf-8'))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    root = logging.getLogger(ROOT)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+    root.propagate = False
+    root.setLevel(logging.WARNING if quiet else level)
+    # Quiet runs keep the summaries; otherwise they follow the requested level
+    summary_logger.setLevel(logging.INFO if quiet else logging.NOTSET)
+
+    if queued:
+        records = queue.SimpleQueue()
+        queue_handler = logging.handlers.QueueHandler(records)
+        # The context is read in the logging thread, before the record is queued
+        queue_handler.addFilter(ContextFilter())
+        root.addHandler(queue_handler)
+        _listener = logging.handlers.QueueListener(records, *handlers)
+        _listener.start()
+    else:
+        for handler in handlers:
+            handler.addFilter(ContextFilter())
+            root.addHandler(handler)
+
+
+def shutdown():
+    """Flush and stop the background listener, if any"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(shutdown)
+
+
+def add_arguments(parser):
+    """Add --log-level, --quiet, --log-json and --log-file to an argparse parser"""
+    parser.add_argument('--log-level', default='INFO', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+                        help='DEBUG also logs every extracted field')
+    parser.add_argument('--quiet', action='store_true',
+                        help='Only one summary line per building, plus warnings and errors')
+    parser.add_argument('--log-json', action='store_true', help='Log JSON lines instead of text')
+    parser.add_argument('--log-file', help='Also write the log to this file')
+
+
+def configure_from_args(args, queued=True, stream=None):
+    """configure() from the flags added by add_arguments"""
+    configure(args.log_level, quiet=args.quiet, json_format=args.log_json, log_file=args.log_file,
+              queued=queued, stream=stream)
+
+
+def log_options(args):
+    """The logging flags as a picklable dict for configure(**options) in worker processes"""
+    return {'level': args.log_level, 'quiet': args.quiet, 'json_format': args.log_json, 'log_file': args.log_file}
@@ -0,0 +1,298 @@
+"""
+Scrape Metrics
+Instrumentation shared by scrapers and batch runners: per-phase spans
+(navigate, wait, parse, footprint, violations, save, ...), counters for
+field hit rates, WebDriver round trips, retries and outcomes, and per-phase
+p50/p95. Each building is appended as one JSON line to an event log, and the
+aggregates are written in the Prometheus text exposition format (e.g. for
+node_exporter's textfile collector).
+
+Usage:
+    python scrape_metrics.py metrics/metrics.jsonl    # per-phase summary of an event log
+"""
+
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+
+PREFIX = 'nyc_scraper'
+
+# Upper bounds (seconds) of the phase duration histogram buckets
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+# Durations kept per phase for percentiles (a uniform sample beyond this)
+MAX_SAMPLES = 10000
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a list of numbers (None when empty)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))]
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+
+class _Histogram:
+    def __init__(self):
+        self.buckets = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+        self.samples = []
+
+    def observe(self, seconds):
+        for index, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.buckets[index] += 1
+        self.count += 1
+        self.sum += seconds
+        if len(self.samples) < MAX_SAMPLES:
+            self.samples.append(seconds)
+        else:
+            # Reservoir sampling keeps the percentiles representative of the whole run
+            slot = random.randrange(self.count)
+            if slot < MAX_SAMPLES:
+                self.samples[slot] = seconds
+
+
+class ScrapeMetrics:
+    def __init__(self, events_path=None, prometheus_path=None, export_interval=15.0):
+        """
+        Create a metrics registry (share one between threads)
+
+        Args:
+            events_path: Optional JSONL file receiving one line per building/failure
+            prometheus_path: Optional Prometheus text file, rewritten at most every
+                export_interval seconds and on close
+            export_interval: Seconds between Prometheus file rewrites
+        """
+        self.events_path = events_path
+        self.prometheus_path = prometheus_path
+        self.export_interval = export_interval
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        # (name, sorted label items) -> value
+        self._counters = {}
+        # phase -> _Histogram
+        self._phases = {}
+        self._last_export = time.monotonic()
+        self._events = None
+        if events_path:
+            os.makedirs(os.path.dirname(os.path.abspath(events_path)), exist_ok=True)
+            self._events = open(events_path, 'a', encoding='utf-8')
+
+    def inc(self, name, value=1, **labels):
+        """Add to a counter, e.g. inc('fields', tab='overview', field='floors', result='found')"""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, phase, seconds):
+        """Record one span of a phase"""
+        with self._lock:
+            histogram = self._phases.get(phase)
+            if histogram is None:
+                histogram = self._phases[phase] = _Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def span(self, phase):
+        """Time a block as one span of a phase"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(phase, time.perf_counter() - start)
+
+    def counter(self, name, **labels):
+        with self._lock:
+            return self._counters.get((name, tuple(sorted(labels.items()))), 0)
+
+    def record_building(self, building_data, tab_sources=None, fields=None, webdriver_commands=0, worker=None):
+        """
+        Record a finished scrape: its phase timings, field hits and round trips
+
+        Args:
+            building_data: Building dict as returned by scrape_building/scrape_tabs
+            tab_sources: {tab: 'browser' or 'api'} for the tabs fetched in this scrape
+            fields: {tab: field dict} whose empty values count as misses (fetched tabs only,
+                so cached data does not inflate the hit rate)
+            webdriver_commands: WebDriver commands sent for this building
+            worker: Optional worker id for the event log
+        """
+        timings = building_data.get('timings', {})
+        for phase, seconds in timings.items():
+            if isinstance(seconds, (int, float)):
+                self.observe(phase, seconds)
+
+        missing = {}
+        for tab, values in (fields or {}).items():
+            for field, value in values.items():
+                self.inc('fields', tab=tab, field=field, result='found' if value else 'missing')
+                if not value:
+                    missing.setdefault(tab, []).append(field)
+        for section, result in (building_data.get('cache') or {}).items():
+            self.inc('cache', section=section, result=result)
+        for tab, source in (tab_sources or {}).items():
+            self.inc('tabs_fetched', tab=tab, source=source)
+        for tab, kind in (building_data.get('failures') or {}).items():
+            if tab in (tab_sources or {}):
+                self.inc('tab_failures', tab=tab, kind=kind)
+        self.inc('webdriver_round_trips', webdriver_commands)
+        self.inc('buildings', status='ok')
+
+        self._write_event({
+            'event': 'building',
+            'url': building_data.get('url'),
+            'worker': worker,
+            'tabs': tab_sources or {},
+            'timings': timings,
+            'missing_fields': missing,
+            'failures': building_data.get('failures'),
+            'webdriver_commands': webdriver_commands,
+            'cache': building_data.get('cache'),
+            'network': building_data.get('network'),
+        })
+
+    def record_failure(self, job, error, worker=None):
+        """Record a building that raised instead of returning data"""
+        self.inc('buildings', status='failed', error=type(error).__name__)
+        self._write_event({'event': 'failure', 'job': job, 'worker': worker,
+                           'error_type': type(error).__name__, 'error': str(error)})
+
+    def _write_event(self, event):
+        with self._lock:
+            if self._events:
+                event = {'at': datetime.now().isoformat(), 'pid': os.getpid(), **event}
+                self._events.write(json.dumps(event, ensure_ascii=False, default=str) + '\n')
+                self._events.flush()
+            export = (self.prometheus_path is not None and
+                      time.monotonic() - self._last_export >= self.export_interval)
+        if export:
+            self.write_prometheus()
+
+    def summary(self):
+        """{phase: {count, mean, p50, p95, max}} plus counters"""
+        with self._lock:
+            phases = {phase: {
+                'count': histogram.count,
+                'mean': round(histogram.sum / histogram.count, 3),
+                'p50': round(percentile(histogram.samples, 0.5), 3),
+                'p95': round(percentile(histogram.samples, 0.95), 3),
+                'max': round(max(histogram.samples), 3),
+            } for phase, histogram in self._phases.items() if histogram.count}
+            counters = [{'name': name, 'labels': dict(labels), 'value': value}
+                        for (name, labels), value in sorted(self._counters.items())]
+        return {'phases': phases, 'counters': counters}
+
+    def prometheus_text(self):
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            names = sorted({name for name, _ in self._counters})
+            for name in names:
+                lines.append(f'# TYPE {PREFIX}_{name}_total counter')
+                for (counter_name, labels), value in sorted(self._counters.items()):
+                    if counter_name == name:
+                        lines.append(f'{PREFIX}_{name}_total{_labels(labels)} {value}')
+
+            metric = f'{PREFIX}_phase_seconds'
+            lines.append(f'# HELP {metric} Time spent per scrape phase')
+            lines.append(f'# TYPE {metric} histogram')
+            for phase, histogram in sorted(self._phases.items()):
+                for bound, count in zip(BUCKETS, histogram.buckets):
+                    lines.append(f'{metric}_bucket{_labels([("phase", phase), ("le", bound)])} {count}')
+                lines.append(f'{metric}_bucket{_labels([("phase", phase), ("le", "+Inf")])} {histogram.count}')
+                lines.append(f'{metric}_sum{_labels([("phase", phase)])} {round(histogram.sum, 6)}')
+                lines.append(f'{metric}_count{_labels([("phase", phase)])} {histogram.count}')
+
+            lines.append(f'# TYPE {PREFIX}_uptime_seconds gauge')
+            lines.append(f'{PREFIX}_uptime_seconds {round(time.time() - self.started_at, 3)}')
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path=None):
+        """Rewrite the Prometheus text file (temp file + rename, so scrapers never see half a file)"""
+        path = path or self.prometheus_path
+        if not path:
+            return
+        text = self.prometheus_text()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        temp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(temp_path, path)
+        with self._lock:
+            self._last_export = time.monotonic()
+
+    def print_stats(self):
+        summary = self.summary()
+        print(f"\n{'='*60}")
+        print("PHASE TIMINGS (seconds):")
+        print(f"{'='*60}")
+        print(f"{'Phase':<22}{'Count':>7}{'Mean':>9}{'p50':>9}{'p95':>9}{'Max':>9}")
+        for phase, stats in sorted(summary['phases'].items()):
+            print(f"{phase:<22}{stats['count']:>7}{stats['mean']:>9}{stats['p50']:>9}{stats['p95']:>9}{stats['max']:>9}")
+        found = sum(c['value'] for c in summary['counters'] if c['name'] == 'fields' and c['labels']['result'] == 'found')
+        total = sum(c['value'] for c in summary['counters'] if c['name'] == 'fields')
+        if total:
+            print(f"Field hit rate: {found}/{total} ({found / total:.1%})")
+        print(f"WebDriver round trips: {self.counter('webdriver_round_trips')}")
+        print(f"{'='*60}\n")
+
+    def close(self):
+        """Write the final Prometheus file and close the event log"""
+        self.write_prometheus()
+        with self._lock:
+            if self._events:
+                self._events.close()
+                self._events = None
+
+
+def summarize_events(path):
+    """Per-phase {count, p50, p95} and field miss counts from a JSONL event log"""
+    durations = {}
+    misses = {}
+    failures = 0
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue
+            if event.get('event') == 'failure':
+                failures += 1
+                continue
+            for phase, seconds in (event.get('timings') or {}).items():
+                durations.setdefault(phase, []).append(seconds)
+            for tab, fields in (event.get('missing_fields') or {}).items():
+                for field in fields:
+                    misses[f'{tab}.{field}'] = misses.get(f'{tab}.{field}', 0) + 1
+    phases = {phase: {'count': len(values), 'p50': percentile(values, 0.5), 'p95': percentile(values, 0.95)}
+              for phase, values in durations.items()}
+    return {'phases': phases, 'missing_fields': misses, 'failures': failures}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Summarize a scrape metrics event log')
+    parser.add_argument('events', help='JSONL event log written with --metrics-dir')
+    args = parser.parse_args()
+    print(json.dumps(summarize_events(args.events), indent=2, sort_keys=True))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,499 @@
+"""
+Sharded Scraper Runner
+Splits an address list into shards recorded in an on-disk manifest, then
+scrapes them with worker processes that each own one NYCBuildingScraper.
+Every finished address is appended to its shard's status log once its record
+is on disk (for Parquet, once its file is published), so a crashed or killed
+run resumes where it stopped; output files a killed process left unpublished
+are recovered at startup. Shards can be spread over several machines that
+share the run directory, each with its own output directory.
+
+Usage:
+    python sharded_runner.py init addresses.csv runs/city --shards 32
+    python sharded_runner.py run runs/city --processes 4
+    python sharded_runner.py run runs/city --processes 4 --output-format parquet
+    python sharded_runner.py run runs/city --only 0-15        # on machine A
+    python sharded_runner.py run runs/city --processes 8 --quiet --log-file runs/city/scrape.log
+    python sharded_runner.py run runs/city --processes 8 --max-rate 1.0    # adaptive limit shared by all processes
+    python sharded_runner.py status runs/city
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import socket
+import time
+from datetime import datetime
+
+from batch_scraper import load_addresses
+from output_sink import SINKS, open_sink, recover_parts
+from scrape_metrics import ScrapeMetrics
+from retry_scheduler import RetryScheduler
+from rate_limiter import RateLimiter
+import scrape_logging
+
+
+logger = scrape_logging.get_logger('sharded')
+
+MANIFEST_NAME = 'manifest.json'
+
+
+def _shard_path(run_dir, shard_id, suffix):
+    return os.path.join(run_dir, f'shard_{shard_id:04d}{suffix}')
+
+
+def create_manifest(addresses, run_dir, shards=8):
+    """
+    Write a manifest and one job file per shard
+
+    Addresses are dealt round-robin so every shard gets a similar mix.
+
+    Args:
+        addresses: List of (address, zip_code) tuples
+        run_dir: Directory for the manifest, shard files and status logs
+        shards: Number of shards
+
+    Returns:
+        dict: The manifest
+    """
+    if os.path.exists(os.path.join(run_dir, MANIFEST_NAME)):
+        raise FileExistsError(f"{run_dir} already has a manifest; use 'run' to resume it")
+    os.makedirs(run_dir, exist_ok=True)
+    shards = max(1, min(int(shards), len(addresses) or 1))
+
+    files = [open(_shard_path(run_dir, shard_id, '.jobs.jsonl'), 'w', encoding='utf-8')
+             for shard_id in range(shards)]
+    try:
+        for index, (address, zip_code) in enumerate(addresses):
+            job = {'index': index, 'address': address, 'zip_code': zip_code}
+            files[index % shards].write(json.dumps(job, ensure_ascii=False) + '\n')
+    finally:
+        for f in files:
+            f.close()
+
+    manifest = {
+        'created_at': datetime.now().isoformat(),
+        'total': len(addresses),
+        'shards': shards,
+    }
+    _write_json_atomic(os.path.join(run_dir, MANIFEST_NAME), manifest)
+    logger.info("✓ Manifest for %d addresses in %d shards written to %s", len(addresses), shards, run_dir)
+    return manifest
+
+
+def load_manifest(run_dir):
+    with open(os.path.join(run_dir, MANIFEST_NAME), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _write_json_atomic(path, data):
+    temp_path = f'{path}.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(temp_path, path)
+
+
+def read_shard_jobs(run_dir, shard_id):
+    with open(_shard_path(run_dir, shard_id, '.jobs.jsonl'), encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def read_shard_status(run_dir, shard_id):
+    """
+    Latest recorded status per job index
+
+    A line cut short by a crash is ignored, so that job simply runs again.
+
+    Returns:
+        dict: index -> status record ({'status': 'done'|'failed', ...})
+    """
+    statuses = {}
+    path = _shard_path(run_dir, shard_id, '.status.jsonl')
+    if not os.path.exists(path):
+        return statuses
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            statuses[record['index']] = record
+    return statuses
+
+
+class ShardLock:
+    """Exclusive claim on a shard so two processes/machines never scrape it at once"""
+
+    def __init__(self, run_dir, shard_id):
+        self.path = _shard_path(run_dir, shard_id, '.lock')
+        self.owner = {'host': socket.gethostname(), 'pid': os.getpid()}
+
+    def acquire(self):
+        for _ in range(2):
+            try:
+                fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                if not self._is_stale():
+                    return False
+                # The owner died on this host; take the shard over
+                try:
+                    os.remove(self.path)
+                except FileNotFoundError:
+                    pass
+                continue
+            with os.fdopen(fd, 'w') as f:
+                json.dump(self.owner, f)
+            return True
+        return False
+
+    def _is_stale(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                owner = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if owner.get('host') != self.owner['host']:
+            # Can't check processes on other machines; remove the lock by hand if that host is gone
+            return False
+        try:
+            os.kill(owner['pid'], 0)
+        except ProcessLookupError:
+            return True
+        except PermissionError:
+            return False
+        return False
+
+    def release(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def _append_status(status_file, record):
+    status_file.write(json.dumps(record, ensure_ascii=False) + '\n')
+    status_file.flush()
+    os.fsync(status_file.fileno())
+
+
+def _append_published(status_file, deferred, sink):
+    """Append the deferred 'done' records whose output file the sink has published; returns the rest"""
+    published = set(sink.files_written)
+    for record in deferred:
+        if record['output_file'] in published:
+            _append_status(status_file, record)
+    return [record for record in deferred if record['output_file'] not in published]
+
+
+def run_shard(scraper_holder, run_dir, shard_id, options, sink, metrics=None, retry_scheduler=None,
+              rate_limiter=None, profile_manager=None):
+    """
+    Scrape every pending job in one shard with the process's scraper
+
+    With a sink that is not durable (Parquet) a job is only marked done once
+    the file holding its record is published; the shard's file is published
+    when the shard ends, so a crash before then re-runs those jobs.
+
+    Args:
+        scraper_holder: One-item list holding the process's scraper (replaced on failure)
+        run_dir: Run directory
+        shard_id: Shard to process
+        options: Dict with retry_failed, headless and profile_dir
+        sink: The process's output sink (see output_sink)
+        metrics: Optional ScrapeMetrics for the process
+        retry_scheduler: Optional RetryScheduler reloading failed tabs of a building
+        rate_limiter: Optional RateLimiter shared with the other processes through its state file
+        profile_manager: Optional ProfileManager handing out the process's persistent Chrome profiles
+
+    Returns:
+        dict: Counts for this pass over the shard
+    """
+    from nyc_building_scraper import NYCBuildingScraper
+
+    counts = {'done': 0, 'failed': 0, 'skipped': 0}
+    deferred = []
+    lock = ShardLock(run_dir, shard_id)
+    if not lock.acquire():
+        logger.warning("✗ Shard %s is locked by another runner, skipping", shard_id)
+        return counts
+
+    try:
+        statuses = read_shard_status(run_dir, shard_id)
+        with open(_shard_path(run_dir, shard_id, '.status.jsonl'), 'a', encoding='utf-8') as status_file:
+            for job in read_shard_jobs(run_dir, shard_id):
+                previous = statuses.get(job['index'], {}).get('status')
+                if previous == 'done' or (previous == 'failed' and not options['retry_failed']):
+                    counts['skipped'] += 1
+                    continue
+
+                record = {'index': job['index'], 'address': job['address'], 'shard': shard_id,
+                          'host': socket.gethostname(), 'pid': os.getpid()}
+                try:
+                    if scraper_holder[0] is None:
+                        scraper_holder[0] = NYCBuildingScraper(headless=options['headless'],
+                                                               profile_manager=profile_manager, metrics=metrics,
+                                                               retry_scheduler=retry_scheduler,
+                                                               rate_limiter=rate_limiter)
+                    scraper = scraper_holder[0]
+                    building_data = scraper.scrape_by_address(job['address'], job['zip_code'])
+                    record['output_file'] = sink.write(building_data)
+                    record['status'] = 'done'
+                    if building_data.get('failures'):
+                        # Saved with these tabs empty after their retries
+                        record['failures'] = building_data['failures']
+                    counts['done'] += 1
+                except Exception as e:
+                    logger.exception("✗ Shard %s failed on %s: %s", shard_id, job['address'], e)
+                    record['status'] = 'failed'
+                    record['error'] = str(e)
+                    counts['failed'] += 1
+                    if metrics:
+                        metrics.record_failure({'index': job['index'], 'address': job['address']}, e,
+                                               worker=f'shard-{shard_id}')
+                    # Start a fresh browser for the next job in case this one is wedged
+                    if scraper_holder[0] is not None:
+                        try:
+                            scraper_holder[0].close()
+                        except Exception:
+                            pass
+                        scraper_holder[0] = None
+                record['at'] = datetime.now().isoformat()
+                if record['status'] == 'done' and not sink.durable:
+                    deferred.append(record)
+                else:
+                    _append_status(status_file, record)
+                if deferred:
+                    deferred = _append_published(status_file, deferred, sink)
+            if deferred:
+                sink.rotate()
+                deferred = _append_published(status_file, deferred, sink)
+    finally:
+        lock.release()
+    return counts
+
+
+def _worker_process(run_dir, shard_queue, options):
+    """Process entry point: one scraper and one output sink for the life of the process, many shards"""
+    from browser_profile import ProfileManager
+
+    scrape_logging.configure(**options['log'], queued=True)
+    scraper_holder = [None]
+    # Shared by every scraper this process starts, including replacements after a failure
+    profile_manager = None
+    if options.get('profile_dir'):
+        profile_manager = ProfileManager(options['profile_dir'], max_profiles=options['processes'])
+    # JSONL flushes every record, so the status log can mark a job done right after it is written;
+    # Parquet keeps its batched row groups and jobs are marked done when the file is published
+    sink_options = {'flush_every': 1} if options['output_format'] == 'jsonl' else {}
+    sink = open_sink(options['output_format'], options['output_dir'], **sink_options)
+    metrics = None
+    if options.get('metrics_dir'):
+        # One event log and Prometheus file per process; node_exporter's textfile collector merges them
+        metrics = ScrapeMetrics(os.path.join(options['metrics_dir'], f'metrics-{os.getpid()}.jsonl'),
+                                os.path.join(options['metrics_dir'], f'metrics-{os.getpid()}.prom'))
+    retry_scheduler = None
+    if options.get('retries'):
+        retry_scheduler = RetryScheduler(options['retries'], metrics=metrics)
+    rate_limiter = None
+    if options.get('max_rate') or options.get('rate_limit'):
+        rate_limiter = RateLimiter(options.get('rate_limit') or os.path.join(run_dir, 'rate_limit.json'),
+                                   max_rate=options.get('max_rate') or 1.0)
+    try:
+        while True:
+            try:
+                shard_id = shard_queue.get(timeout=1)
+            except queue.Empty:
+                return
+            counts = run_shard(scraper_holder, run_dir, shard_id, options, sink, metrics, retry_scheduler,
+                               rate_limiter, profile_manager)
+            logger.info("✓ Shard %s: %d done, %d failed, %d already finished",
+                        shard_id, counts['done'], counts['failed'], counts['skipped'])
+    finally:
+        if scraper_holder[0] is not None:
+            scraper_holder[0].close()
+        sink.close()
+        if metrics:
+            metrics.close()
+        scrape_logging.shutdown()
+
+
+def select_shards(manifest, only=None):
+    """
+    Shard ids to process: all of the manifest's, or the given subset
+
+    Raises:
+        ValueError: If an id in `only` is not a shard of this run
+    """
+    if only is None:
+        return list(range(manifest['shards']))
+    unknown = sorted(set(only) - set(range(manifest['shards'])))
+    if unknown:
+        listed = ', '.join(map(str, unknown[:10])) + (f' (+{len(unknown) - 10} more)' if len(unknown) > 10 else '')
+        raise ValueError(f"Unknown shard ids {listed}: "
+                         f"the run has {manifest['shards']} shards (0-{manifest['shards'] - 1})")
+    return sorted(only)
+
+
+def run(run_dir, processes=None, only=None, output_dir='scraped_buildings', retry_failed=False, headless=True,
+        profile_dir=None, output_format='json', metrics_dir=None, log=None, retries=0, max_rate=None,
+        rate_limit=None):
+    """
+    Process (or resume) a run with worker processes
+
+    Args:
+        run_dir: Directory created by create_manifest
+        processes: Worker processes (defaults to CPU count)
+        only: Optional iterable of shard ids for this machine
+        output_dir: Directory for scraped output ('.part' files left by killed processes
+            are recovered first, so machines must not share it)
+        retry_failed: Re-attempt addresses whose last status is 'failed'
+        headless: Run Chrome without a visible window
+        profile_dir: Optional directory of persistent Chrome profiles shared by the processes
+        output_format: 'json', 'jsonl' or 'parquet' (bulk formats write one file series per process)
+        metrics_dir: Optional directory for per-process metrics (metrics-<pid>.jsonl/.prom)
+        log: Keyword arguments for scrape_logging.configure in each worker process
+            (a shared log_file is appended to by every process)
+        retries: Retries for a building's failed tabs (see retry_scheduler)
+        max_rate: Optional ceiling in page loads per second for all processes together;
+            the adaptive rate is shared through a state file (see rate_limiter)
+        rate_limit: State file for the rate limit (defaults to rate_limit.json in run_dir)
+
+    Returns:
+        dict: Progress summary after the run (see summarize)
+
+    Raises:
+        ValueError: If `only` names a shard the manifest does not have
+    """
+    manifest = load_manifest(run_dir)
+    shard_ids = select_shards(manifest, only)
+    processes = max(1, min(processes or os.cpu_count() or 1, len(shard_ids) or 1))
+    options = {'output_dir': output_dir, 'retry_failed': retry_failed, 'headless': headless,
+               'profile_dir': profile_dir, 'processes': processes, 'output_format': output_format,
+               'metrics_dir': metrics_dir, 'log': log or {}, 'retries': retries,
+               'max_rate': max_rate, 'rate_limit': rate_limit}
+
+    recover_parts(output_dir)
+
+    shard_queue = multiprocessing.Queue()
+    for shard_id in shard_ids:
+        shard_queue.put(shard_id)
+
+    print(f"\n{'='*60}")
+    print(f"Running {len(shard_ids)} shards from {run_dir} with {processes} processes")
+    print(f"{'='*60}\n")
+
+    start = time.perf_counter()
+    workers = [multiprocessing.Process(target=_worker_process, args=(run_dir, shard_queue, options),
+                                       name=f'shard-worker-{i}')
+               for i in range(processes)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    summary = summarize(run_dir)
+    summary['elapsed_seconds'] = round(time.perf_counter() - start, 2)
+    print_summary(summary)
+    return summary
+
+
+def summarize(run_dir):
+    """Count done/failed/pending addresses per shard from the status logs"""
+    manifest = load_manifest(run_dir)
+    summary = {'total': manifest['total'], 'done': 0, 'failed': 0, 'pending': 0, 'shards': {}}
+    for shard_id in range(manifest['shards']):
+        jobs = read_shard_jobs(run_dir, shard_id)
+        statuses = read_shard_status(run_dir, shard_id)
+        done = sum(1 for job in jobs if statuses.get(job['index'], {}).get('status') == 'done')
+        failed = sum(1 for job in jobs if statuses.get(job['index'], {}).get('status') == 'failed')
+        shard = {'jobs': len(jobs), 'done': done, 'failed': failed, 'pending': len(jobs) - done - failed}
+        summary['shards'][shard_id] = shard
+        for key in ('done', 'failed', 'pending'):
+            summary[key] += shard[key]
+    return summary
+
+
+def print_summary(summary):
+    print(f"\n{'='*60}")
+    print("RUN STATUS:")
+    print(f"{'='*60}")
+    print(f"Total: {summary['total']}  Done: {summary['done']}  "
+          f"Failed: {summary['failed']}  Pending: {summary['pending']}")
+    if 'elapsed_seconds' in summary:
+        print(f"Elapsed: {summary['elapsed_seconds']}s")
+    unfinished = [shard_id for shard_id, shard in summary['shards'].items() if shard['pending']]
+    if unfinished:
+        print(f"Shards with pending work: {', '.join(str(shard_id) for shard_id in unfinished)}")
+    print(f"{'='*60}\n")
+
+
+def _parse_shard_ids(text):
+    """Parse '0-3,7,9' into a set of shard ids"""
+    shard_ids = set()
+    for part in text.split(','):
+        if '-' in part:
+            first, last = part.split('-', 1)
+            shard_ids.update(range(int(first), int(last) + 1))
+        elif part.strip():
+            shard_ids.add(int(part))
+    return shard_ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sharded, resumable multi-process building scraper')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    init_parser = commands.add_parser('init', help='Create a manifest from an address file')
+    init_parser.add_argument('addresses', help='CSV/text file with "address[,zip_code]" rows')
+    init_parser.add_argument('run_dir', help='Directory for the manifest and status logs')
+    init_parser.add_argument('--shards', type=int, default=8, help='Number of shards')
+
+    run_parser = commands.add_parser('run', help='Process or resume a run')
+    run_parser.add_argument('run_dir', help='Directory created by init')
+    run_parser.add_argument('--processes', type=int, help='Worker processes (default: CPU count)')
+    run_parser.add_argument('--only', type=_parse_shard_ids, help="Shards for this machine, e.g. '0-7,12'")
+    run_parser.add_argument('--output-dir', default='scraped_buildings', help='Directory for scraped output')
+    run_parser.add_argument('--output-format', choices=list(SINKS), default='json',
+                            help='json: one file per building; jsonl/parquet: rotating bulk files')
+    run_parser.add_argument('--retry-failed', action='store_true', help='Re-attempt failed addresses')
+    run_parser.add_argument('--retries', type=int, default=0,
+                            help='Reload failed tabs of a building up to this many times (with backoff)')
+    run_parser.add_argument('--max-rate', type=float,
+                            help='Adaptive page-load limit per second shared by all processes (default 1.0 '
+                                 'when --rate-limit is given)')
+    run_parser.add_argument('--rate-limit', metavar='PATH',
+                            help='State file for --max-rate (default: rate_limit.json in the run directory)')
+    run_parser.add_argument('--headed', action='store_true', help='Show the Chrome windows')
+    run_parser.add_argument('--profile-dir', help='Reuse warm Chrome profiles from this directory')
+    run_parser.add_argument('--metrics-dir', help='Write per-process phase timings and Prometheus metrics here')
+    scrape_logging.add_arguments(run_parser)
+
+    status_parser = commands.add_parser('status', help='Show run progress')
+    status_parser.add_argument('run_dir', help='Directory created by init')
+
+    args = parser.parse_args()
+    if args.command == 'run':
+        # Workers set up their own (queued) logging; no listener thread to carry into forks
+        scrape_logging.configure_from_args(args, queued=False)
+    else:
+        scrape_logging.configure()
+    if args.command == 'init':
+        create_manifest(load_addresses(args.addresses), args.run_dir, args.shards)
+    elif args.command == 'run':
+        try:
+            select_shards(load_manifest(args.run_dir), args.only)
+        except ValueError as e:
+            run_parser.error(str(e))
+        run(args.run_dir, processes=args.processes, only=args.only, output_dir=args.output_dir,
+            retry_failed=args.retry_failed, headless=not args.headed, profile_dir=args.profile_dir,
+            output_format=args.output_format, metrics_dir=args.metrics_dir,
+            log=scrape_logging.log_options(args), retries=args.retries, max_rate=args.max_rate,
+            rate_limit=args.rate_limit)
+    else:
+        print_summary(summarize(args.run_dir))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+"""
+Spatial Index of Scraped Buildings
+Grid index over the footprint centroids of scraped buildings (vector
+footprint mode), persisted as JSON. Answers "which known buildings are
+nearest to this GPS fix" in microseconds, so a photo scan can be resolved or
+narrowed locally before anything expensive runs.
+
+Usage:
+    python spatial_index.py build scraped_buildings --index buildings_index.json
+    python spatial_index.py query buildings_index.json 40.7651 -73.9799 -k 3
+"""
+
+import argparse
+import heapq
+import json
+import math
+import os
+import time
+from collections import defaultdict
+
+from output_sink import read_records
+
+
+EARTH_RADIUS_M = 6371008.8
+
+
+def distance_m(lat1, lon1, lat2, lon2):
+    """Equirectangular distance in metres (accurate to well under 1% within a city)"""
+    x = math.radians(lon2 - lon1) * math.cos(math.radians((lat1 + lat2) / 2))
+    y = math.radians(lat2 - lat1)
+    return math.hypot(x, y) * EARTH_RADIUS_M
+
+
+def _point_in_ring(lat, lon, ring):
+    inside = False
+    for (x1, y1), (x2, y2) in zip(ring, ring[1:] + ring[:1]):
+        if (y1 > lat) != (y2 > lat) and lon < x1 + (lat - y1) * (x2 - x1) / (y2 - y1):
+            inside = not inside
+    return inside
+
+
+def point_in_geometry(lat, lon, geometry):
+    """True if the point lies inside a GeoJSON Polygon/MultiPolygon (and outside its holes)"""
+    shapes = [geometry['coordinates']] if geometry['type'] == 'Polygon' else geometry['coordinates']
+    for rings in shapes:
+        if _point_in_ring(lat, lon, rings[0]) and not any(_point_in_ring(lat, lon, hole) for hole in rings[1:]):
+            return True
+    return False
+
+
+def building_entry(building_data):
+    """
+    Index entry for a scraped building, or None if it has no footprint location
+
+    Returns:
+        dict: address, url, lat, lon, footprint geometry and the cached scrape fields
+    """
+    footprint = building_data.get('building_footprint')
+    if not footprint or not footprint.get('properties', {}).get('centroid'):
+        return None
+    lon, lat = footprint['properties']['centroid']
+    return {
+        'address': building_data.get('building_info', {}).get('address'),
+        'url': building_data.get('url'),
+        'lat': lat,
+        'lon': lon,
+        'geometry': footprint.get('geometry'),
+        'building_info': building_data.get('building_info', {}),
+        'violations': building_data.get('violations', {}),
+        'building_footprint_url': building_data.get('building_footprint_url'),
+        'scraped_at': building_data.get('scraped_at'),
+    }
+
+
+class SpatialIndex:
+    def __init__(self, cell_size=0.001):
+        """
+        Create an empty index
+
+        Args:
+            cell_size: Grid cell edge in degrees (0.001 is about 110 m north-south)
+        """
+        self.cell_size = cell_size
+        # url (or insertion number for url-less entries) -> entry
+        self._entries = {}
+        self._cells = defaultdict(list)
+        self._row_range = None
+        self._col_range = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def entries(self):
+        return list(self._entries.values())
+
+    def _cell(self, lat, lon):
+        return math.floor(lat / self.cell_size), math.floor(lon / self.cell_size)
+
+    def add(self, building_data):
+        """
+        Index a scraped building (a newer scrape of the same URL replaces the old entry)
+
+        Returns:
+            bool: False if the building has no footprint centroid to index
+        """
+        entry = building_entry(building_data)
+        if entry is None:
+            return False
+        self.add_entry(entry)
+        return True
+
+    def add_entry(self, entry):
+        key = entry.get('url') or len(self._entries)
+        previous = self._entries.get(key)
+        if previous is not None:
+            if (previous.get('scraped_at') or '') > (entry.get('scraped_at') or ''):
+                return
+            self._cells[self._cell(previous['lat'], previous['lon'])].remove(previous)
+        self._entries[key] = entry
+        row, col = self._cell(entry['lat'], entry['lon'])
+        self._cells[(row, col)].append(entry)
+        if self._row_range is None:
+            self._row_range, self._col_range = [row, row], [col, col]
+        else:
+            self._row_range = [min(self._row_range[0], row), max(self._row_range[1], row)]
+            self._col_range = [min(self._col_range[0], col), max(self._col_range[1], col)]
+
+    def nearest(self, lat, lon, k=5, max_distance=None):
+        """
+        The k known buildings nearest to a point
+
+        Grid rings around the point's cell are searched outwards until no
+        unsearched cell can hold anything closer than the current k-th result.
+        Rings are clipped to the cells the data spans, and rings short of it are
+        skipped, so a far-away point (a bad GPS fix) costs no more than a scan
+        of every entry, which is what the search falls back to once it has
+        visited more cells than there are entries.
+        Among those k, a building whose footprint contains the point ranks first.
+
+        Args:
+            lat, lon: Query point (e.g. a photo's EXIF GPS fix)
+            k: Number of buildings to return
+            max_distance: Optional cut-off in metres
+
+        Returns:
+            list: Entries with added 'distance_m' and 'contains' keys, nearest first
+
+        Raises:
+            ValueError: If k is less than 1
+        """
+        if k < 1:
+            raise ValueError(f"k must be at least 1, got {k}")
+        if not self._entries:
+            return []
+        row, col = self._cell(lat, lon)
+        (first_row, last_row), (first_col, last_col) = self._row_range, self._col_range
+        # Metres covered by one ring of cells in the narrower (east-west) direction,
+        # taken at the latitude (query or data) furthest from the equator
+        widest_lat = min(90.0, max(abs(lat), abs(first_row * self.cell_size), abs((last_row + 1) * self.cell_size)))
+        ring_m = math.radians(self.cell_size) * EARTH_RADIUS_M * math.cos(math.radians(widest_lat))
+        # Rings before first_ring miss the data's cells entirely; past max_ring there are none
+        first_ring = max(first_row - row, row - last_row, first_col - col, col - last_col, 0)
+        max_ring = max(abs(row - first_row), abs(row - last_row), abs(col - first_col), abs(col - last_col))
+        found = []
+        scanned = 0
+        for ring in range(first_ring, max_ring + 1):
+            # Cells in this ring and beyond are at least ring - 1 whole cells away
+            bound = max(0, ring - 1) * ring_m
+            if max_distance is not None and bound > max_distance:
+                break
+            if len(found) >= k and found[k - 1][0] <= bound:
+                break
+            if scanned > len(self._entries):
+                found = heapq.nsmallest(k, ((distance_m(lat, lon, entry['lat'], entry['lon']), entry)
+                                            for entry in self._entries.values()), key=lambda item: item[0])
+                break
+            for cell in self._ring_cells(row, col, ring):
+                scanned += 1
+                for entry in self._cells.get(cell, ()):
+                    found.append((distance_m(lat, lon, entry['lat'], entry['lon']), entry))
+            found.sort(key=lambda item: item[0])
+
+        results = []
+        for distance, entry in found[:k]:
+            if max_distance is not None and distance > max_distance:
+                break
+            contains = bool(entry.get('geometry')) and point_in_geometry(lat, lon, entry['geometry'])
+            results.append({**entry, 'distance_m': round(distance, 1), 'contains': contains})
+        results.sort(key=lambda result: (not result['contains'], result['distance_m']))
+        return results
+
+    def _ring_cells(self, row, col, ring):
+        """Cells of the ring around (row, col) that lie within the indexed rows and columns"""
+        (first_row, last_row), (first_col, last_col) = self._row_range, self._col_range
+        if ring == 0:
+            yield row, col
+            return
+        cols = range(max(col - ring, first_col), min(col + ring, last_col) + 1)
+        for edge_row in (row - ring, row + ring):
+            if first_row <= edge_row <= last_row:
+                for cell_col in cols:
+                    yield edge_row, cell_col
+        rows = range(max(row - ring + 1, first_row), min(row + ring - 1, last_row) + 1)
+        for edge_col in (col - ring, col + ring):
+            if first_col <= edge_col <= last_col:
+                for cell_row in rows:
+                    yield cell_row, edge_col
+
+    def save(self, path):
+        """Write the index as JSON (temp file + rename)"""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        temp_path = f'{path}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'cell_size': self.cell_size, 'entries': self.entries}, f, ensure_ascii=False)
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        index = cls(data['cell_size'])
+        for entry in data['entries']:
+            index.add_entry(entry)
+        return index
+
+
+def build_index(paths, cell_size=0.001):
+    """
+    Index every building in saved json/jsonl output
+
+    Returns:
+        tuple: (SpatialIndex, number of records skipped for lack of a footprint location)
+    """
+    index = SpatialIndex(cell_size)
+    skipped = 0
+    for building_data in read_records(paths):
+        if not index.add(building_data):
+            skipped += 1
+    return index, skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Nearest-building lookups over scraped buildings')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = commands.add_parser('build', help='Build an index from saved building output')
+    build_parser.add_argument('paths', nargs='+', help='Building .json/.jsonl files or directories')
+    build_parser.add_argument('--index', default='buildings_index.json', help='Index file to write')
+    build_parser.add_argument('--cell-size', type=float, default=0.001, help='Grid cell size in degrees')
+
+    query_parser = commands.add_parser('query', help='Print the nearest buildings to a point as JSON')
+    query_parser.add_argument('index', help='Index file written by build')
+    query_parser.add_argument('lat', type=float)
+    query_parser.add_argument('lon', type=float)
+    query_parser.add_argument('-k', type=int, default=5, help='Number of buildings')
+    query_parser.add_argument('--max-distance', type=float, help='Ignore buildings further than this (metres)')
+
+    args = parser.parse_args()
+    if args.command == 'query' and args.k < 1:
+        parser.error('-k must be at least 1')
+    if args.command == 'build':
+        index, skipped = build_index(args.paths, args.cell_size)
+        index.save(args.index)
+        print(f"✓ Indexed {len(index)} buildings into {args.index}")
+        if skipped:
+            print(f"✗ Skipped {skipped} records without footprint geometry (scrape with --footprint-mode vector)")
+    else:
+        index = SpatialIndex.load(args.index)
+        start = time.perf_counter()
+        results = index.nearest(args.lat, args.lon, args.k, args.max_distance)
+        elapsed = time.perf_counter() - start
+        print(json.dumps({'query_seconds': round(elapsed, 6), 'results': results}, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()